@@ -2,6 +2,7 @@
 # Run all Tests: ⏩ python -m pytest ../tests -vvv
 # Run specific Class Test: ⏩ python -m pytest -k "ClassName" ../tests -vvv
 # Run a specific Test: ⏩ python -m pytest -k "test_bye" ../tests -vvv
+# Trace the SQL of a test run, the report is printed at the end: ⏩ VOCAB_SQL_TRACE=1 python -m pytest ../tests
 
 # NOTE:
 # To tackle confirmation prompts, we are using the following approach: https://github.com/tiangolo/typer/issues/205
@@ -42,9 +43,8 @@ def pytest_sessionfinish(session, exitstatus):
     Teardown any state that was previously setup with a setup_module method.
     """
 
-    # close the connection
-    conn = sqlite3.connect("./VocabularyBuilder.db")
-    conn.close()
+    # close the connections opened by the app so the WAL is checkpointed before the file is removed
+    closeConnection()  # this is from Database.py
 
     # delete the test database
     if os.path.exists("VocabularyBuilder.db"):
@@ -0,0 +1,40 @@
+import sqlite3
+from datetime import datetime
+
+import modules.Database as Database
+from benchmarks.bench_commands import bench_size
+from benchmarks.synthetic import build_database
+
+
+class TestBenchmarks:
+    def test_synthetic_database_reproducible(self, tmp_path):
+        anchor = datetime(2023, 3, 1, 12, 0, 0)
+        dumps = []
+        for name in ["first.db", "second.db"]:
+            built = build_database(str(tmp_path / name), 2000, seed=7, anchor=anchor)
+            assert built["rows"]["words"] == 2000
+            assert built["rows"]["word_state"] == 200
+            conn = sqlite3.connect(built["path"])
+            dumps.append(
+                [
+                    conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+                    for table in ["words", "word_state", "cache_words", "quiz_history"]
+                ]
+            )
+            conn.close()
+        assert dumps[0] == dumps[1]
+        # the synthetic database never replaces the app database
+        assert Database.DB_PATH == "./VocabularyBuilder.db"
+
+    def test_bench_commands(self, tmp_path):
+        built = build_database(str(tmp_path / "synthetic.db"), 2000)
+        cases = bench_size(built["path"], str(tmp_path), repeat=1, only="rate")
+        assert set(cases) == {"rate --today", "rate --week", "rate --month", "rate --year"}
+        assert all(timings["error"] is None for timings in cases.values())
+        assert Database.DB_PATH == "./VocabularyBuilder.db"
+
+    def test_bench_quiz_build(self, tmp_path):
+        built = build_database(str(tmp_path / "synthetic.db"), 2000)
+        cases = bench_size(built["path"], str(tmp_path), repeat=1, only="quiz build")
+        assert set(cases) == {"quiz build", "quiz build --collection"}
+        assert all(timings["error"] is None for timings in cases.values())
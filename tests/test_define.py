@@ -16,6 +16,25 @@ class TestDefine:
         assert result.exit_code == 0
         assert """is not a valid word""" in result.stdout
 
+    def test_define_fake_word_cached(self, runner):
+        runner.invoke(app, ["define", "fakewordhaha"])
+        # second lookup is answered from the negative cache
+        result = runner.invoke(app, ["define", "fakewordhaha"])
+        assert result.exit_code == 0
+        assert """is not a valid word""" in result.stdout
+
+    def test_define_memoized(self, runner):
+        from modules.Dictionary import response_memo_info
+
+        runner.invoke(app, ["define", "hello"])
+        before = response_memo_info()
+        result = runner.invoke(app, ["define", "hello"])
+        after = response_memo_info()
+        assert result.exit_code == 0
+        # the response is parsed once, every later accessor is served from the memo
+        assert after.misses == before.misses
+        assert after.hits > before.hits
+
     def test_define_short(self, runner):
         result = runner.invoke(app, ["define", "hello", "--short"])
         assert result.exit_code == 0
@@ -58,3 +77,23 @@ class TestDefine:
         assert (
             """To direct a radar beam toward""" in result.stdout
         )  # substr from def of second word
+
+    def test_define_stdin(self, runner):
+        result = runner.invoke(app, ["define", "-", "--short"], input="hello\nsky\n")
+        assert result.exit_code == 0
+        assert "HELLO" in result.stdout
+        assert "SKY" in result.stdout
+
+    def test_define_file(self, runner, tmp_path):
+        words = tmp_path / "words.txt"
+        words.write_text("hello sky\nhello\n")
+        result = runner.invoke(app, ["define", "--file", str(words), "--short"])
+        assert result.exit_code == 0
+        # repeated words are printed again, in the order they were given
+        assert result.stdout.count("HELLO") == 2
+        assert result.stdout.index("HELLO") < result.stdout.index("SKY")
+
+    def test_define_no_words(self, runner):
+        result = runner.invoke(app, ["define"])
+        assert result.exit_code == 0
+        assert "Give the words to define" in result.stdout
@@ -3,6 +3,8 @@ from unittest import mock
 
 import pytest
 
+import modules.Database as Database
+from modules.SQLTrace import trace_sql
 from vocabCLI import app
 
 
@@ -91,6 +93,42 @@ class TestList:
         assert result.exit_code == 0
         assert "Date must fall within calendar range" in result.stdout
 
+    def test_list_date_range_uses_index(self, runner):
+        conn = Database.createConnection()
+        conn.executemany(
+            "INSERT INTO words (word, datetime) VALUES (?, ?)",
+            [("vernal", "2021-03-04 23:59:59"), ("autumnal", "2021-03-05 00:00:00")],
+        )
+        conn.commit()
+        with trace_sql() as trace:
+            result = runner.invoke(app, ["list", "--date"], input="04\n03\n2021")
+        assert "vernal" in result.stdout and "autumnal" not in result.stdout
+        stats = trace.statements["SELECT DISTINCT word FROM words WHERE epoch >= ? AND epoch < ?"]
+        assert stats.rows == 1 and not stats.scans
+
+        conn = Database.createConnection()
+        conn.execute("DELETE FROM words WHERE word IN ('vernal', 'autumnal')")
+        conn.commit()
+
+    def test_list_days_uses_index(self, runner):
+        conn = Database.createConnection()
+        conn.executemany(
+            "INSERT INTO words (word, datetime) VALUES (?, datetime('now', 'localtime', ?))",
+            [("vernal", "-1 hours"), ("autumnal", "-5 days")],
+        )
+        conn.commit()
+        with trace_sql() as trace:
+            result = runner.invoke(app, ["list", "--days", "3"])
+        assert "vernal" in result.stdout and "autumnal" not in result.stdout
+        stats = trace.statements[
+            "SELECT DISTINCT word FROM words INDEXED BY idx_words_epoch WHERE epoch > ?"
+        ]
+        assert not stats.scans
+
+        conn = Database.createConnection()
+        conn.execute("DELETE FROM words WHERE word IN ('vernal', 'autumnal')")
+        conn.commit()
+
     def test_list_last(self, runner):
         runner.invoke(app, ["define", "math", "school"])
         result = runner.invoke(app, ["list", "-L", "2"])
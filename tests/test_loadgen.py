@@ -0,0 +1,80 @@
+from unittest import mock
+
+import pytest
+
+import modules.Database as Database
+from modules.LoadGen import parse_rules
+from vocabCLI import app
+
+
+@pytest.fixture
+def load_db(tmp_path):
+    """Points the app at an empty database for the test, the load testing data never reaches the test database."""
+
+    previous_path = Database.DB_PATH
+    Database.closeConnection()
+    Database.DB_PATH = str(tmp_path / "load.db")
+    Database.initializeDB()
+    yield Database.createConnection()
+    Database.closeConnection()
+    Database.DB_PATH = previous_path
+
+
+class TestLoadgen:
+    def test_parse_rules(self):
+        rules = parse_rules("modules/_load_testing_rules.txt")
+        assert len(rules) == 11
+        assert rules[0].letters == "ab" and rules[0].learning
+        assert rules[3].tag == "testtag1" and rules[3].learning
+        assert rules[8].letters == "mn" and rules[8].learning and rules[8].favorite
+        # the letters may come first, with a word count at the end
+        assert rules[-1].letters == "mnopqrstuvwxyz" and rules[-1].count == 200
+        assert not any([rules[-1].learning, rules[-1].mastered, rules[-1].favorite])
+
+    def test_loadgen(self, runner, load_db):
+        result = runner.invoke(
+            app,
+            ["loadgen", "-w", "300", "-l", "2000", "-r", "2023-01-01:2023-01-31", "-s", "1"],
+        )
+        assert result.exit_code == 0
+        assert "Load testing data added!" in result.stdout
+        c = load_db.cursor()
+        assert c.execute("SELECT COUNT(*) FROM words").fetchone()[0] == 2000
+        assert c.execute("SELECT COUNT(*) FROM word_state").fetchone()[0] == 300
+        first, last = c.execute("SELECT MIN(datetime), MAX(datetime) FROM words").fetchone()
+        assert first >= "2023-01-01 00:00:00" and last < "2023-02-01 00:00:00"
+        assert c.execute(
+            "SELECT DISTINCT tag, mastered, learning, favorite FROM word_state WHERE word LIKE 'h%'"
+        ).fetchall() == [("testtag1", 0, 1, 0)]
+        assert c.execute(
+            "SELECT DISTINCT tag, mastered, learning, favorite FROM word_state WHERE word LIKE 'q%'"
+        ).fetchall() == [(None, 0, 0, 0)]
+        # the dropped indexes and triggers are back, the rollups they skipped are up to date
+        assert {
+            row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE tbl_name='words'")
+        } >= {"idx_words_word", "trg_words_word_state", "trg_words_rollup_insert"}
+        assert c.execute("SELECT SUM(lookups) FROM daily_lookups").fetchone()[0] == 2000
+        assert c.execute("SELECT COUNT(*), SUM(lookups) FROM word_lookups").fetchone() == (300, 2000)
+
+    @mock.patch("typer.confirm")
+    def test_loadgen_existing_words(self, mock_typer_confirm, runner, load_db):
+        runner.invoke(app, ["loadgen", "-w", "10", "-l", "100"])
+        mock_typer_confirm.return_value = False
+        result = runner.invoke(app, ["loadgen", "-w", "10", "-l", "100"])
+        assert result.exit_code == 0
+        assert "No data was added" in result.stdout
+        assert load_db.execute("SELECT COUNT(*) FROM words").fetchone()[0] == 210
+
+    def test_loadgen_invalid_rules(self, runner, load_db, tmp_path):
+        rules = tmp_path / "rules.txt"
+        rules.write_text("learning -> a to b\nlearning + mastered -> c\n")
+        result = runner.invoke(app, ["loadgen", str(rules)])
+        assert result.exit_code == 0
+        assert "Rule on line 2 is invalid" in result.stdout
+
+    def test_loadgen_too_many_lookups(self, runner, load_db):
+        result = runner.invoke(
+            app, ["loadgen", "-w", "10", "-l", "100000", "-r", "2023-01-01:2023-01-01"]
+        )
+        assert result.exit_code == 2
+        assert "widen the date ranges" in result.stdout
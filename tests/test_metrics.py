@@ -0,0 +1,136 @@
+import math
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+import modules.Database as Database
+from modules.Metrics import (
+    DAILY_RETENTION_DAYS,
+    LATENCY_BUCKETS_MS,
+    flush,
+    increment,
+    observe,
+    quantile,
+    read_metrics,
+    rollup,
+    to_prometheus,
+)
+from vocabCLI import app
+
+
+@pytest.fixture
+def metrics_db(tmp_path):
+    """Points the app at an empty database, so that the metrics of other tests don't count."""
+
+    flush()
+    previous_path = Database.DB_PATH
+    Database.closeConnection()
+    Database.DB_PATH = str(tmp_path / "metrics.db")
+    Database.initializeDB()
+    yield Database.createConnection()
+    Database.closeConnection()
+    Database.DB_PATH = previous_path
+
+
+class TestMetrics:
+    def test_quantile(self):
+        # 10 observations up to 5 ms, 10 between 50 and 100 ms
+        buckets = [(5, 10), (100, 10)]
+        assert quantile(buckets, 0.5) == 5
+        assert quantile(buckets, 0.75) == 75
+        assert quantile([(math.inf, 4)], 0.95) == LATENCY_BUCKETS_MS[-2]
+        assert quantile([], 0.5) is None
+
+    def test_flush(self, metrics_db):
+        increment("dictionary_cache_total", {"result": "memo"})
+        increment("dictionary_cache_total", {"result": "memo"})
+        observe("api_request_duration", 7)
+        observe("api_request_duration", 300)
+        metrics = read_metrics()
+        assert metrics["counters"]["dictionary_cache_total"]['result="memo"'] == 2
+        histogram = metrics["histograms"]["api_request_duration"][""]
+        assert histogram["count"] == 2 and histogram["sum_ms"] == 307
+        assert histogram["buckets"] == [(10, 1), (500, 1)]
+
+    def test_rollup(self, metrics_db):
+        now = datetime.now()
+        old = (now - timedelta(days=10)).strftime("%Y-%m-%d")
+        c = metrics_db.cursor()
+        c.executemany(
+            "INSERT INTO metric_counters (name, labels, period, start, value) VALUES ('api_requests_total', '', 'hour', ?, 1)",
+            [(f"{old} {hour:02}:00:00",) for hour in range(24)],
+        )
+        c.execute(
+            "INSERT INTO metric_counters (name, labels, period, start, value) VALUES ('api_requests_total', '', 'day', '2000-01-01 00:00:00', 5)"
+        )
+        rollup(c, now)
+        metrics_db.commit()
+        c.execute("SELECT period, start, value FROM metric_counters")
+        assert c.fetchall() == [("day", f"{old} 00:00:00", 24)]
+
+    def test_lifetime_totals_survive_rollup(self, metrics_db):
+        increment("api_requests_total", {"status": 200}, 3)
+        observe("api_request_duration", 7)
+        flush()
+        line = 'vocab_api_requests_total{status="200"} 3'
+        assert line in to_prometheus(read_metrics(lifetime=True))
+
+        # a flush long after, the rows of today are rolled up and then dropped
+        later = datetime.now() + timedelta(days=DAILY_RETENTION_DAYS + 10)
+        rollup(metrics_db.cursor(), later)
+        metrics_db.commit()
+        assert read_metrics() == {"counters": {}, "histograms": {}}
+        increment("api_requests_total", {"status": 200})
+        text = to_prometheus(read_metrics(lifetime=True))
+        assert 'vocab_api_requests_total{status="200"} 4' in text
+        assert "vocab_api_request_duration_seconds_count 1" in text
+
+    def test_flush_at_exit(self, tmp_path):
+        # registered before the app modules, so it runs after their exit functions
+        script = f"""
+import atexit
+atexit.register(lambda: print("open connections:", len(Database._connections)))
+import modules.Database as Database
+Database.DB_PATH = {str(tmp_path / "exit.db")!r}
+Database.initializeDB()
+from modules.Metrics import increment
+increment("api_requests_total")
+"""
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.splitlines()[-1] == "open connections: 0"
+        conn = sqlite3.connect(tmp_path / "exit.db")
+        assert conn.execute(
+            "SELECT value FROM metric_counters WHERE period='total'"
+        ).fetchall() == [(1,)]
+        conn.close()
+
+    def test_stats_needs_internal(self, runner, metrics_db):
+        result = runner.invoke(app, ["stats"])
+        assert result.exit_code == 2
+
+    def test_stats_internal(self, runner, metrics_db):
+        runner.invoke(app, ["list"])
+        result = runner.invoke(app, ["stats", "--internal"])
+        assert result.exit_code == 0
+        assert "Commands, last 7 day(s)" in result.stdout
+        assert "list" in result.stdout
+
+    def test_stats_prometheus(self, runner, metrics_db, tmp_path):
+        runner.invoke(app, ["list"])
+        path = tmp_path / "vocab.prom"
+        result = runner.invoke(
+            app, ["stats", "--internal", "--prometheus", "--output", str(path)]
+        )
+        assert result.exit_code == 0
+        text = path.read_text()
+        assert "# TYPE vocab_command_duration_seconds histogram" in text
+        assert 'vocab_command_duration_seconds_bucket{command="list",le="+Inf"} 1' in text
+
+    def test_stats_json_needs_internal(self, runner, metrics_db):
+        result = runner.invoke(app, ["stats", "--json"])
+        assert result.exit_code == 2
@@ -1,7 +1,10 @@
+import sqlite3
+import threading
 from unittest import mock
 
 import pytest
 
+from modules.Database import createConnection, createTables, migrateDB
 from vocabCLI import app
 
 
@@ -44,9 +47,113 @@ def test_streak_no_words(mock_typer, runner):
     )
 
 
-def test_streak_multiple_days(runner):
-    # TODO: HOW TO MOCK THE DATE?
-    pass
+@mock.patch("typer.confirm")
+def test_streak_multiple_days(mock_typer, runner):
+    # lookups on three days in a row, written straight to the lookup log like an import does
+    mock_typer.return_value = True
+    runner.invoke(app, ["delete"])
+    conn = createConnection()
+    conn.executemany(
+        "INSERT INTO words (word, datetime) VALUES (?, ?)",
+        [
+            ("math", "2023-01-01 10:00:00"),
+            ("math", "2023-01-02 10:00:00"),
+            ("school", "2023-01-02 11:00:00"),
+            ("school", "2023-01-03 10:00:00"),
+            ("math", "2023-01-05 10:00:00"),
+        ],
+    )
+    conn.commit()
+    result = runner.invoke(app, ["streak"])
+    assert result.exit_code == 0
+    assert "Your longest word lookup streak is 3 day(s)" in result.stdout
+    assert "Current Streak: 0 day(s)" in result.stdout
+    assert "Top [2] streaks" in result.stdout
+    assert "05 January 2023" in result.stdout
+    runner.invoke(app, ["delete"])
+
+
+def test_streak_cache(runner):
+    runner.invoke(app, ["define", "math"])
+    runner.invoke(app, ["streak"])
+    conn = createConnection()
+    cached = conn.execute('SELECT start, "end", days FROM lookup_streaks').fetchall()
+    assert cached
+    # another lookup on a day that already has lookups keeps the cache
+    runner.invoke(app, ["define", "math"])
+    assert conn.execute('SELECT start, "end", days FROM lookup_streaks').fetchall() == cached
+    # a new day empties it
+    conn.execute("INSERT INTO words (word, datetime) VALUES ('math', '2001-01-01 10:00:00')")
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM lookup_streaks").fetchone()[0] == 0
+    result = runner.invoke(app, ["streak"])
+    assert "Current Streak: 1 day(s)" in result.stdout
+    conn.execute("DELETE FROM words WHERE datetime='2001-01-01 10:00:00'")
+    conn.commit()
+
+
+def test_lookup_rollups(runner):
+    runner.invoke(app, ["define", "math", "school", "math"])
+    conn = createConnection()
+    # the rollups kept by the triggers match the lookup log they summarize
+    assert conn.execute("SELECT day, lookups FROM daily_lookups ORDER BY day").fetchall() == (
+        conn.execute(
+            "SELECT date(datetime), COUNT(*) FROM words GROUP BY date(datetime) ORDER BY 1"
+        ).fetchall()
+    )
+    assert conn.execute("SELECT word, lookups FROM word_lookups ORDER BY word").fetchall() == (
+        conn.execute("SELECT word, COUNT(*) FROM words GROUP BY word ORDER BY word").fetchall()
+    )
+    conn.execute("DELETE FROM words WHERE word='math'")
+    assert conn.execute("SELECT lookups FROM word_lookups WHERE word='math'").fetchall() == []
+    conn.rollback()
+
+
+def test_lookup_ids(tmp_path):
+    # a database from before the migrations, where every lookup needs a second of its own
+    conn = sqlite3.connect(tmp_path / "old.db")
+    createTables(conn)
+    conn.executemany(
+        "INSERT INTO words (word, datetime, tag) VALUES (?, ?, ?)",
+        [("math", "2023-01-01 10:00:00", "school"), ("school", "2023-01-01 10:00:01", None)],
+    )
+    conn.commit()
+    migrateDB(conn)
+    assert conn.execute("SELECT id, word, datetime FROM words ORDER BY id").fetchall() == [
+        (1, "math", "2023-01-01 10:00:00"),
+        (2, "school", "2023-01-01 10:00:01"),
+    ]
+    # two words looked up at the same time are two lookups, the same lookup twice is one
+    conn.execute("INSERT INTO words (word, datetime) VALUES ('school', '2023-01-01 10:00:00')")
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO words (word, datetime) VALUES ('math', '2023-01-01 10:00:00')")
+    # the triggers moved to the new table
+    assert conn.execute("SELECT lookups FROM word_lookups WHERE word='school'").fetchone() == (2,)
+    assert conn.execute("SELECT tag FROM word_state WHERE word='math'").fetchone() == ("school",)
+    conn.close()
+
+
+def test_thread_connections_closed():
+    # a worker thread's connection is closed when the thread ends, the next thread opens its own
+    opened = []
+    for _ in range(2):
+        worker = threading.Thread(target=lambda: opened.append(createConnection()))
+        worker.start()
+        worker.join()
+    assert opened[0] is not opened[1]
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    # the calling thread keeps its connection
+    assert createConnection() is createConnection()
+
+
+def test_define_same_second(runner):
+    runner.invoke(app, ["define", "math"])
+    conn = createConnection()
+    before = conn.execute("SELECT COUNT(*) FROM words WHERE word='math'").fetchone()[0]
+    runner.invoke(app, ["define", "math", "math", "math"])
+    assert conn.execute("SELECT COUNT(*) FROM words WHERE word='math'").fetchone()[0] == before + 3
 
 
 @mock.patch("typer.confirm")
@@ -114,3 +221,135 @@ def test_spell_checker_with_proper_nouns(runner):
 
 def test_refresh_cache(runner):
     pass
+
+
+def test_daemon_not_running(runner):
+    result = runner.invoke(app, ["daemon", "--status"])
+    assert result.exit_code == 0
+    assert "The daemon is not running" in result.stdout
+    result = runner.invoke(app, ["daemon", "--stop"])
+    assert result.exit_code == 0
+    assert "The daemon is not running" in result.stdout
+
+
+def test_daemon_forward(capsys):
+    import threading
+    import time
+
+    from modules.Daemon import forward_to_daemon, send_request, serve
+
+    daemon = threading.Thread(target=serve, args=(app,), daemon=True)
+    daemon.start()
+    for _ in range(100):
+        if send_request({"status": True}) is not None:
+            break
+        time.sleep(0.1)
+
+    try:
+        capsys.readouterr()
+        assert forward_to_daemon(["spellcheck", "kinder garden spfee"]) == 0
+        assert "kinder garden spfee" in capsys.readouterr().out
+        # commands that may prompt keep running in this process
+        assert forward_to_daemon(["delete"]) is None
+        assert send_request({"status": True})["served"] == 1
+    finally:
+        send_request({"stop": True})
+        daemon.join(timeout=10)
+    assert forward_to_daemon(["spellcheck", "kinder garden spfee"]) is None
+
+
+def test_daemon_survives_bad_clients():
+    import json
+    import socket
+    import threading
+    import time
+
+    from modules.Daemon import DAEMON_SOCKET, send_request, serve
+
+    daemon = threading.Thread(target=serve, args=(app,), daemon=True)
+    daemon.start()
+    for _ in range(100):
+        if send_request({"status": True}) is not None:
+            break
+        time.sleep(0.1)
+
+    try:
+        # a client that hangs up before its reply, then one that sends no JSON
+        for line in [
+            json.dumps({"argv": ["spellcheck", "kinder garden spfee"]}).encode(),
+            b"not json",
+        ]:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(DAEMON_SOCKET)
+                client.sendall(line + b"\n")
+        assert send_request({"status": True}) is not None
+        assert daemon.is_alive()
+    finally:
+        send_request({"stop": True})
+        daemon.join(timeout=10)
+
+
+def test_shell(runner):
+    result = runner.invoke(
+        app, ["shell"], input="spellcheck 'kinder garden spfee'\nfoo\nexit\n"
+    )
+    assert result.exit_code == 0
+    assert "kinder garden spfee" in result.stdout
+    assert "spellcheck took" in result.stdout
+    assert "No such command 'foo'" in result.stdout
+    assert "Bye bye!" in result.stdout
+
+
+def test_shell_completions():
+    import typer
+
+    from modules.Shell import completions
+
+    command = typer.main.get_command(app)
+    assert completions(command, "", "spell") == ["spellcheck"]
+    assert completions(command, "daemon ", "--st") == ["--status", "--stop"]
+
+
+def test_complete_word():
+    from modules.Shell import complete_word, prefix_range
+    from modules.SQLTrace import trace_sql
+
+    conn = createConnection()
+    conn.executemany(
+        "INSERT OR IGNORE INTO word_state (word) VALUES (?)",
+        [("Qzymase",), ("Qzymurgy",), ("Qzyme%",)],
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO cache_words (word, api_response) VALUES ('Qzymogen', '[]')"
+    )
+    conn.commit()
+
+    with trace_sql() as trace:
+        assert complete_word("Qzym") == ["Qzymase", "Qzyme%", "Qzymogen", "Qzymurgy"]
+        assert complete_word("Qzyme%") == ["Qzyme%"]
+    assert all(not stats.scans for stats in trace.statements.values())
+    assert prefix_range("ab") == ("ab", "ac")
+
+    conn = createConnection()
+    conn.execute("DELETE FROM word_state WHERE word IN ('Qzymase', 'Qzymurgy', 'Qzyme%')")
+    conn.execute("DELETE FROM cache_words WHERE word='Qzymogen'")
+    conn.commit()
+
+
+def test_timings(runner):
+    result = runner.invoke(app, ["--timings", "define", "hello", "--short"])
+    assert result.exit_code == 0
+    assert "Timings" in result.stdout
+    # the spinner phase is nested under the command
+    assert "  Searching..." in result.stdout
+    assert "Response memo" in result.stdout
+
+
+def test_profile(runner, tmp_path, monkeypatch):
+    from modules import Profiling
+
+    monkeypatch.setattr(Profiling, "PROFILE_DIR", str(tmp_path))
+    result = runner.invoke(app, ["--profile", "--profile-top", "5", "list"])
+    assert result.exit_code == 0
+    assert "Top 5 functions by cumulative time" in result.stdout
+    assert len(list(tmp_path.glob("list-*.prof"))) == 1
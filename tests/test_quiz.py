@@ -1,12 +1,77 @@
+import json
+import random
 from unittest import mock
 
 import pytest
 
+import modules.Database as Database
+import modules.Dictionary as Dictionary
+from modules.Dictionary import invalidate_response
+from modules.SQLTrace import trace_sql
+from modules.Study import build_quiz, quiz_pool
 from vocabCLI import app
 
 # TODO: add tests for collection Quizzing
 
 
+@pytest.fixture
+def quiz_db(tmp_path):
+    """Points the app at an empty database, so that the quiz draws only from the words a test adds."""
+
+    # the responses remembered from other databases are not in this one
+    invalidate_response()
+    previous_path = Database.DB_PATH
+    Database.closeConnection()
+    Database.DB_PATH = str(tmp_path / "quiz.db")
+    Database.initializeDB()
+    yield Database.createConnection()
+    Database.closeConnection()
+    Database.DB_PATH = previous_path
+    invalidate_response()
+
+
+def cached_word(word: str, part_of_speech: str) -> tuple:
+    response = {
+        "word": word,
+        "meanings": [
+            {
+                "partOfSpeech": part_of_speech,
+                "definitions": [{"definition": f"the meaning of {word}"}],
+            }
+        ],
+    }
+    return word, json.dumps(response)
+
+
+class FakeAPIResponse:
+    """What the dictionary API answers for a word, a noun defined as "the meaning of <word>"."""
+
+    status_code = 200
+
+    def __init__(self, word: str):
+        self.word = word
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return [json.loads(cached_word(self.word, "noun")[1])]
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Answers every API request without going to the network, and returns the words that were requested."""
+
+    requested = []
+
+    def request_definition(query, timeout=None):
+        requested.append(query)
+        return FakeAPIResponse(query)
+
+    monkeypatch.setattr(Dictionary, "request_definition", request_definition)
+    return requested
+
+
 class TestQuiz:
     class TestQuizDefault:
         # @mock.patch("typer.confirm")
@@ -206,3 +271,243 @@ class TestQuiz:
             result = runner.invoke(app, ["quiz", "--collection", "fakeCollection"])
             assert result.exit_code == 0
             assert "The collection fakeCollection is not available" in result.stdout
+
+    class TestQuizBuilder:
+        @mock.patch("typer.confirm")
+        def test_build_quiz(self, mock_typer, runner):
+            mock_typer.return_value = True
+            runner.invoke(app, ["delete"])
+            runner.invoke(app, ["define", "math", "rock", "class", "gems"])
+            words = ["math", "rock", "class", "gems"]
+            questions = build_quiz(words, quiz_pool(), random.Random(1))
+            assert [question.word for question in questions] == words
+            for question in questions:
+                assert question.answer in question.choices
+                assert len(question.choices) == len(set(question.choices)) == 4
+
+        @mock.patch("questionary.select")
+        def test_quiz_reads_the_index_once(self, mock_select, runner):
+            mock_select.return_value.ask.return_value = None
+            invalidate_response()
+            with trace_sql() as trace:
+                result = runner.invoke(app, ["quiz", "-n", "4"])
+            assert "Quiz completed!" in result.stdout
+            reads = [
+                stats.calls
+                for sql, stats in trace.statements.items()
+                if sql.startswith("SELECT word, part_of_speech, definition FROM quiz_definitions")
+            ]
+            assert reads == [1]
+            # no API response is parsed to build the questions
+            assert not any("api_response FROM cache_words" in sql for sql in trace.statements)
+
+        def test_choices_share_the_part_of_speech(self, quiz_db):
+            nouns = ["apple", "bread", "chair", "table", "water", "stone"]
+            verbs = ["run", "jump", "swim", "climb"]
+            c = quiz_db.cursor()
+            c.executemany(
+                "INSERT INTO cache_words (word, api_response) VALUES (?, ?)",
+                [cached_word(word, "noun") for word in nouns]
+                + [cached_word(word, "verb") for word in verbs],
+            )
+            c.executemany(
+                "INSERT INTO word_state (word) VALUES (?)",
+                [(word,) for word in nouns + verbs],
+            )
+            quiz_db.commit()
+
+            pool = quiz_pool()
+            assert sorted(pool["noun"]) == sorted(nouns)
+            assert sorted(pool["verb"]) == sorted(verbs)
+            for question in build_quiz(nouns + verbs, pool, random.Random(3)):
+                same = nouns if question.word in nouns else verbs
+                assert len(question.choices) == 4
+                assert set(question.choices) <= {
+                    f"the meaning of {word}" for word in same
+                }
+
+        def test_index_follows_the_cache(self, quiz_db):
+            c = quiz_db.cursor()
+            c.execute(
+                "INSERT INTO cache_words (word, api_response) VALUES (?, ?)",
+                cached_word("swim", "verb"),
+            )
+            c.execute(
+                "UPDATE cache_words SET api_response=? WHERE word='swim'",
+                (cached_word("swim", "noun")[1],),
+            )
+            c.execute(
+                "INSERT INTO cache_words (word, api_response) VALUES ('broken', 'not json')"
+            )
+            c.execute("SELECT word, part_of_speech FROM quiz_definitions")
+            assert c.fetchall() == [("swim", "noun")]
+            c.execute("DELETE FROM cache_words WHERE word='swim'")
+            c.execute("SELECT COUNT(*) FROM quiz_definitions")
+            assert c.fetchone()[0] == 0
+            quiz_db.rollback()
+
+        def test_uncached_collection(self, quiz_db, fake_api):
+            looked_up = ["apple", "bread", "chair", "table"]
+            collection = ["comet", "nebula", "orbit", "planet", "quasar"]
+            c = quiz_db.cursor()
+            c.executemany(
+                "INSERT INTO cache_words (word, api_response) VALUES (?, ?)",
+                [cached_word(word, "noun") for word in looked_up],
+            )
+            c.executemany("INSERT INTO word_state (word) VALUES (?)", [(word,) for word in looked_up])
+            c.executemany(
+                "INSERT INTO collections (word, collection) VALUES (?, 'space')",
+                [(word,) for word in collection],
+            )
+            quiz_db.commit()
+
+            questions = build_quiz(
+                collection, quiz_pool("space"), random.Random(5), fallback=quiz_pool
+            )
+            assert [question.word for question in questions] == collection
+            for question in questions:
+                assert question.answer == f"the meaning of {question.word}"
+                assert len(question.choices) == len(set(question.choices)) == 4
+
+        @mock.patch("questionary.select")
+        def test_collection_quiz_looks_up_uncached_words(
+            self, mock_select, runner, quiz_db, fake_api
+        ):
+            mock_select.return_value.ask.return_value = None
+            collection = ["comet", "nebula", "orbit", "planet", "quasar"]
+            quiz_db.executemany(
+                "INSERT INTO collections (word, collection) VALUES (?, 'space')",
+                [(word,) for word in collection],
+            )
+            quiz_db.commit()
+
+            result = runner.invoke(app, ["quiz", "--collection", "space"])
+            assert "Quiz completed!" in result.stdout
+            # the whole collection was looked up once, up front, and went into the index
+            assert sorted(fake_api) == collection
+            c = Database.createConnection().cursor()
+            c.execute("SELECT word FROM quiz_definitions ORDER BY word")
+            assert [row[0] for row in c.fetchall()] == collection
+            assert mock_select.call_count == 5
+            for call in mock_select.call_args_list:
+                assert len(set(call.kwargs["choices"])) == 4
+
+        def test_part_of_speech_topped_up(self, quiz_db):
+            nouns = ["apple", "bread", "chair", "table", "water"]
+            c = quiz_db.cursor()
+            c.executemany(
+                "INSERT INTO cache_words (word, api_response) VALUES (?, ?)",
+                [cached_word(word, "noun") for word in nouns] + [cached_word("run", "verb")],
+            )
+            c.executemany(
+                "INSERT INTO word_state (word) VALUES (?)", [(word,) for word in nouns + ["run"]]
+            )
+            quiz_db.commit()
+
+            # run is the only verb, the nouns stand in for the other verbs
+            for seed in range(10):
+                (question,) = build_quiz(["run"], quiz_pool(), random.Random(seed))
+                assert len(set(question.choices)) == 4
+
+    class TestQuizDue:
+        def test_quiz_due_no_words(self, runner, quiz_db):
+            result = runner.invoke(app, ["quiz", "--due"])
+            assert result.exit_code == 0
+            assert "No words are due for review" in result.stdout
+
+        def test_quiz_due_with_filters(self, runner, quiz_db):
+            for filters in [["--tag", "diamonds"], ["--mastered"], ["--weak", "4"]]:
+                result = runner.invoke(app, ["quiz", "--due", *filters])
+                assert result.exit_code == 2
+
+        @mock.patch("questionary.select")
+        def test_quiz_due_schedules_words(self, mock_select, runner, quiz_db):
+            mock_select.return_value.ask.return_value = None
+            nouns = ["apple", "bread", "chair", "table", "water"]
+            c = quiz_db.cursor()
+            c.executemany(
+                "INSERT INTO cache_words (word, api_response) VALUES (?, ?)",
+                [cached_word(word, "noun") for word in nouns],
+            )
+            c.executemany("INSERT INTO word_state (word) VALUES (?)", [(word,) for word in nouns])
+            # water is not due yet
+            c.execute(
+                "UPDATE word_schedule SET due_at=datetime('now', 'localtime', '+1 day') WHERE word='water'"
+            )
+            quiz_db.commit()
+
+            with trace_sql() as trace:
+                result = runner.invoke(app, ["quiz", "--due", "-n", "4"])
+            assert "Quiz completed!" in result.stdout
+            due = [
+                stats
+                for sql, stats in trace.statements.items()
+                if sql.startswith("SELECT word FROM word_schedule WHERE due_at")
+            ]
+            assert len(due) == 1 and due[0].scans == []
+
+            # every answer was wrong, the words are due again after the first interval
+            c = Database.createConnection().cursor()
+            c.execute(
+                "SELECT word, interval, repetitions FROM word_schedule WHERE reviewed_at IS NOT NULL ORDER BY word"
+            )
+            assert c.fetchall() == [(word, 1, 0) for word in nouns[:4]]
+            c.execute("SELECT type, question_count FROM quiz_history")
+            assert c.fetchall() == [("due words", 4)]
+
+    class TestQuizWeak:
+        def test_quiz_weak_no_answers(self, runner, quiz_db):
+            result = runner.invoke(app, ["quiz", "--weak", "4"])
+            assert result.exit_code == 0
+            assert "No quiz answers yet" in result.stdout
+
+        def test_quiz_weak_with_filters(self, runner, quiz_db):
+            for filters in [["--favorite"], ["--history"], ["-n", "5"]]:
+                result = runner.invoke(app, ["quiz", "--weak", "4", *filters])
+                assert result.exit_code == 2
+
+        @mock.patch("questionary.select")
+        def test_quiz_weak_and_history(self, mock_select, runner, quiz_db):
+            mock_select.return_value.ask.return_value = None
+            nouns = ["apple", "bread", "chair", "table", "water", "stone"]
+            c = quiz_db.cursor()
+            c.executemany(
+                "INSERT INTO cache_words (word, api_response) VALUES (?, ?)",
+                [cached_word(word, "noun") for word in nouns],
+            )
+            c.executemany("INSERT INTO word_state (word) VALUES (?)", [(word,) for word in nouns])
+            # apple to table were answered right once in two tries, water and stone every time
+            c.executemany(
+                "INSERT INTO quiz_answers (word, correct, latency_ms, datetime) VALUES (?, ?, 2000, '2023-01-01 10:00:00')",
+                [(word, correct) for word in nouns[:4] for correct in (0, 1)]
+                + [(word, 1) for word in nouns[4:]],
+            )
+            quiz_db.commit()
+
+            result = runner.invoke(app, ["quiz", "--weak", "4"])
+            assert "Quiz completed!" in result.stdout
+            for word in nouns[:4]:
+                assert f"Choose the correct definition for: {word}" in result.stdout
+            for word in nouns[4:]:
+                assert f"Choose the correct definition for: {word}" not in result.stdout
+
+            # every answer was wrong and is added to the statistics of its word
+            c = Database.createConnection().cursor()
+            c.execute("SELECT word, attempts, correct FROM word_quiz_stats ORDER BY word")
+            assert c.fetchall() == sorted(
+                [(word, 3, 1) for word in nouns[:4]] + [(word, 1, 1) for word in nouns[4:]]
+            )
+            c.execute("SELECT type, quizzes, questions, points FROM quiz_type_stats")
+            assert c.fetchall() == [("weak words", 1, 4, 0)]
+            # the weakest words are read in index order, not sorted
+            c.execute(
+                "EXPLAIN QUERY PLAN SELECT word FROM word_quiz_stats ORDER BY accuracy, attempts DESC LIMIT 4"
+            )
+            plan = " ".join(row[3] for row in c.fetchall())
+            assert "idx_word_quiz_stats_accuracy" in plan and "TEMP B-TREE" not in plan
+
+            result = runner.invoke(app, ["quiz", "--history"])
+            assert result.exit_code == 0
+            assert "Quiz Statistics" in result.stdout
+            assert "0/4 (0%)" in result.stdout
+            assert "Weakest 5 words" in result.stdout
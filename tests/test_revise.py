@@ -2,6 +2,8 @@ from unittest import mock
 
 import pytest
 
+from modules.Database import createConnection
+from modules.Study import sm2
 from vocabCLI import app
 
 
@@ -156,3 +158,61 @@ class TestRevise:
             result = runner.invoke(app, ["revise", "--collection", "fakeCollection"])
             assert result.exit_code == 0
             assert "The collection fakeCollection is not available" in result.stdout
+
+    class TestReviseSession:
+        @mock.patch("typer.confirm")
+        def test_revise_does_not_log_lookups(self, mock_typer, runner):
+            mock_typer.return_value = True
+            runner.invoke(app, ["delete"])
+            runner.invoke(app, ["define", "math", "rock"])
+            conn = createConnection()
+            lookups = conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+            result = runner.invoke(app, ["revise"])
+            assert result.exit_code == 0
+            assert conn.execute("SELECT COUNT(*) FROM words").fetchone()[0] == lookups
+            # the answers are saved together when the revision ends
+            assert "Set 0 word(s) as learning and 2 word(s) as mastered" in result.stdout
+            assert conn.execute("SELECT COUNT(*) FROM word_state WHERE mastered=1").fetchone()[0] == 2
+
+        @mock.patch("typer.confirm")
+        def test_revise_log_lookups(self, mock_typer, runner):
+            mock_typer.return_value = False
+            runner.invoke(app, ["delete"])
+            runner.invoke(app, ["define", "math", "rock"])
+            conn = createConnection()
+            lookups = conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+            result = runner.invoke(app, ["revise", "--log-lookups"])
+            assert result.exit_code == 0
+            assert conn.execute("SELECT COUNT(*) FROM words").fetchone()[0] == lookups + 2
+
+    class TestReviseDue:
+        def test_sm2(self):
+            # passed reviews are spaced by 1 day, 6 days, then the last interval times the ease
+            assert sm2(2.5, 0, 0, 5) == pytest.approx((2.6, 1, 1))
+            assert sm2(2.6, 1, 1, 4) == pytest.approx((2.6, 6, 2))
+            assert sm2(2.6, 6, 2, 4) == pytest.approx((2.6, 16, 3))
+            # a failed review starts the word over, the ease never drops below 1.3
+            assert sm2(1.4, 16, 3, 0) == pytest.approx((1.3, 1, 0))
+
+        @mock.patch("typer.confirm")
+        def test_revise_schedules_words(self, mock_typer, runner):
+            mock_typer.return_value = True
+            runner.invoke(app, ["delete"])
+            runner.invoke(app, ["define", "math", "rock"])
+            result = runner.invoke(app, ["revise", "--due"])
+            assert result.exit_code == 0
+            assert "Set 0 word(s) as learning and 2 word(s) as mastered" in result.stdout
+            conn = createConnection()
+            rows = conn.execute(
+                "SELECT interval, repetitions, due_at > reviewed_at FROM word_schedule"
+            ).fetchall()
+            assert rows == [(1, 1, 1), (1, 1, 1)]
+            # both words are due again tomorrow
+            result = runner.invoke(app, ["revise", "--due"])
+            assert result.exit_code == 0
+            assert "No words are due for review" in result.stdout
+
+        def test_revise_due_with_filters(self, runner):
+            for filters in [["--tag", "diamonds"], ["--learning"], ["-c", "Fruits"]]:
+                result = runner.invoke(app, ["revise", "--due", *filters])
+                assert result.exit_code == 2
@@ -0,0 +1,37 @@
+import modules.Database as Database
+from modules import Profiling
+from modules.SQLTrace import TracingConnection, trace_sql
+from vocabCLI import app
+
+
+class TestSQLTrace:
+    def test_trace_command(self, runner):
+        with trace_sql() as trace:
+            assert isinstance(Database.createConnection(), TracingConnection)
+            result = runner.invoke(app, ["list", "--favorite"])
+        assert result.exit_code == 0
+        assert trace.total_calls() > 0
+        # every statement knows where it was run from
+        sites = [site for stats in trace.statements.values() for site in stats.sites]
+        assert any(site.startswith("Utils.py") for site in sites)
+        # the connections handed out afterwards are not traced anymore
+        assert not isinstance(Database.createConnection(), TracingConnection)
+
+    def test_rows_and_full_scans(self):
+        with trace_sql() as trace:
+            conn = Database.createConnection()
+            rows = conn.execute("SELECT collection FROM collections").fetchall()
+            for _ in conn.execute("SELECT word FROM collections LIMIT 3"):
+                pass
+        stats = trace.statements["SELECT collection FROM collections"]
+        assert stats.calls == 1 and stats.rows == len(rows)
+        assert stats.scans and stats.scans[0].startswith("SCAN collections")
+        assert trace.statements["SELECT word FROM collections LIMIT 3"].rows == 3
+
+    def test_trace_sql_option(self, runner, tmp_path, monkeypatch):
+        monkeypatch.setattr(Profiling, "PROFILE_DIR", str(tmp_path))
+        result = runner.invoke(app, ["--trace-sql", "list"])
+        assert result.exit_code == 0
+        assert "Statements by total time" in result.stdout
+        assert "Statements by calls" in result.stdout
+        assert len(list(tmp_path.glob("sql-list-*.json"))) == 1
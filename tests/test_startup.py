@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.bench_startup import (
+    COMMANDS,
+    STARTUP_BUDGET_MS,
+    loaded_heavy_modules,
+    measure,
+)
+
+
+class TestStartup:
+    @pytest.mark.parametrize("command", COMMANDS)
+    def test_startup_no_heavy_imports(self, command):
+        assert loaded_heavy_modules(COMMANDS[command]) == []
+
+    @pytest.mark.parametrize("command", COMMANDS)
+    def test_startup_budget(self, command):
+        # best of three, a single run can be slowed down by whatever else the machine is doing
+        milliseconds = min(measure(COMMANDS[command])[0] for _ in range(3))
+        assert milliseconds < STARTUP_BUDGET_MS
@@ -0,0 +1,369 @@
+""" HOW TO RUN THIS BENCHMARK """
+# Run from the vocabCLI folder: ⏩ python -m benchmarks.bench_commands --sizes 10k,100k
+# Compare with an earlier run: ⏩ python -m benchmarks.bench_commands --compare benchmarks/results/commands-<date>.json
+# The benchmark runs on synthetic databases in a throwaway folder, it never touches VocabularyBuilder.db or exports/
+
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import *
+from unittest import mock
+
+import typer
+from rich import print
+from rich.table import Table
+from typer.testing import CliRunner
+
+import modules.Database as Database
+from benchmarks.synthetic import SIZES, build_database
+
+# (name, command line) of the commands timed end to end, output included
+COMMANDS = [
+    ("list", ["list"]),
+    ("list --favorite", ["list", "--favorite"]),
+    ("list --learning", ["list", "--learning"]),
+    ("list --mastered", ["list", "--mastered"]),
+    ("list --tag", ["list", "--tag", "science"]),
+    ("list --days", ["list", "--days", "7"]),
+    ("list --last", ["list", "--last", "20"]),
+    ("list --most", ["list", "--most", "20"]),
+    ("list --tagnames", ["list", "--tagnames"]),
+    ("list --collection", ["list", "--collection", "music"]),
+    ("rate --today", ["rate", "--today"]),
+    ("rate --week", ["rate", "--week"]),
+    ("rate --month", ["rate", "--month"]),
+    ("rate --year", ["rate", "--year"]),
+    ("streak", ["streak"]),
+    ("milestone", ["milestone", "500000"]),
+    ("random --learning", ["random", "--learning"]),
+    ("random --tag", ["random", "--tag", "science"]),
+    ("random --collection", ["random", "--collection", "music"]),
+    ("export", ["export"]),
+    ("import", ["import"]),
+    ("quiz", ["quiz", "-n", "10"]),
+    ("quiz --tag", ["quiz", "-n", "10", "--tag", "science"]),
+    ("quiz --collection", ["quiz", "-n", "10", "--collection", "music"]),
+    ("quiz --due", ["quiz", "-n", "10", "--due"]),
+    ("quiz --weak", ["quiz", "--weak", "10"]),
+    ("quiz --history", ["quiz", "--history"]),
+]
+
+# (name, sql) of the queries behind graph, timed without drawing the charts. Every parameter is today's local date
+GRAPH_QUERIES = [
+    (
+        "graph top words",
+        "SELECT word, lookups FROM word_lookups ORDER BY lookups DESC, word LIMIT 10",
+    ),
+    (
+        "graph top tags",
+        "SELECT tag, COUNT(*) FROM word_state WHERE tag is NOT NULL GROUP BY tag ORDER BY COUNT(*) DESC LIMIT 10",
+    ),
+    (
+        "graph lookups week",
+        "select strftime('%d/%m/%Y', day), lookups from daily_lookups WHERE day>date(?, '-7 days')",
+    ),
+    (
+        "graph lookups month",
+        "select strftime('%d', day), lookups from daily_lookups WHERE day>=date(?, 'start of month')",
+    ),
+    (
+        "graph learning vs mastered",
+        "select (select count(*) from word_state WHERE learning = 1), (select count(*) from word_state WHERE mastered = 1)",
+    ),
+    (
+        "graph collections",
+        "select collections.collection ,COUNT(DISTINCT word_state.word)from word_state inner join collections on word_state.word=collections.word GROUP BY collections.collection ORDER BY COUNT(DISTINCT word_state.word) DESC",
+    ),
+]
+
+# (name, questions, collection) of the quizzes built without asking them
+QUIZ_BUILDS = [
+    ("quiz build", 100, None),
+    ("quiz build --collection", 100, "music"),
+]
+
+# commands that write files into the current folder, they run in the throwaway folder
+WRITES_FILES = {"export", "import"}
+
+# a case is only flagged as a regression if it is slower by this much in absolute terms too, below that it is noise
+NOISE_MS = 1.0
+
+
+def run_command(runner: CliRunner, app, argv: List[str]) -> Optional[str]:
+    """
+    Runs one command like a fresh CLI process would and returns what went wrong, if anything.
+
+    1. The response memo is emptied first, a new process starts without it.
+    2. Quiz questions are answered with nothing instead of waiting for the user.
+    3. Quizzes run after the anchor are removed again with their answers, quiz_history only allows one quiz per second.
+
+    Args:
+        runner (CliRunner): Runner that captures the output.
+        app (typer.Typer): The CLI app.
+        argv (List[str]): Command line arguments.
+
+    Returns:
+        str: The error, None if the command succeeded.
+    """
+
+    from modules.Dictionary import invalidate_response
+
+    invalidate_response()
+    with mock.patch("questionary.select") as select:
+        select.return_value.ask.return_value = None
+        result = runner.invoke(app, argv)
+
+    if argv[0] == "quiz":
+        conn = Database.createConnection()
+        conn.execute("DELETE FROM quiz_history WHERE datetime > ?", (_anchor,))
+        conn.execute("DELETE FROM quiz_answers WHERE datetime > ?", (_anchor,))
+        conn.commit()
+
+    if result.exception is not None and not isinstance(result.exception, SystemExit):
+        return repr(result.exception)
+    return None if result.exit_code == 0 else f"exit code {result.exit_code}"
+
+
+def time_case(run: Callable[[], Optional[str]], repeat: int) -> dict:
+    """
+    Runs a case `repeat` times.
+
+    Args:
+        run (Callable): Runs the case once and returns the error, if any.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict: median, min and every run in ms, and the first error.
+    """
+
+    runs, error = [], None
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        error = error or run()
+        runs.append((time.perf_counter() - tic) * 1000)
+    return {
+        "median_ms": statistics.median(runs),
+        "min_ms": min(runs),
+        "runs_ms": runs,
+        "error": error,
+    }
+
+
+# time of the latest synthetic lookup of the database being benchmarked
+_anchor = ""
+
+
+def build_quiz_case(questions: int, collection: Optional[str]) -> Optional[str]:
+    """
+    Builds the questions of a quiz like the quiz command does before asking the first one.
+
+    Args:
+        questions (int): Number of questions.
+        collection (str, optional): Collection the quiz is on, every word if None.
+
+    Returns:
+        str: The error, None if every question was built.
+    """
+
+    from modules.Study import build_quiz, quiz_pool
+
+    pool = quiz_pool(collection)
+    words = sorted(word for pool_words in pool.values() for word in pool_words)[:questions]
+    built = build_quiz(words, pool)
+    if len(built) < len(words):
+        return f"{len(built)} of {len(words)} questions built"
+
+
+def bench_size(
+    template: str, directory: str, repeat: int, only: Optional[str]
+) -> dict:
+    """
+    Times every case on a copy of a synthetic database.
+
+    Args:
+        template (str): The synthetic database, it is copied so that the commands can't change it.
+        directory (str): Throwaway folder for the database copy and the files export writes.
+        repeat (int): Timed runs per case.
+        only (str, optional): Only run the cases whose name contains this.
+
+    Returns:
+        dict: case name -> timings
+    """
+
+    from vocabCLI import app
+
+    global _anchor
+
+    path = os.path.join(directory, "VocabularyBuilder.db")
+    shutil.copyfile(template, path)
+    previous_path = Database.DB_PATH
+    Database.closeConnection()
+    Database.DB_PATH = path
+
+    runner = CliRunner()
+    cases = {}
+    try:
+        conn = Database.createConnection()
+        _anchor = conn.execute("SELECT MAX(datetime) FROM words").fetchone()[0]
+
+        for name, argv in COMMANDS:
+            if only and only not in name:
+                continue
+            folder = directory if argv[0] in WRITES_FILES else os.getcwd()
+            with contextlib.chdir(folder):
+                cases[name] = time_case(lambda: run_command(runner, app, argv), repeat)
+
+        local_date = datetime.now().strftime("%Y-%m-%d")
+        for name, sql in GRAPH_QUERIES:
+            if only and only not in name:
+                continue
+            parameters = (local_date,) * sql.count("?")
+            cases[name] = time_case(
+                lambda: conn.execute(sql, parameters).fetchall() and None, repeat
+            )
+
+        for name, questions, collection in QUIZ_BUILDS:
+            if only and only not in name:
+                continue
+            cases[name] = time_case(
+                lambda: build_quiz_case(questions, collection), repeat
+            )
+    finally:
+        Database.closeConnection()
+        Database.DB_PATH = previous_path
+    return cases
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[tuple]:
+    """
+    Finds the cases that got slower than in the baseline.
+
+    Args:
+        results (dict): Results of this run.
+        baseline (dict): Results of an earlier run.
+        threshold (float): Allowed slowdown, 0.2 means 20% slower.
+
+    Returns:
+        List[tuple]: (size, case, baseline ms, this run ms) of every regression.
+    """
+
+    regressions = []
+    for size, cases in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size, {}).get("cases", {})
+        for name, timings in cases["cases"].items():
+            if name not in before:
+                continue
+            old, new = before[name]["median_ms"], timings["median_ms"]
+            if new > old * (1 + threshold) and new - old > NOISE_MS:
+                regressions.append((size, name, old, new))
+    return regressions
+
+
+def main(
+    sizes: str = typer.Option(
+        ",".join(SIZES), help=f"Comma separated sizes, any of {', '.join(SIZES)}."
+    ),
+    repeat: int = typer.Option(3, help="Timed runs per case, the median is reported."),
+    seed: int = typer.Option(42, help="Random seed of the synthetic databases."),
+    only: str = typer.Option(None, help="Only run the cases whose name contains this."),
+    data_dir: str = typer.Option(
+        None,
+        help="Keep the synthetic databases here and reuse them on later runs of the same day.",
+    ),
+    output: str = typer.Option(
+        None, help="Where the JSON results go. Defaults to benchmarks/results/."
+    ),
+    baseline: str = typer.Option(
+        None, "--compare", help="JSON results of an earlier run to compare with."
+    ),
+    threshold: float = typer.Option(
+        0.2, help="Slowdown against --compare that counts as a regression."
+    ),
+):
+    """Times the hot commands on synthetic databases, stores the results as JSON and flags regressions."""
+
+    names = [size.strip().lower() for size in sizes.split(",") if size.strip()]
+    if unknown := [name for name in names if name not in SIZES]:
+        raise typer.BadParameter(f"unknown sizes {', '.join(unknown)}", param_hint="--sizes")
+
+    results = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            template = os.path.join(
+                data_dir or directory,
+                f"synthetic-{name}-seed{seed}-{datetime.now():%Y%m%d}.db",
+            )
+            if os.path.exists(template):
+                built = {"path": template, "reused": True}
+            else:
+                if data_dir:
+                    os.makedirs(data_dir, exist_ok=True)
+                print(f"Building the [bold]{name}[/bold] database...")
+                built = build_database(template, SIZES[name], seed=seed)
+
+            print(f"Timing the commands on the [bold]{name}[/bold] database...")
+            workdir = tempfile.mkdtemp(dir=directory)
+            results["sizes"][name] = {
+                "database": built,
+                "cases": bench_size(template, workdir, repeat, only),
+            }
+            shutil.rmtree(workdir)
+
+    table = Table(
+        title=f"Command latency in ms (median of {repeat} runs)",
+        show_header=True,
+        header_style="bold bright_cyan",
+    )
+    table.add_column("Case", style="cyan")
+    for name in names:
+        table.add_column(name, justify="right")
+    for case in next(iter(results["sizes"].values()))["cases"]:
+        row = []
+        for name in names:
+            timings = results["sizes"][name]["cases"][case]
+            row.append(
+                f"[red]{timings['error']}[/red]"
+                if timings["error"]
+                else f"{timings['median_ms']:.1f}"
+            )
+        table.add_row(case, *row)
+    print(table)
+
+    if output is None:
+        os.makedirs(os.path.join("benchmarks", "results"), exist_ok=True)
+        output = os.path.join(
+            "benchmarks", "results", f"commands-{datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to [bold]{output}[/bold]")
+
+    if baseline:
+        with open(baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), threshold)
+        for size, case, old, new in regressions:
+            print(
+                f"[bold red]Regression[/bold red] {case} on {size}: {old:.1f} ms -> {new:.1f} ms"
+            )
+        if regressions:
+            raise typer.Exit(1)
+        print("[bold green]No regressions.[/bold green] ✅")
+
+
+if __name__ == "__main__":
+    typer.run(main)
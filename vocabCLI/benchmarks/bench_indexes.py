@@ -0,0 +1,165 @@
+""" HOW TO RUN THIS BENCHMARK """
+# Run from the vocabCLI folder: ⏩ python -m benchmarks.bench_indexes --rows 1000000
+# The benchmark builds a throwaway database, it never touches VocabularyBuilder.db
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import typer
+from rich import print
+from rich.table import Table
+
+import modules.Database as Database
+
+# (name, sql, parameter factory) of the lookups that used to be full table scans
+LOOKUPS = [
+    (
+        "check_word_exists",
+        "SELECT * FROM words WHERE word=?",
+        lambda words, tags: (random.choice(words),),
+    ),
+    (
+        "insert_to_db_util status check",
+        "SELECT favorite FROM words WHERE word=? and favorite=1",
+        lambda words, tags: (random.choice(words),),
+    ),
+    (
+        "count_tag",
+        "SELECT DISTINCT word FROM words WHERE tag=?",
+        lambda words, tags: (random.choice(tags),),
+    ),
+    (
+        "count_learning",
+        "SELECT DISTINCT word FROM words WHERE learning=1",
+        lambda words, tags: (),
+    ),
+    (
+        "display_theme",
+        "SELECT collection FROM collections JOIN words ON collections.word=words.word WHERE words.word=?",
+        lambda words, tags: (random.choice(words),),
+    ),
+]
+
+
+def populate(conn, rows: int, distinct_words: int) -> tuple[list, list]:
+    """
+    Fills the words and collections tables with synthetic data in a single transaction.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the throwaway database
+        rows (int): Number of rows in the words table
+        distinct_words (int): Number of distinct words the rows are spread over
+
+    Returns:
+        list: the distinct words
+        list: the tags in use
+    """
+
+    words = [f"word{i}" for i in range(distinct_words)]
+    tags = [f"tag{i}" for i in range(20)]
+    start = datetime(2020, 1, 1)
+
+    def word_rows():
+        for i in range(rows):
+            # a word always gets the same tag, derived from its index so that every run builds the same data
+            index = i % distinct_words
+            yield (
+                words[index],
+                (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                tags[index % len(tags)] if i % 7 == 0 else None,
+                int(i % 11 == 0),
+                int(i % 5 == 0),
+                int(i % 13 == 0),
+            )
+
+    c = conn.cursor()
+    c.executemany(
+        "INSERT INTO words (word, datetime, tag, mastered, learning, favorite) VALUES (?, ?, ?, ?, ?, ?)",
+        word_rows(),
+    )
+    c.executemany(
+        "INSERT INTO collections (word, collection) VALUES (?, ?)",
+        ((word, f"collection{i % 50}") for i, word in enumerate(words[::3])),
+    )
+    conn.commit()
+    return words, tags
+
+
+def time_lookups(conn, words: list, tags: list, repeat: int) -> dict:
+    """
+    Runs every lookup `repeat` times and returns the median latency of each one in milliseconds.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the throwaway database
+        words (list): Words to draw parameters from
+        tags (list): Tags to draw parameters from
+        repeat (int): Number of timed runs per lookup
+
+    Returns:
+        dict: lookup name -> median latency in ms
+    """
+
+    c = conn.cursor()
+    results = {}
+    for name, sql, params in LOOKUPS:
+        timings = []
+        for _ in range(repeat):
+            tic = time.perf_counter()
+            c.execute(sql, params(words, tags))
+            c.fetchall()
+            timings.append((time.perf_counter() - tic) * 1000)
+        results[name] = statistics.median(timings)
+    return results
+
+
+def main(
+    rows: int = typer.Option(1_000_000, help="Rows in the synthetic words table."),
+    distinct: int = typer.Option(50_000, help="Distinct words among those rows."),
+    repeat: int = typer.Option(20, help="Timed runs per lookup."),
+    seed: int = typer.Option(42, help="Random seed for reproducible runs."),
+):
+    """Compares lookup latency on the version 0 schema before and after the secondary indexes migration."""
+
+    random.seed(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        Database.DB_PATH = os.path.join(directory, "bench.db")
+        conn = Database.createConnection()
+        Database.createTables(conn)
+
+        print(f"Populating [bold]{rows:,}[/bold] rows...")
+        words, tags = populate(conn, rows, distinct)
+
+        before = time_lookups(conn, words, tags, repeat)
+        tic = time.perf_counter()
+        Database.migration_add_indexes(conn.cursor())
+        conn.commit()
+        migration_seconds = time.perf_counter() - tic
+        after = time_lookups(conn, words, tags, repeat)
+        Database.closeConnection()
+
+    table = Table(
+        title=f"Lookup latency on {rows:,} rows (median of {repeat} runs)",
+        show_header=True,
+        header_style="bold bright_cyan",
+    )
+    table.add_column("Lookup", style="cyan")
+    table.add_column("Before (ms)", justify="right")
+    table.add_column("After (ms)", justify="right")
+    table.add_column("Speedup", justify="right", style="light_green")
+    for name, _, _ in LOOKUPS:
+        table.add_row(
+            name,
+            f"{before[name]:.3f}",
+            f"{after[name]:.3f}",
+            f"{before[name] / max(after[name], 1e-6):.0f}x",
+        )
+    print(table)
+    print(f"Index migration took [bold]{migration_seconds:.2f}s[/bold]")
+
+
+if __name__ == "__main__":
+    typer.run(main)
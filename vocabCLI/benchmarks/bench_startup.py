@@ -0,0 +1,150 @@
+""" HOW TO RUN THIS BENCHMARK """
+# Run from the vocabCLI folder: ⏩ python -m benchmarks.bench_startup
+# Exits with status 1 if any command imports slower than the budget, so it can gate CI
+
+import statistics
+import subprocess
+import sys
+
+import typer
+from rich import print
+from rich.table import Table
+
+# import time allowed for a command, on top of the bare interpreter start
+STARTUP_BUDGET_MS = 300
+
+# what each command imports before it can do anything. vocabCLI.py always checks for a daemon and runs initializeDB.
+COMMANDS = {
+    "--help": "import vocabCLI, modules.Daemon, modules.Database",
+    "define": "import vocabCLI, modules.Daemon, modules.Database, modules.Dictionary",
+}
+
+# modules that take hundreds of milliseconds to import and must only be loaded by the commands that use them
+HEAVY_MODULES = [
+    "matplotlib",
+    "nltk",
+    "openai",
+    "pandas",
+    "requests",
+    "seaborn",
+    "spacy",
+    "torch",
+    "transformers",
+]
+
+
+def importtime(statement: str) -> dict:
+    """
+    Runs the statement in a fresh interpreter under `python -X importtime`.
+
+    Args:
+        statement (str): Python code to run
+
+    Returns:
+        dict: top level module -> cumulative import time in microseconds
+    """
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package, nested imports are indented
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def measure(statement: str) -> tuple[float, dict]:
+    """
+    Measures the import time of the statement, leaving out what the bare interpreter imports anyway.
+
+    Args:
+        statement (str): Python code to run
+
+    Returns:
+        float: import time in milliseconds
+        dict: top level module -> cumulative import time in microseconds, for the modules counted
+    """
+
+    interpreter = importtime("pass")
+    modules = {
+        name: cumulative
+        for name, cumulative in importtime(statement).items()
+        if name not in interpreter
+    }
+    return sum(modules.values()) / 1000, modules
+
+
+def loaded_heavy_modules(statement: str) -> list:
+    """
+    Returns the heavy modules the statement imports.
+
+    Args:
+        statement (str): Python code to run
+
+    Returns:
+        list: names from HEAVY_MODULES found in sys.modules after running the statement
+    """
+
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"{statement}\nimport sys\nprint(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = set(process.stdout.split())
+    return [name for name in HEAVY_MODULES if name in loaded]
+
+
+def main(
+    repeat: int = typer.Option(5, help="Runs per command, the median is reported."),
+    budget: float = typer.Option(STARTUP_BUDGET_MS, help="Allowed import time in ms."),
+    top: int = typer.Option(5, help="Slowest imports listed per command."),
+):
+    """Measures the import time of the CLI commands and fails if any of them exceeds the budget."""
+
+    table = Table(
+        title=f"Import time (median of {repeat} runs, budget {budget:.0f} ms)",
+        show_header=True,
+        header_style="bold bright_cyan",
+    )
+    table.add_column("Command", style="cyan")
+    table.add_column("Import (ms)", justify="right")
+    table.add_column("Slowest imports (ms)")
+    table.add_column("Heavy modules", style="red")
+
+    over_budget = False
+    for command, statement in COMMANDS.items():
+        runs = [measure(statement) for _ in range(repeat)]
+        milliseconds = statistics.median(run[0] for run in runs)
+        slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)
+        heavy = loaded_heavy_modules(statement)
+        over_budget |= milliseconds > budget or bool(heavy)
+        table.add_row(
+            command,
+            f"[{'red' if milliseconds > budget else 'light_green'}]{milliseconds:.0f}[/]",
+            ", ".join(f"{name} {cumulative / 1000:.0f}" for name, cumulative in slowest[:top]),
+            ", ".join(heavy),
+        )
+    print(table)
+
+    if over_budget:
+        print("[bold red]Startup is over budget.[/bold red] ❌")
+        raise typer.Exit(1)
+    print("[bold green]Startup is within budget.[/bold green] ✅")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,345 @@
+""" SYNTHETIC DATABASES FOR THE BENCHMARKS """
+# Builds VocabularyBuilder.db files of any size with the shape of a real one. The same seed and anchor always give the same database.
+# Run from the vocabCLI folder: ⏩ python -m benchmarks.synthetic --lookups 100000 --output synthetic.db
+
+import csv
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import *
+
+import typer
+from rich import print
+
+import modules.Database as Database
+
+# sizes the command benchmark runs at, in lookups (rows of the words table)
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# a real user looks most words up once and a few words over and over, every distinct word is looked up this often on average
+LOOKUPS_PER_WORD = 10
+
+# lookups are spread over this many days before the anchor, with some days off so that streaks break
+HISTORY_DAYS = 730
+ACTIVE_DAY_CHANCE = 0.8
+
+# share of the words with a tag, in the mastered list, in the learning list and in the favorite list
+TAGGED_CHANCE = 0.3
+MASTERED_CHANCE = 0.15
+LEARNING_CHANCE = 0.3
+FAVORITE_CHANCE = 0.1
+
+TAGS = [
+    "academic", "art", "business", "cooking", "exam", "fiction", "finance", "gre", "history", "ielts",
+    "law", "literature", "medicine", "music", "news", "philosophy", "poetry", "politics", "science",
+    "slang", "sports", "tech", "travel", "work",
+]  # fmt: skip
+
+PARTS_OF_SPEECH = ["noun", "verb", "adjective", "adverb"]
+
+# syllables the made up words are built from, so that words sort and compare like real ones
+ONSETS = ["b", "br", "c", "ch", "d", "f", "g", "gr", "h", "l", "m", "n", "p", "pl", "r", "s", "st", "t", "tr", "v"]  # fmt: skip
+VOWELS = ["a", "e", "i", "o", "u", "ea", "io"]
+
+
+def made_up_words(rng: random.Random, count: int, taken: set) -> List[str]:
+    """
+    Returns made up words that are not in taken.
+
+    Args:
+        rng (random.Random): Seeded random generator.
+        count (int): Number of words.
+        taken (set): Words that already exist, the new words are added to it.
+
+    Returns:
+        List[str]: The new words.
+    """
+
+    words = []
+    while len(words) < count:
+        word = "".join(
+            rng.choice(ONSETS) + rng.choice(VOWELS) for _ in range(rng.randint(2, 4))
+        )
+        if word not in taken:
+            taken.add(word)
+            words.append(word)
+    return words
+
+
+def api_response(rng: random.Random, word: str, words: List[str]) -> dict:
+    """
+    Returns a made up response in the format of the dictionary API.
+
+    Args:
+        rng (random.Random): Seeded random generator.
+        word (str): Word the response is for.
+        words (List[str]): Words to draw synonyms and antonyms from.
+
+    Returns:
+        dict: The response.
+    """
+
+    meanings = []
+    for part_of_speech in rng.sample(PARTS_OF_SPEECH, rng.randint(1, 3)):
+        meanings.append(
+            {
+                "partOfSpeech": part_of_speech,
+                "definitions": [
+                    {
+                        "definition": f"The {number}. sense of {word} as a {part_of_speech}, about {rng.choice(words)} and {rng.choice(words)}.",
+                        "synonyms": [],
+                        "antonyms": [],
+                        "example": f"She used {word} next to {rng.choice(words)}.",
+                    }
+                    for number in range(1, rng.randint(2, 5))
+                ],
+                "synonyms": rng.sample(words, 3),
+                "antonyms": rng.sample(words, 1),
+            }
+        )
+    return {
+        "word": word,
+        "phonetic": f"/{word}/",
+        "phonetics": [{"text": f"/{word}/", "audio": ""}],
+        "meanings": meanings,
+        "license": {"name": "CC BY-SA 3.0", "url": ""},
+        "sourceUrls": [f"https://en.wiktionary.org/wiki/{word}"],
+    }
+
+
+def lookup_times(
+    rng: random.Random, lookups: int, anchor: datetime
+) -> Iterator[str]:
+    """
+    Yields distinct lookup timestamps, oldest first, on the active days before the anchor.
+
+    Args:
+        rng (random.Random): Seeded random generator.
+        lookups (int): Number of timestamps.
+        anchor (datetime): Latest possible timestamp.
+
+    Yields:
+        str: Timestamp in the format the words table uses.
+    """
+
+    start = anchor.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(
+        days=HISTORY_DAYS - 1
+    )
+    days = [
+        day
+        for day in range(HISTORY_DAYS)
+        if day == HISTORY_DAYS - 1 or rng.random() < ACTIVE_DAY_CHANCE
+    ]
+    # the anchor day is only active up to the anchor itself
+    seconds = (len(days) - 1) * 86400 + int((anchor - start).total_seconds()) % 86400
+    for second in sorted(rng.sample(range(seconds), lookups)):
+        day, second = divmod(second, 86400)
+        yield (start + timedelta(days=days[day], seconds=second)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+
+
+def build_database(
+    path: str,
+    lookups: int,
+    seed: int = 42,
+    anchor: Optional[datetime] = None,
+    distinct: Optional[int] = None,
+) -> dict:
+    """
+    Builds a synthetic database at path, with the schema of the current version.
+
+    1. The vocabulary holds the words of the built in collections and made up words. A few words are looked up very often, most only a few times.
+    2. The lookups are spread over the two years before the anchor, with some days without any lookup.
+    3. Every word, and every word of the collections, gets a cached API response. A share of the words get a tag and a place in the mastered, learning or favorite lists.
+    4. The collections and a quiz history are filled in as well.
+
+    Args:
+        path (str): Where the database is created, an existing file is replaced.
+        lookups (int): Number of rows in the words table.
+        seed (int, optional): Random seed. Defaults to 42.
+        anchor (datetime, optional): Time of the latest lookup. Defaults to now.
+        distinct (int, optional): Number of distinct words. Defaults to one for every LOOKUPS_PER_WORD lookups.
+
+    Returns:
+        dict: What was built, with the row counts of every table.
+    """
+
+    rng = random.Random(seed)
+    anchor = (anchor or datetime.now()).replace(microsecond=0)
+    distinct = min(distinct or max(lookups // LOOKUPS_PER_WORD, 100), lookups)
+
+    with open("modules/domains.csv", encoding="utf-8") as file:
+        collections = [(row[0], row[1]) for row in csv.reader(file)][1:]
+
+    # the vocabulary starts with words from the collections, so that collection features find them
+    collection_words = sorted({word for word, _ in collections})
+    rng.shuffle(collection_words)
+    words = collection_words[: distinct // 2]
+    words += made_up_words(rng, distinct - len(words), set(collection_words))
+    rng.shuffle(words)
+
+    for suffix in ["", "-wal", "-shm"]:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    tic = time.perf_counter()
+    previous_path = Database.DB_PATH
+    Database.closeConnection()
+    Database.DB_PATH = path
+    try:
+        counts = populate(rng, words, collections, collection_words, lookups, anchor)
+    finally:
+        Database.closeConnection()
+        Database.DB_PATH = previous_path
+
+    return {
+        "path": path,
+        "seed": seed,
+        "anchor": anchor.strftime("%Y-%m-%d %H:%M:%S"),
+        "rows": counts,
+        "build_seconds": time.perf_counter() - tic,
+        "size_bytes": os.path.getsize(path),
+    }
+
+
+def populate(
+    rng: random.Random,
+    words: List[str],
+    collections: List[tuple],
+    collection_words: List[str],
+    lookups: int,
+    anchor: datetime,
+) -> dict:
+    """
+    Creates the schema in the database at Database.DB_PATH and fills every table in one transaction.
+
+    Args:
+        rng (random.Random): Seeded random generator.
+        words (List[str]): The vocabulary, most popular word first.
+        collections (List[tuple]): (word, collection) rows of the built in collections.
+        collection_words (List[str]): Every word of the collections.
+        lookups (int): Number of rows in the words table.
+        anchor (datetime): Time of the latest lookup.
+
+    Returns:
+        dict: table name -> row count
+    """
+
+    vocabulary = set(words)
+    # popularity falls off with the rank of the word
+    weights = [1 / rank**0.8 for rank in range(1, len(words) + 1)]
+
+    conn = Database.createConnection()
+    Database.initializeDB()
+    c = conn.cursor()
+    # the lookup rollups are computed once after the lookups are in, like loadgen does
+    c.execute("BEGIN")
+    for name in [
+        "trg_words_rollup_insert",
+        "trg_words_rollup_delete",
+        "trg_words_rollup_update",
+    ]:
+        c.execute(f'DROP TRIGGER "{name}"')
+
+    c.executemany(
+        "INSERT INTO word_state (word, tag, mastered, learning, favorite) VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                word,
+                rng.choice(TAGS) if rng.random() < TAGGED_CHANCE else None,
+                int(mastered := rng.random() < MASTERED_CHANCE),
+                int(not mastered and rng.random() < LEARNING_CHANCE),
+                int(rng.random() < FAVORITE_CHANCE),
+            )
+            for word in words
+        ),
+    )
+    c.executemany(
+        "INSERT INTO words (word, datetime) VALUES (?, ?)",
+        zip(
+            rng.choices(words, weights=weights, k=lookups),
+            lookup_times(rng, lookups, anchor),
+        ),
+    )
+
+    fetched_at = (anchor - timedelta(days=30)).strftime("%Y-%m-%d %H:%M:%S")
+    c.executemany(
+        "INSERT INTO cache_words (word, api_response, fetched_at, last_accessed, hit_count, content_hash) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                word,
+                response := json.dumps(api_response(rng, word, words)),
+                fetched_at,
+                fetched_at,
+                0,
+                Database.content_hash(response),
+            )
+            # collection quizzes and random words from a collection look up words the user never did, the
+            # benchmark must not wait for the API so they are cached too
+            for word in words + [word for word in collection_words if word not in vocabulary]
+        ),
+    )
+    Database.rebuild_lookup_rollups(c)
+    for trigger in Database.LOOKUP_ROLLUP_TRIGGERS:
+        c.execute(trigger)
+    c.executemany(
+        "INSERT INTO collections (word, collection) VALUES (?, ?)", collections
+    )
+
+    quizzes = [
+        (
+            rng.choice(["all words", "learning words", f"tag: {rng.choice(TAGS)}"]),
+            (anchor - timedelta(hours=quiz * 7 + 1)).strftime("%Y-%m-%d %H:%M:%S"),
+            (questions := rng.randint(4, 20)),
+            rng.randint(0, questions),
+            rng.randint(10, 600),
+        )
+        for quiz in range(max(lookups // 1000, 10))
+    ]
+    c.executemany(
+        "INSERT INTO quiz_history (type, datetime, question_count, points, duration) VALUES (?, ?, ?, ?, ?)",
+        quizzes,
+    )
+    # the first questions of every quiz were answered right, as many as it has points
+    c.executemany(
+        "INSERT INTO quiz_answers (word, correct, latency_ms, datetime) VALUES (?, ?, ?, ?)",
+        [
+            (word, int(question < points), rng.randint(1000, 20000), taken_at)
+            for _, taken_at, questions, points, _ in quizzes
+            for question, word in enumerate(rng.sample(words, min(questions, len(words))))
+        ],
+    )
+    conn.commit()
+    c.execute("ANALYZE")
+
+    return {
+        table: c.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        for table in [
+            "words",
+            "word_state",
+            "daily_lookups",
+            "cache_words",
+            "collections",
+            "quiz_history",
+            "quiz_answers",
+        ]
+    }
+
+
+def main(
+    lookups: int = typer.Option(100_000, help="Rows in the words table."),
+    output: str = typer.Option("synthetic.db", help="Path of the database."),
+    seed: int = typer.Option(42, help="Random seed for reproducible databases."),
+    distinct: int = typer.Option(None, help="Distinct words, 1 per 10 lookups by default."),
+):
+    """Builds a synthetic VocabularyBuilder.db."""
+
+    built = build_database(output, lookups, seed=seed, distinct=distinct)
+    print(built)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,297 @@
+import contextlib
+import json
+import os
+import socket
+import sys
+import time
+from typing import *
+
+# the daemon listens next to the database, so a CLI started from the same folder finds it
+DAEMON_SOCKET = "./VocabularyBuilder.sock"
+
+# commands the CLI hands over to a running daemon. They are the ones that load models, the spell checker or the
+# dictionary cache, and none of them prompts the user. Everything else keeps running in the CLI process.
+FORWARDED_COMMANDS = {
+    "antonym",
+    "clean",
+    "define",
+    "hardwords",
+    "readability",
+    "sentiment",
+    "spellcheck",
+    "summary",
+    "synonym",
+}
+
+# set this environment variable to never hand commands over to the daemon
+NO_DAEMON_ENV = "VOCAB_NO_DAEMON"
+
+# seconds the CLI waits for the daemon to accept the connection before running the command itself
+CONNECT_TIMEOUT = 0.5
+
+
+def daemon_supported() -> bool:
+    """
+    Checks if this platform has Unix domain sockets.
+
+    Returns:
+        bool: True if the daemon can run here.
+    """
+
+    return hasattr(socket, "AF_UNIX")
+
+
+def send_request(request: dict) -> Optional[dict]:
+    """
+    Sends a request to the daemon and waits for its reply.
+
+    1. A missing socket, a refused connection or a stale socket file all mean that no daemon is running.
+    2. The request and the reply are one line of JSON each.
+
+    Args:
+        request (dict): Request for the daemon.
+
+    Returns:
+        dict: Reply of the daemon, or None if it isn't running.
+    """
+
+    if not daemon_supported() or not os.path.exists(DAEMON_SOCKET):
+        return None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(DAEMON_SOCKET)
+        except OSError:
+            return None
+
+        # the command itself may take as long as it needs
+        client.settimeout(None)
+        client.sendall(json.dumps(request).encode() + b"\n")
+        with client.makefile("rb") as reply:
+            line = reply.readline()
+    return json.loads(line) if line else None
+
+
+def forward_to_daemon(argv: List[str]) -> Optional[int]:
+    """
+    Runs the command in the daemon if one is running and the command can be handed over.
+
+    1. Only FORWARDED_COMMANDS are handed over, and only if they don't read from the standard input.
+    2. The output of the daemon is printed as it is, with the colors and the width of this terminal.
+
+    Args:
+        argv (List[str]): Command line arguments, without the program name.
+
+    Returns:
+        int: Exit code of the command, or None if the command has to run in this process.
+    """
+
+    if os.getenv(NO_DAEMON_ENV) or not argv or argv[0] not in FORWARDED_COMMANDS:
+        return None
+    # the daemon can't read this process' standard input
+    if "-" in argv:
+        return None
+
+    from rich.console import Console
+
+    console = Console()
+    reply = send_request(
+        {
+            "argv": argv,
+            "width": console.width,
+            "color_system": console.color_system,
+        }
+    )
+    if reply is None:
+        return None
+
+    sys.stdout.write(reply["output"])
+    sys.stdout.flush()
+    return reply["exit_code"]
+
+
+def invoke_command(command, argv: List[str], output: TextIO) -> int:
+    """
+    Runs a CLI command the way the CLI would, without exiting the process.
+
+    1. Usage errors and aborted prompts are printed to the output just like the CLI would print them.
+    2. Any other error prints its traceback, the caller keeps running.
+
+    Args:
+        command (click.Command): The CLI app as a click command.
+        argv (List[str]): Command line arguments, without the program name.
+        output (TextIO): Where errors are printed.
+
+    Returns:
+        int: Exit code of the command.
+    """
+
+    import traceback
+
+    import click
+
+    try:
+        result = command.main(args=argv, prog_name="vocab", standalone_mode=False)
+        return result if isinstance(result, int) else 0
+    except click.ClickException as error:
+        error.show(file=output)
+        return error.exit_code
+    except click.Abort:
+        output.write("Aborted!\n")
+        return 1
+    except SystemExit as error:
+        return error.code if isinstance(error.code, int) else 0
+    except Exception:
+        traceback.print_exc(file=output)
+        return 1
+
+
+def run_command(
+    command, argv: List[str], width: int, color_system: Optional[str]
+) -> tuple[int, str]:
+    """
+    Runs a CLI command in the daemon and captures everything it prints.
+
+    1. The global rich console is pointed at a buffer, with the width and colors of the client's terminal. Spinners are not animated.
+    2. The standard input is empty, a command that prompts gets an end of file instead of blocking the daemon.
+
+    Args:
+        command (click.Command): The CLI app as a click command.
+        argv (List[str]): Command line arguments, without the program name.
+        width (int): Width of the client's terminal.
+        color_system (str, optional): Color system of the client's terminal, None for no colors.
+
+    Returns:
+        int: Exit code of the command.
+        str: Everything the command printed.
+    """
+
+    import io
+
+    import rich
+
+    output = io.StringIO()
+    rich.reconfigure(
+        file=output,
+        width=width,
+        color_system=color_system,
+        force_terminal=color_system is not None,
+        force_interactive=False,
+    )
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        stdin, sys.stdin = sys.stdin, io.StringIO()
+        try:
+            exit_code = invoke_command(command, argv, output)
+        finally:
+            sys.stdin = stdin
+    return exit_code, output.getvalue()
+
+
+def serve(app) -> None:
+    """
+    Runs the daemon in the foreground until it is stopped.
+
+    1. Warm up what every lookup needs: the database connection and the spell checker. Models are loaded by the first command that needs them and kept from then on.
+    2. Accept one client at a time. Commands print through the global rich console, so they can't run side by side. A client that hangs up early or sends a malformed request is dropped, the daemon keeps serving.
+    3. Before every command, drop the parsed response memo if another process wrote to the database since the last one.
+    4. Stop on a stop request or Ctrl+C and remove the socket file.
+
+    Args:
+        app (typer.Typer): The CLI app.
+    """
+
+    import typer
+    from rich import print
+    from rich.panel import Panel
+
+    from modules.Database import createConnection
+    from modules.Dictionary import (
+        get_spell_checker,
+        invalidate_response,
+        response_memo_info,
+    )
+
+    if not daemon_supported():
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable="The daemon needs Unix domain sockets, which this platform doesn't have. ❌",
+            )
+        )
+        return
+
+    if send_request({"status": True}) is not None:
+        print(Panel("The daemon is already running. ✅"))
+        return
+    # a socket file nobody listens on is left over from a daemon that was killed
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(DAEMON_SOCKET)
+
+    command = typer.main.get_command(app)
+    conn = createConnection()
+    get_spell_checker()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    started, served = time.time(), 0
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(DAEMON_SOCKET)
+        server.listen()
+        print(
+            Panel(
+                f"[bold green]Daemon running[/bold green] on {DAEMON_SOCKET}, stop it with [bold]vocab daemon --stop[/bold] 😈"
+            )
+        )
+        try:
+            while True:
+                client, _ = server.accept()
+                # a client that hung up before its reply or sent a malformed request only loses its own request
+                with contextlib.suppress(OSError, ValueError, KeyError, AttributeError):
+                    with client, client.makefile("rb") as incoming, client.makefile(
+                        "wb"
+                    ) as outgoing:
+                        if not (line := incoming.readline()):
+                            continue
+                        request = json.loads(line)
+
+                        if request.get("stop"):
+                            outgoing.write(
+                                json.dumps({"stopped": True}).encode() + b"\n"
+                            )
+                            break
+
+                        if request.get("status"):
+                            reply = {
+                                "pid": os.getpid(),
+                                "uptime": time.time() - started,
+                                "served": served,
+                                "response_memo": response_memo_info()._asdict(),
+                            }
+                        else:
+                            # another process changed the database, the memo may be stale
+                            version = conn.execute("PRAGMA data_version").fetchone()[0]
+                            if version != data_version:
+                                invalidate_response()
+                                data_version = version
+                            exit_code, output = run_command(
+                                command,
+                                request["argv"],
+                                request.get("width", 80),
+                                request.get("color_system"),
+                            )
+                            reply = {"exit_code": exit_code, "output": output}
+                            served += 1
+                        outgoing.write(json.dumps(reply).encode() + b"\n")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(DAEMON_SOCKET)
+
+    # the commands pointed the global console at their buffers
+    import rich
+
+    rich.reconfigure()
+    print(Panel("[bold green]Daemon stopped.[/bold green] 👋🏼"))
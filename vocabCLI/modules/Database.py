@@ -1,35 +1,144 @@
-import calendar
+import atexit
+import contextlib
+import hashlib
 import json
+import os
 import sqlite3
+import sys
 import threading
-from datetime import datetime
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from sqlite3 import Error
+from typing import *
 
-import requests
-from requests import exceptions
+from Metrics import flush, increment, timer
 from rich import print
 from rich.panel import Panel
 
 # from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.progress import track
+from rich.table import Table
+
+# this module is reachable both as "Database" (via the path hack in modules/__init__.py) and as
+# "modules.Database". Alias the two names so that the whole process shares one connection registry.
+sys.modules.setdefault("Database", sys.modules[__name__])
+sys.modules.setdefault("modules.Database", sys.modules[__name__])
+
+DB_PATH = "./VocabularyBuilder.db"
+
+# pragmas applied to every connection handed out by createConnection
+PRAGMAS = {
+    "journal_mode": "WAL",  # readers don't block the writer and vice versa
+    "synchronous": "NORMAL",  # safe with WAL, avoids an fsync on every commit
+    "cache_size": -32000,  # negative value is in KiB, i.e. a 32 MB page cache
+    "mmap_size": 268435456,  # memory map up to 256 MB of the database file
+    "temp_store": "MEMORY",  # keep temporary b-trees (ORDER BY, DISTINCT) off the disk
+}
+
+# class of the connections createConnection opens, SQLTrace swaps in a tracing connection
+CONNECTION_FACTORY = sqlite3.Connection
+
+# one connection per thread, kept in thread local storage so that it is closed when its thread ends. Pool threads
+# of refresh, define and revise come and go, and a new thread never gets the connection of a finished one.
+_local = threading.local()
+# every open connection, closeConnection closes them all, when the interpreter exits too
+_connections: Set[sqlite3.Connection] = set()
+_connections_lock = threading.Lock()
+# bumped by closeConnection, a thread whose connection is older opens a new one
+_generation = 0
+
+
+class _ThreadConnection:
+    """The connection of one thread. Thread local storage drops it when the thread ends, which closes the connection."""
+
+    def __init__(self, conn: sqlite3.Connection, generation: int):
+        self.conn = conn
+        self.generation = generation
+        # at exit, closeConnection closes it after the metrics are flushed, not the finalizer
+        weakref.finalize(self, _close, conn).atexit = False
+
+
+def _close(conn: sqlite3.Connection) -> None:
+    """Closes a connection and forgets it. Uncommitted changes are discarded."""
+
+    with _connections_lock:
+        _connections.discard(conn)
+    with contextlib.suppress(Error):
+        conn.close()
+
+
+def applyPragmas(conn: sqlite3.Connection) -> None:
+    """
+    Applies the tuned PRAGMAS to a freshly opened connection.
+
+    Args:
+        conn (sqlite3.Connection): Connection object
+    """
+
+    c = conn.cursor()
+    for pragma, value in PRAGMAS.items():
+        c.execute(f"PRAGMA {pragma}={value}")
+    c.close()
 
 
 # no tests for this function as it is not called anywhere in the command directly
 def createConnection():
     """
-    Creates a database connection to a SQLite database VocabularyBuilder.db
+    Returns the connection to the SQLite database VocabularyBuilder.db
+
+    1. If the calling thread already opened a connection since the last closeConnection, reuse it
+    2. Otherwise open a new connection, apply the tuned PRAGMAS and remember it for the thread
+    3. The connection is closed when its thread ends, or by closeConnection, at the latest when the process exits
 
     Returns:
         Connection object or None.
     """
-    conn = None
+
+    holder = getattr(_local, "holder", None)
+    if holder is not None and holder.generation == _generation:
+        return holder.conn
+
     try:
-        conn = sqlite3.connect("./VocabularyBuilder.db")
+        # a connection is only ever used by the thread that opened it, but it is closed from whichever thread
+        # runs closeConnection or the finalizer of its thread
+        conn = sqlite3.connect(
+            DB_PATH, timeout=30, check_same_thread=False, factory=CONNECTION_FACTORY
+        )
+        applyPragmas(conn)
     except Error as e:
         print(e)
+        return None
+
+    with _connections_lock:
+        _connections.add(conn)
+    _local.holder = _ThreadConnection(conn, _generation)
     return conn
 
 
+def closeConnection() -> None:
+    """
+    Closes every connection handed out by createConnection, on every thread. Uncommitted changes are discarded, just like before when a connection was garbage collected.
+
+    Runs automatically when the interpreter exits. Calling createConnection afterwards simply opens a new connection.
+    """
+
+    global _generation
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+        _generation += 1
+    for conn in connections:
+        with contextlib.suppress(Error):
+            conn.close()
+
+
+atexit.register(closeConnection)
+# atexit calls the functions in reverse order, the pending metrics are saved before the connections are closed
+atexit.register(flush)
+
+
 # no tests for this function as it is not called anywhere in the command directly
 def createTables(conn: sqlite3.Connection) -> None:
     """
@@ -100,78 +209,1030 @@ def createTables(conn: sqlite3.Connection) -> None:
 
 # no tests for this function as it is not called anywhere in the command directly
 def initializeDB() -> None:
-    """Initializes the database"""
+    """Initializes the database and upgrades its schema to the latest version"""
 
     conn = createConnection()
     createTables(conn)
+    migrateDB(conn)
+
+
+######################
+# SCHEMA MIGRATIONS #
+######################
+
+# createTables always creates the original (version 0) schema. Every change to the schema after that is
+# a migration below. Migrations are applied in order, exactly once, and are recorded in schema_version.
+# Each migration must be idempotent so that a half applied upgrade can safely be run again.
+
+
+def migration_add_indexes(c: sqlite3.Cursor) -> None:
+    """
+    Adds the secondary indexes used by the word lookups, the status and tag lists and the collection joins.
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute('CREATE INDEX IF NOT EXISTS "idx_words_word" ON "words" ("word")')
+    c.execute('CREATE INDEX IF NOT EXISTS "idx_words_tag" ON "words" ("tag", "word")')
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_words_mastered" ON "words" ("mastered", "word")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_words_learning" ON "words" ("learning", "word")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_words_favorite" ON "words" ("favorite", "word")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_collections_word" ON "collections" ("word", "collection")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_collections_collection" ON "collections" ("collection", "word")'
+    )
+
+
+def migration_word_state(c: sqlite3.Cursor) -> None:
+    """
+    Moves the tag and the mastered, learning and favorite flags out of the words table into word_state.
+
+    1. Create the word_state table, one row per word, and fill it from the status columns copied onto every lookup
+    2. Rebuild the words table as an append-only lookup log with only the word and datetime columns
+    3. Add a trigger that creates the word_state row the first time a word is looked up
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "word_state" (
+            "word" TEXT NOT NULL PRIMARY KEY,
+            "tag" TEXT,
+            "mastered" INTEGER NOT NULL DEFAULT 0,
+            "learning" INTEGER NOT NULL DEFAULT 0,
+            "favorite" INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID;"""
+    )
+
+    c.execute('PRAGMA table_info("words")')
+    if "tag" in [column[1] for column in c.fetchall()]:
+        # every lookup row of a word carries the same status, MAX picks it up even if an old bug left them out of sync
+        c.execute(
+            """INSERT OR IGNORE INTO word_state (word, tag, mastered, learning, favorite)
+            SELECT word, MAX(tag), MAX(mastered), MAX(learning), MAX(favorite) FROM words WHERE word IS NOT NULL GROUP BY word"""
+        )
+        c.execute(
+            """CREATE TABLE "words_log" (
+                "word" TEXT NOT NULL,
+                "datetime" timestamp NOT NULL UNIQUE
+                );"""
+        )
+        c.execute(
+            "INSERT INTO words_log (word, datetime) SELECT word, datetime FROM words WHERE word IS NOT NULL ORDER BY rowid"
+        )
+        c.execute('DROP TABLE "words"')
+        c.execute('ALTER TABLE "words_log" RENAME TO "words"')
+
+    c.execute('CREATE INDEX IF NOT EXISTS "idx_words_word" ON "words" ("word")')
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_word_state_tag" ON "word_state" ("tag")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_word_state_mastered" ON "word_state" ("mastered")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_word_state_learning" ON "word_state" ("learning")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_word_state_favorite" ON "word_state" ("favorite")'
+    )
+    c.execute(
+        """CREATE TRIGGER IF NOT EXISTS "trg_words_word_state" AFTER INSERT ON "words"
+        BEGIN
+            INSERT OR IGNORE INTO word_state (word) VALUES (NEW.word);
+        END;"""
+    )
+
+
+def migration_cache_ttl(c: sqlite3.Cursor) -> None:
+    """
+    Adds the staleness and popularity columns to cache_words so that refresh_cache can refresh incrementally.
+
+    1. fetched_at: when the response was last fetched from the API, existing entries count as fetched now
+    2. last_accessed and hit_count: when and how often a lookup was answered from the cache
+    3. content_hash: hash of api_response, a refresh only rewrites entries whose hash changed
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute('PRAGMA table_info("cache_words")')
+    columns = [column[1] for column in c.fetchall()]
+    for column, definition in [
+        ("fetched_at", "timestamp"),
+        ("last_accessed", "timestamp"),
+        ("hit_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("content_hash", "TEXT"),
+    ]:
+        if column not in columns:
+            c.execute(f'ALTER TABLE "cache_words" ADD COLUMN "{column}" {definition}')
+
+    c.execute("SELECT word, api_response FROM cache_words WHERE content_hash IS NULL")
+    c.executemany(
+        "UPDATE cache_words SET content_hash=?, fetched_at=COALESCE(fetched_at, ?) WHERE word=?",
+        [
+            (content_hash(api_response), datetime.now().strftime("%Y-%m-%d %H:%M:%S"), word)
+            for word, api_response in c.fetchall()
+        ],
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_cache_words_fetched_at" ON "cache_words" ("fetched_at")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_cache_words_last_accessed" ON "cache_words" ("last_accessed")'
+    )
+
+
+def migration_negative_cache(c: sqlite3.Cursor) -> None:
+    """
+    Adds the negative_cache table, words the API rejected together with the spelling suggestions shown for them.
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "negative_cache" (
+            "word" TEXT NOT NULL PRIMARY KEY,
+            "status_code" INTEGER NOT NULL,
+            "suggestions" json NOT NULL,
+            "expires_at" timestamp NOT NULL
+            );"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_negative_cache_expires_at" ON "negative_cache" ("expires_at")'
+    )
+
+
+def migration_metrics(c: sqlite3.Cursor) -> None:
+    """
+    Adds the tables the Metrics module records counters and latency histograms in.
+
+    1. metric_counters: one row per counter, label set and period
+    2. metric_histograms: one row per histogram, label set, period and bucket, with the number and the sum of the observations in the bucket
+    3. A period starts every hour, hourly rows are rolled up into daily rows once they are a week old
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "metric_counters" (
+            "name" TEXT NOT NULL,
+            "labels" TEXT NOT NULL,
+            "period" TEXT NOT NULL,
+            "start" timestamp NOT NULL,
+            "value" REAL NOT NULL,
+            PRIMARY KEY ("name", "labels", "period", "start")
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "metric_histograms" (
+            "name" TEXT NOT NULL,
+            "labels" TEXT NOT NULL,
+            "period" TEXT NOT NULL,
+            "start" timestamp NOT NULL,
+            "le" REAL NOT NULL,
+            "count" INTEGER NOT NULL,
+            "sum" REAL NOT NULL,
+            PRIMARY KEY ("name", "labels", "period", "start", "le")
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_metric_counters_period" ON "metric_counters" ("period", "start")'
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_metric_histograms_period" ON "metric_histograms" ("period", "start")'
+    )
+
+
+# triggers that keep daily_lookups and word_lookups in step with the words table. A lookup is never updated in
+# place, but an update is handled like a delete followed by an insert all the same.
+LOOKUP_ROLLUP_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS "trg_words_rollup_insert" AFTER INSERT ON "words"
+    BEGIN
+        INSERT INTO daily_lookups (day, lookups) VALUES (date(NEW.datetime), 1)
+            ON CONFLICT (day) DO UPDATE SET lookups=lookups+1;
+        INSERT INTO word_lookups (word, lookups) VALUES (NEW.word, 1)
+            ON CONFLICT (word) DO UPDATE SET lookups=lookups+1;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_words_rollup_delete" AFTER DELETE ON "words"
+    BEGIN
+        UPDATE daily_lookups SET lookups=lookups-1 WHERE day=date(OLD.datetime);
+        DELETE FROM daily_lookups WHERE day=date(OLD.datetime) AND lookups<=0;
+        UPDATE word_lookups SET lookups=lookups-1 WHERE word=OLD.word;
+        DELETE FROM word_lookups WHERE word=OLD.word AND lookups<=0;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_words_rollup_update" AFTER UPDATE OF word, datetime ON "words"
+    BEGIN
+        UPDATE daily_lookups SET lookups=lookups-1 WHERE day=date(OLD.datetime);
+        DELETE FROM daily_lookups WHERE day=date(OLD.datetime) AND lookups<=0;
+        UPDATE word_lookups SET lookups=lookups-1 WHERE word=OLD.word;
+        DELETE FROM word_lookups WHERE word=OLD.word AND lookups<=0;
+        INSERT INTO daily_lookups (day, lookups) VALUES (date(NEW.datetime), 1)
+            ON CONFLICT (day) DO UPDATE SET lookups=lookups+1;
+        INSERT INTO word_lookups (word, lookups) VALUES (NEW.word, 1)
+            ON CONFLICT (word) DO UPDATE SET lookups=lookups+1;
+    END;""",
+]
+
+
+def rebuild_lookup_rollups(c: sqlite3.Cursor) -> None:
+    """
+    Computes daily_lookups and word_lookups from scratch, from every row of the words table.
+
+    Bulk loads drop the rollup triggers, insert the lookups and call this once, which is much faster than updating the rollups row by row.
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the caller's transaction
+    """
+
+    c.execute("DELETE FROM daily_lookups")
+    c.execute("DELETE FROM word_lookups")
+    c.execute(
+        "INSERT INTO daily_lookups (day, lookups) SELECT date(datetime), COUNT(*) FROM words GROUP BY date(datetime)"
+    )
+    c.execute(
+        "INSERT INTO word_lookups (word, lookups) SELECT word, COUNT(*) FROM words GROUP BY word"
+    )
+
+
+def migration_lookup_rollups(c: sqlite3.Cursor) -> None:
+    """
+    Adds the lookup rollups the analytics read instead of the whole lookup log.
+
+    1. daily_lookups: the number of lookups on every day with at least one lookup
+    2. word_lookups: the number of lookups of every word, indexed by that number for the top words
+    3. Both are filled from the words table and then kept up to date by triggers on it
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "daily_lookups" (
+            "day" TEXT NOT NULL PRIMARY KEY,
+            "lookups" INTEGER NOT NULL
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "word_lookups" (
+            "word" TEXT NOT NULL PRIMARY KEY,
+            "lookups" INTEGER NOT NULL
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_word_lookups_lookups" ON "word_lookups" ("lookups" DESC, "word")'
+    )
+    rebuild_lookup_rollups(c)
+    for trigger in LOOKUP_ROLLUP_TRIGGERS:
+        c.execute(trigger)
+
+
+def to_epoch(moment: datetime) -> int:
+    """
+    Returns the value the words.epoch column has for a lookup made at the given time.
+
+    The timestamps are stored in local time without a zone, and strftime('%s') reads them as if they were UTC. The
+    same is done here, so that the bounds of a range filter line up with the stored lookups.
+
+    Args:
+        moment (datetime): Naive local time, as returned by datetime.now()
+
+    Returns:
+        int: Seconds since 1970-01-01 00:00:00 of the same wall clock time.
+    """
+
+    return int((moment.replace(microsecond=0) - datetime(1970, 1, 1)).total_seconds())
+
+
+def migration_words_epoch(c: sqlite3.Cursor) -> None:
+    """
+    Adds the integer epoch column to the words table, so that time range filters can use an index.
+
+    1. epoch: the lookup time in seconds, computed from datetime by SQLite so inserts don't have to set it
+    2. The column is virtual, it takes no space in the table, only in its index
+    3. The index also holds the word, range filters on lookups never read the table itself
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute('PRAGMA table_xinfo("words")')
+    if "epoch" not in [column[1] for column in c.fetchall()]:
+        c.execute(
+            """ALTER TABLE "words" ADD COLUMN "epoch" INTEGER
+            GENERATED ALWAYS AS (CAST(strftime('%s', "datetime") AS INTEGER)) VIRTUAL"""
+        )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_words_epoch" ON "words" ("epoch", "word")'
+    )
+
+
+# streaks only change when a day is added to or dropped from daily_lookups, more lookups on a known day leave them be.
+# The triggers empty the cache and the next streak command computes it again.
+LOOKUP_STREAK_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS "trg_daily_lookups_streaks_insert" AFTER INSERT ON "daily_lookups"
+    BEGIN
+        DELETE FROM lookup_streaks;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_daily_lookups_streaks_delete" AFTER DELETE ON "daily_lookups"
+    BEGIN
+        DELETE FROM lookup_streaks;
+    END;""",
+]
+
+
+def rebuild_lookup_streaks(c: sqlite3.Cursor) -> None:
+    """
+    Computes lookup_streaks from daily_lookups.
+
+    1. Number the days with lookups in order, the difference between a day and its number is the same for every day of a streak
+    2. Group the days by that difference, every group is one streak
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the caller's transaction
+    """
+
+    c.execute("DELETE FROM lookup_streaks")
+    c.execute(
+        """INSERT INTO lookup_streaks (start, "end", days)
+        SELECT MIN(day), MAX(day), COUNT(*) FROM (
+            SELECT day, julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island FROM daily_lookups
+        ) GROUP BY island"""
+    )
+
+
+def migration_lookup_streaks(c: sqlite3.Cursor) -> None:
+    """
+    Adds the lookup_streaks cache, one row per run of consecutive days with lookups.
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "lookup_streaks" (
+            "start" TEXT NOT NULL PRIMARY KEY,
+            "end" TEXT NOT NULL,
+            "days" INTEGER NOT NULL
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_lookup_streaks_days" ON "lookup_streaks" ("days" DESC, "start")'
+    )
+    for trigger in LOOKUP_STREAK_TRIGGERS:
+        c.execute(trigger)
+    rebuild_lookup_streaks(c)
+
+
+def migration_lookup_ids(c: sqlite3.Cursor) -> None:
+    """
+    Rebuilds the words table around an id for every lookup, so that two lookups no longer need two different seconds.
+
+    1. id: AUTOINCREMENT, the id of a deleted lookup is never handed out again
+    2. datetime: no longer unique on its own, new lookups are stored with microseconds
+    3. UNIQUE (word, datetime): the same lookup can still only be recorded once, an import of an export is skipped
+    4. The indexes and triggers of the old table are created again on the new one
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute('PRAGMA table_info("words")')
+    if "id" in [column[1] for column in c.fetchall()]:
+        return
+
+    c.execute(
+        """SELECT sql FROM sqlite_master WHERE tbl_name='words' AND sql IS NOT NULL
+        AND type IN ('index', 'trigger')"""
+    )
+    rebuild = [row[0] for row in c.fetchall()]
+    c.execute(
+        """CREATE TABLE "words_log" (
+            "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+            "word" TEXT NOT NULL,
+            "datetime" timestamp NOT NULL,
+            "epoch" INTEGER GENERATED ALWAYS AS (CAST(strftime('%s', "datetime") AS INTEGER)) VIRTUAL,
+            UNIQUE ("word", "datetime")
+            );"""
+    )
+    c.execute(
+        "INSERT INTO words_log (word, datetime) SELECT word, datetime FROM words ORDER BY rowid"
+    )
+    c.execute('DROP TABLE "words"')
+    c.execute('ALTER TABLE "words_log" RENAME TO "words"')
+    for sql in rebuild:
+        c.execute(sql)
+
+
+# the part of speech and the definition a quiz shows for every word of {source}, the first ones of its cached API
+# response like one_line_definition shows. Words without a definition are left out.
+QUIZ_DEFINITION_SELECT = """SELECT word, json_extract(api_response, '$.meanings[0].partOfSpeech'),
+    json_extract(api_response, '$.meanings[0].definitions[0].definition') FROM {source}
+    WHERE CASE WHEN json_valid(api_response) THEN json_extract(api_response, '$.meanings[0].definitions[0].definition') END IS NOT NULL"""
+
+# triggers that keep quiz_definitions in step with cache_words
+_QUIZ_DEFINITION_NEW = QUIZ_DEFINITION_SELECT.format(
+    source="(SELECT NEW.word AS word, NEW.api_response AS api_response)"
+)
+QUIZ_DEFINITION_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS "trg_cache_words_quiz_insert" AFTER INSERT ON "cache_words"
+    BEGIN
+        INSERT OR REPLACE INTO quiz_definitions (word, part_of_speech, definition) {_QUIZ_DEFINITION_NEW};
+    END;""",
+    f"""CREATE TRIGGER IF NOT EXISTS "trg_cache_words_quiz_update" AFTER UPDATE OF word, api_response ON "cache_words"
+    BEGIN
+        DELETE FROM quiz_definitions WHERE word=OLD.word;
+        INSERT OR REPLACE INTO quiz_definitions (word, part_of_speech, definition) {_QUIZ_DEFINITION_NEW};
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_cache_words_quiz_delete" AFTER DELETE ON "cache_words"
+    BEGIN
+        DELETE FROM quiz_definitions WHERE word=OLD.word;
+    END;""",
+]
+
+
+def rebuild_quiz_definitions(c: sqlite3.Cursor) -> None:
+    """
+    Computes quiz_definitions from scratch, from every row of the cache_words table.
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the caller's transaction
+    """
+
+    c.execute("DELETE FROM quiz_definitions")
+    c.execute(
+        "INSERT INTO quiz_definitions (word, part_of_speech, definition) "
+        + QUIZ_DEFINITION_SELECT.format(source="cache_words")
+    )
+
+
+def migration_quiz_definitions(c: sqlite3.Cursor) -> None:
+    """
+    Adds the quiz_definitions index the quizzes draw their choices from, without reading a single API response.
+
+    1. One row per cached word with the part of speech and the definition a quiz shows for it
+    2. Indexed by part of speech, so that the wrong choices of a question can have the part of speech of the right one
+    3. Filled from cache_words and then kept up to date by triggers on it
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "quiz_definitions" (
+            "word" TEXT NOT NULL PRIMARY KEY,
+            "part_of_speech" TEXT,
+            "definition" TEXT NOT NULL
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_quiz_definitions_part_of_speech" ON "quiz_definitions" ("part_of_speech", "word")'
+    )
+    rebuild_quiz_definitions(c)
+    for trigger in QUIZ_DEFINITION_TRIGGERS:
+        c.execute(trigger)
+
+
+# triggers that give every word a review schedule when it is first looked up, due right away, and drop it with the word
+WORD_SCHEDULE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS "trg_word_state_schedule_insert" AFTER INSERT ON "word_state"
+    BEGIN
+        INSERT OR IGNORE INTO word_schedule (word, due_at) VALUES (NEW.word, datetime('now', 'localtime'));
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_word_state_schedule_delete" AFTER DELETE ON "word_state"
+    BEGIN
+        DELETE FROM word_schedule WHERE word=OLD.word;
+    END;""",
+]
+
+
+def migration_word_schedule(c: sqlite3.Cursor) -> None:
+    """
+    Adds the word_schedule table the spaced repetition of revise --due and quiz --due runs on.
+
+    1. One row per word with its SM-2 ease, interval in days, number of reviews passed in a row and the time it is due
+    2. Indexed by due time, so that the next words due are read with a range scan instead of sorting every word
+    3. The words looked up so far are due right away, the ones first looked up longest ago first
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "word_schedule" (
+            "word" TEXT NOT NULL PRIMARY KEY,
+            "ease" REAL NOT NULL DEFAULT 2.5,
+            "interval" INTEGER NOT NULL DEFAULT 0,
+            "repetitions" INTEGER NOT NULL DEFAULT 0,
+            "due_at" TEXT NOT NULL,
+            "reviewed_at" TEXT
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_word_schedule_due_at" ON "word_schedule" ("due_at")'
+    )
+    c.execute(
+        """INSERT OR IGNORE INTO word_schedule (word, due_at)
+        SELECT word_state.word, COALESCE(datetime(MIN(words.datetime)), datetime('now', 'localtime'))
+        FROM word_state LEFT JOIN words ON words.word=word_state.word GROUP BY word_state.word"""
+    )
+    for trigger in WORD_SCHEDULE_TRIGGERS:
+        c.execute(trigger)
+
+
+# triggers that keep word_quiz_stats in step with quiz_answers and quiz_type_stats in step with quiz_history. The
+# answers of a word go with it.
+QUIZ_STATS_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS "trg_quiz_answers_stats_insert" AFTER INSERT ON "quiz_answers"
+    BEGIN
+        INSERT INTO word_quiz_stats (word, attempts, correct, latency_ms) VALUES (NEW.word, 1, NEW.correct, NEW.latency_ms)
+            ON CONFLICT (word) DO UPDATE SET attempts=attempts+1, correct=correct+NEW.correct, latency_ms=latency_ms+NEW.latency_ms;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_quiz_answers_stats_delete" AFTER DELETE ON "quiz_answers"
+    BEGIN
+        UPDATE word_quiz_stats SET attempts=attempts-1, correct=correct-OLD.correct, latency_ms=latency_ms-OLD.latency_ms
+            WHERE word=OLD.word;
+        DELETE FROM word_quiz_stats WHERE word=OLD.word AND attempts<=0;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_word_state_quiz_answers_delete" AFTER DELETE ON "word_state"
+    BEGIN
+        DELETE FROM quiz_answers WHERE word=OLD.word;
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_quiz_history_stats_insert" AFTER INSERT ON "quiz_history"
+    BEGIN
+        INSERT INTO quiz_type_stats (type, quizzes, questions, points, duration, last_datetime)
+            VALUES (NEW.type, 1, NEW.question_count, NEW.points, NEW.duration, NEW.datetime)
+            ON CONFLICT (type) DO UPDATE SET quizzes=quizzes+1, questions=questions+NEW.question_count,
+            points=points+NEW.points, duration=duration+NEW.duration, last_datetime=MAX(last_datetime, NEW.datetime);
+    END;""",
+    """CREATE TRIGGER IF NOT EXISTS "trg_quiz_history_stats_delete" AFTER DELETE ON "quiz_history"
+    BEGIN
+        UPDATE quiz_type_stats SET quizzes=quizzes-1, questions=questions-OLD.question_count, points=points-OLD.points,
+            duration=duration-OLD.duration, last_datetime=(SELECT MAX(datetime) FROM quiz_history WHERE type=OLD.type)
+            WHERE type=OLD.type;
+        DELETE FROM quiz_type_stats WHERE type=OLD.type AND quizzes<=0;
+    END;""",
+]
+
+
+def rebuild_quiz_stats(c: sqlite3.Cursor) -> None:
+    """
+    Computes word_quiz_stats and quiz_type_stats from scratch, from every row of quiz_answers and quiz_history.
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the caller's transaction
+    """
+
+    c.execute("DELETE FROM word_quiz_stats")
+    c.execute("DELETE FROM quiz_type_stats")
+    c.execute(
+        """INSERT INTO word_quiz_stats (word, attempts, correct, latency_ms)
+        SELECT word, COUNT(*), SUM(correct), SUM(latency_ms) FROM quiz_answers GROUP BY word"""
+    )
+    c.execute(
+        """INSERT INTO quiz_type_stats (type, quizzes, questions, points, duration, last_datetime)
+        SELECT type, COUNT(*), SUM(question_count), SUM(points), SUM(duration), MAX(datetime) FROM quiz_history GROUP BY type"""
+    )
+
+
+def migration_quiz_stats(c: sqlite3.Cursor) -> None:
+    """
+    Adds the answer of every quiz question and the statistics aggregated from them and from the quiz history.
+
+    1. quiz_answers: whether every question was answered right and how long it took, a small row per answer
+    2. word_quiz_stats: the attempts, right answers and total answer time of every word, indexed by accuracy so that the weakest words are read first
+    3. quiz_type_stats: the quizzes, questions, points and time of every quiz type, so that the quiz history doesn't add up every quiz
+    4. Both are filled from the existing rows and then kept up to date by triggers
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "quiz_answers" (
+            "id" INTEGER PRIMARY KEY,
+            "word" TEXT NOT NULL,
+            "correct" INTEGER NOT NULL,
+            "latency_ms" INTEGER NOT NULL,
+            "datetime" timestamp NOT NULL
+            );"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_quiz_answers_word" ON "quiz_answers" ("word")'
+    )
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "word_quiz_stats" (
+            "word" TEXT NOT NULL PRIMARY KEY,
+            "attempts" INTEGER NOT NULL,
+            "correct" INTEGER NOT NULL,
+            "latency_ms" INTEGER NOT NULL,
+            "accuracy" REAL GENERATED ALWAYS AS (CAST("correct" AS REAL) / "attempts") VIRTUAL
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_word_quiz_stats_accuracy" ON "word_quiz_stats" ("accuracy", "attempts" DESC)'
+    )
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "quiz_type_stats" (
+            "type" TEXT NOT NULL PRIMARY KEY,
+            "quizzes" INTEGER NOT NULL,
+            "questions" INTEGER NOT NULL,
+            "points" INTEGER NOT NULL,
+            "duration" INTEGER NOT NULL,
+            "last_datetime" timestamp
+            ) WITHOUT ROWID;"""
+    )
+    c.execute(
+        'CREATE INDEX IF NOT EXISTS "idx_quiz_history_type" ON "quiz_history" ("type", "datetime")'
+    )
+    rebuild_quiz_stats(c)
+    for trigger in QUIZ_STATS_TRIGGERS:
+        c.execute(trigger)
+
+
+def migration_metric_totals(c: sqlite3.Cursor) -> None:
+    """
+    Adds a lifetime total row for every metric and label set, period 'total', that the Prometheus export reads.
+
+    1. The totals start from the hourly and daily rows kept so far, the rows already dropped are lost
+    2. Metrics.flush keeps them up to date, Metrics.rollup never touches them
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the migration transaction
+    """
+
+    c.execute(
+        """INSERT INTO metric_counters (name, labels, period, start, value)
+        SELECT name, labels, 'total', '', SUM(value) FROM metric_counters
+        WHERE period IN ('hour', 'day') GROUP BY name, labels"""
+    )
+    c.execute(
+        """INSERT INTO metric_histograms (name, labels, period, start, le, count, sum)
+        SELECT name, labels, 'total', '', le, SUM(count), SUM(sum) FROM metric_histograms
+        WHERE period IN ('hour', 'day') GROUP BY name, labels, le"""
+    )
+
+
+# (version, description, migration). Append new migrations at the end, never reorder or edit applied ones.
+MIGRATIONS = [
+    (1, "secondary indexes on words and collections", migration_add_indexes),
+    (2, "word_state table, words becomes a lookup log", migration_word_state),
+    (3, "staleness and hit tracking columns on cache_words", migration_cache_ttl),
+    (4, "negative_cache table for words the API rejected", migration_negative_cache),
+    (5, "metric tables for counters and latency histograms", migration_metrics),
+    (6, "daily_lookups and word_lookups rollups of the words table", migration_lookup_rollups),
+    (7, "integer epoch column on words for index range filters", migration_words_epoch),
+    (8, "lookup_streaks cache of the runs of days with lookups", migration_lookup_streaks),
+    (9, "id for every lookup, datetime no longer unique on its own", migration_lookup_ids),
+    (10, "quiz_definitions index of cache_words by part of speech", migration_quiz_definitions),
+    (11, "word_schedule table for spaced repetition, indexed by due time", migration_word_schedule),
+    (12, "quiz_answers and the quiz statistics aggregated from them and quiz_history", migration_quiz_stats),
+    (13, "lifetime totals of the metrics, never rolled up or dropped", migration_metric_totals),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Returns the schema version of the database, 0 if it was never migrated.
+
+    Args:
+        conn (sqlite3.Connection): Connection object
+
+    Returns:
+        int: Latest applied migration version.
+    """
+
+    c = conn.cursor()
+    c.execute(
+        """CREATE TABLE IF NOT EXISTS "schema_version" (
+            "version" INTEGER PRIMARY KEY,
+            "description" TEXT NOT NULL,
+            "datetime" timestamp NOT NULL
+            );"""
+    )
+    c.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return c.fetchone()[0]
+
+
+# no tests for this function as it is not called anywhere in the command directly
+def migrateDB(conn: sqlite3.Connection) -> None:
+    """
+    Upgrades the database schema in place.
+
+    1. Read the current version from the schema_version table
+    2. Apply every migration with a higher version, in order
+    3. Each migration runs in its own transaction together with its schema_version row, so a failed migration leaves the database at the previous version
+
+    Args:
+        conn (sqlite3.Connection): Connection object
+    """
+
+    current_version = get_schema_version(conn)
+    c = conn.cursor()
+    for version, description, migration in MIGRATIONS:
+        if version <= current_version:
+            continue
+        try:
+            c.execute("BEGIN")
+            migration(c)
+            c.execute(
+                "INSERT INTO schema_version (version, description, datetime) VALUES (?, ?, ?)",
+                (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            conn.commit()
+        except Error as e:
+            conn.rollback()
+            print(
+                Panel(
+                    title="[b reverse red]  Error!  [/b reverse red]",
+                    title_align="center",
+                    padding=(1, 1),
+                    renderable=f"[bold red]Database upgrade to version {version} failed:[/bold red] {e} ❌",
+                )
+            )
+            return
+
+
+##################
+# CACHE REFRESH #
+##################
+
+
+def content_hash(api_response: str) -> str:
+    """
+    Returns the hash stored in cache_words.content_hash for a serialized API response.
+
+    Args:
+        api_response (str): API response as stored in cache_words.api_response
+
+    Returns:
+        str: SHA-256 hex digest of the response.
+    """
+
+    return hashlib.sha256(api_response.encode("utf-8")).hexdigest()
+
+
+# tuning knobs of refresh_cache, the CLI options default to these
+REFRESH_WORKERS = 8  # concurrent API requests
+REFRESH_RATE_LIMIT = 10.0  # API requests per second across all workers
+REFRESH_RETRIES = 3  # retries of a request that timed out, lost its connection or was rate limited
+REFRESH_BACKOFF = 0.5  # seconds before the first retry, doubled for every retry after that
+REFRESH_BATCH_SIZE = 100  # cache updates committed per transaction
+REFRESH_TIMEOUT = 10  # seconds before an API request times out
+
+
+class RateLimiter:
+    """Spaces out calls to acquire so that no more than `rate` of them start per second, across all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until the caller's slot comes up."""
+
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# every worker thread keeps its own HTTP session so connections to the API are reused
+_sessions = threading.local()
 
 
-# NOTE: Use this command very sparingly. It is not recommended to use this command more than once a week due to possible API overuse
+def fetch_api_response(word: str, limiter: RateLimiter, retries: int = REFRESH_RETRIES):
+    """
+    Fetches the API response of a word for refresh_cache, retrying transient failures.
+
+    1. Wait for a free slot of the rate limiter
+    2. Request the word from the API
+    3. On a timeout, a connection error, HTTP 429 or a 5xx, back off exponentially (or as long as Retry-After asks) and try again
+    4. Any other HTTP error is final, e.g. 404 when the API no longer knows the word
+
+    Args:
+        word (str): Word to fetch
+        limiter (RateLimiter): Rate limiter shared by all workers
+        retries (int, optional): Number of retries after the first attempt. Defaults to REFRESH_RETRIES.
 
-# TODO: ADD ASYNCIO MULTITHREADING TO THIS FUNCTION
-def refresh_cache() -> None:
+    Returns:
+        tuple: (word, response json) on success, (word, None, reason) on failure.
+    """
+
+    import requests
+    from requests import exceptions
+
+    if not hasattr(_sessions, "session"):
+        _sessions.session = requests.Session()
+
+    reason = "unknown error"
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(REFRESH_BACKOFF * 2 ** (attempt - 1))
+        limiter.acquire()
+        try:
+            with timer("api_request_duration"):
+                response = _sessions.session.get(
+                    f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}",
+                    timeout=REFRESH_TIMEOUT,
+                )
+        except (exceptions.ConnectionError, exceptions.Timeout) as error:
+            increment("api_requests_total", {"status": "error"})
+            reason = type(error).__name__
+            continue
+        increment("api_requests_total", {"status": response.status_code})
+
+        if response.status_code == 200:
+            return word, response.json()[0]
+
+        reason = f"HTTP {response.status_code}"
+        if response.status_code != 429 and response.status_code < 500:
+            break
+        if retry_after := response.headers.get("Retry-After", "").strip():
+            with contextlib.suppress(ValueError):
+                time.sleep(min(float(retry_after), 60))
+
+    return word, None, reason
+
+
+def refresh_cache(
+    workers: int = REFRESH_WORKERS,
+    rate: float = REFRESH_RATE_LIMIT,
+    batch_size: int = REFRESH_BATCH_SIZE,
+    stale_after: Optional[int] = None,
+    accessed_since: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> None:
     """
     Refreshes the cache of the words in the database.
 
-    1. Connect to the database
-    2. Check if the cache is empty, if yes, then do nothing.
-    3. If the cache is not empty, then we need to refresh it.
-    4. Get all the words from the cache.
-    5. For each word, get the response from the API and update the cache.
-    6. If there's an error, then show a error message and exit.
-    7. If there's no error, then update the cache.
-    8. If the cache is updated, then show a success message.
+    1. Select the cached words to refresh, all of them unless narrowed down by stale_after, accessed_since and limit. Most used words come first.
+    2. Fetch the words from the API on a pool of worker threads, limited to `rate` requests per second with retries and backoff.
+    3. In the calling thread, compare the content hash of every fresh response with the cached one. Only a changed response is written back (and dropped from the response memo), an unchanged one just gets a new fetched_at.
+    4. Write the queued updates in batches of `batch_size`, one transaction per batch.
+    5. If the first `workers` words all fail to connect, the API is unreachable, cancel the rest instead of retrying every word.
+    6. Print a summary of the refreshed, unchanged and failed words.
+
+    Args:
+        workers (int, optional): Number of concurrent API requests. Defaults to REFRESH_WORKERS.
+        rate (float, optional): API requests per second across all workers. Defaults to REFRESH_RATE_LIMIT.
+        batch_size (int, optional): Cache updates committed per transaction. Defaults to REFRESH_BATCH_SIZE.
+        stale_after (int, optional): Only refresh entries fetched more than this many days ago. Defaults to None.
+        accessed_since (int, optional): Only refresh entries looked up in the last this many days. Defaults to None.
+        limit (int, optional): Refresh at most this many entries. Defaults to None.
     """
 
-    # check if cache is empty, if yes then do nothing
     conn = createConnection()
     c = conn.cursor()
 
     c.execute("SELECT COUNT(*) FROM cache_words")
     if not c.fetchone()[0]:
+        print(Panel("The cache is empty, look up some words first. 📭"))
         return
-    c.execute("SELECT word FROM cache_words")
-    rows = c.fetchall()
 
-    total = 0
-    for row in rows:
-        # ----------------- Progress Bar -----------------#
-        for _ in track(range(len(rows)), description=" 🔃 Refreshing Cache "):
+    conditions, params = [], []
+    if stale_after is not None:
+        conditions.append("(fetched_at IS NULL OR fetched_at<=?)")
+        params.append(
+            (datetime.now() - timedelta(days=stale_after)).strftime("%Y-%m-%d %H:%M:%S")
+        )
+    if accessed_since is not None:
+        conditions.append("last_accessed>=?")
+        params.append(
+            (datetime.now() - timedelta(days=accessed_since)).strftime("%Y-%m-%d %H:%M:%S")
+        )
+    sql = "SELECT word, content_hash FROM cache_words"
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    sql += " ORDER BY hit_count DESC, fetched_at ASC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    c.execute(sql, params)
+    cached = dict(c.fetchall())
+    if not cached:
+        print(Panel("Every cached word is up to date, nothing to refresh. ✅"))
+        return
+
+    limiter = RateLimiter(rate)
+    updates, touched = [], []
+    refreshed = unchanged = 0
+    failed = {}
+
+    def flush() -> None:
+        c.executemany(
+            "UPDATE cache_words SET api_response=?, content_hash=?, fetched_at=? WHERE word=?",
+            updates,
+        )
+        c.executemany("UPDATE cache_words SET fetched_at=? WHERE word=?", touched)
+        conn.commit()
+        # the rewritten entries must not be served from the parsed response memo of the Dictionary module
+        # it is looked up instead of imported, Dictionary imports this module and may not be loaded at all
+        if updates and (dictionary := sys.modules.get("Dictionary")) is not None:
+            for *_, word in updates:
+                dictionary.invalidate_response(word)
+        updates.clear()
+        touched.clear()
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = [
+            executor.submit(fetch_api_response, word, limiter) for word in cached
+        ]
 
+        # ----------------- Progress Bar -----------------#
+        for future in track(
+            as_completed(futures),
+            total=len(futures),
+            description=f" 🔃 Refreshing {len(futures)} cached words ",
+        ):
             # ----------------- Progress Bar -----------------#
 
-            word = row[0]
-            try:
-                response = requests.get(
-                    f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}"
-                )
-                response.raise_for_status()
-
-            except exceptions.ConnectionError as error:
-                print(
-                    Panel(
-                        title="[b reverse red]  Error!  [/b reverse red]",
-                        title_align="center",
-                        padding=(1, 1),
-                        renderable="[bold red]Error: You are not connected to the internet.[/bold red] ❌",
-                    )
-                )
+            word, response, *reason = future.result()
+            if response is None:
+                failed[word] = reason[0]
+                if not refreshed + unchanged and len(failed) >= workers and all(
+                    error == "ConnectionError" for error in failed.values()
+                ):
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+                continue
+
+            api_response = json.dumps(response)
+            fetched_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if (new_hash := content_hash(api_response)) == cached[word]:
+                touched.append((fetched_at, word))
+                unchanged += 1
             else:
-                if response.status_code == 200:
-                    c.execute(
-                        "UPDATE cache_words SET api_response=? WHERE word=?",
-                        (json.dumps(response.json()[0]), word),
-                    )
-                    conn.commit()
-
-            # update the progress bar
-            total += 1
-
-    print(
-        Panel(
-            title="[b reverse green]  Success!  [/b reverse green]",
-            title_align="center",
-            padding=(1, 1),
-            renderable="Cache refreshed successfully. ✅",
+                updates.append((api_response, new_hash, fetched_at, word))
+                refreshed += 1
+            if len(updates) + len(touched) >= batch_size:
+                flush()
+
+    if updates or touched:
+        flush()
+
+    if not refreshed + unchanged and all(
+        error == "ConnectionError" for error in failed.values()
+    ):
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable="[bold red]Error: You are not connected to the internet.[/bold red] Cache was not refreshed. ❌",
+            )
         )
-    )
+        return
+
+    # ----------------- Summary -----------------#
+
+    table = Table(show_header=True, header_style="bold bright_cyan")
+    table.add_column("Refreshed", style="light_green", justify="center")
+    table.add_column("Unchanged", style="cyan", justify="center")
+    table.add_column("Failed", style="red", justify="center")
+    table.add_row(str(refreshed), str(unchanged), str(len(failed)))
+    print(table)
+
+    if failed:
+        shown = ", ".join(f"{word} ({reason})" for word, reason in list(failed.items())[:10])
+        more = f" and {len(failed) - 10} more" if len(failed) > 10 else ""
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable=f"[bold red]Could not refresh[/bold red] {shown}{more}. Their cached definitions were kept. ❌",
+            )
+        )
+    else:
+        print(
+            Panel(
+                title="[b reverse green]  Success!  [/b reverse green]",
+                title_align="center",
+                padding=(1, 1),
+                renderable="Cache refreshed successfully. ✅",
+            )
+        )
+
+
+# VOCAB_SQL_TRACE=1 traces the SQL of the whole process, e.g. a test run, and prints the report when it exits
+if os.environ.get("VOCAB_SQL_TRACE"):
+    from SQLTrace import trace_process
+
+    trace_process()
@@ -1,22 +1,34 @@
 import csv
 import json
 import os
-import time
-from datetime import datetime
+import sys
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import *
 
-import requests
-from Database import createConnection
+from Database import (
+    REFRESH_RATE_LIMIT,
+    REFRESH_TIMEOUT,
+    RateLimiter,
+    content_hash,
+    createConnection,
+)
 from Exceptions import *
-from playsound import playsound
-from requests import exceptions
+from Metrics import increment, timer
+from Profiling import span
 from rich import print
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 
+# this module is reachable both as "Dictionary" (via the path hack in modules/__init__.py) and as
+# "modules.Dictionary". Alias the two names so that the whole process shares one response memo.
+sys.modules.setdefault("Dictionary", sys.modules[__name__])
+sys.modules.setdefault("modules.Dictionary", sys.modules[__name__])
 
 def display_theme(query: str) -> None:
     """
@@ -32,9 +44,9 @@ def display_theme(query: str) -> None:
     """
     conn = createConnection()
     c = conn.cursor()
-    # join collection and words table to get the collection name for the word
+    # join collection and word_state table to get the collection name for the word
     c.execute(
-        "SELECT collection FROM collections JOIN words ON collections.word=words.word WHERE words.word=?",
+        "SELECT collection FROM collections JOIN word_state ON collections.word=word_state.word WHERE word_state.word=?",
         (query,),
     )
     if collection := c.fetchone():
@@ -69,15 +81,355 @@ def show_commonly_confused(word: str) -> None:
                 )
 
 
+# words the API rejected are remembered this long before the API is asked again
+NEGATIVE_CACHE_TTL = timedelta(days=7)
+
+# building a SpellChecker loads its whole word frequency list, so one is shared by the process
+_spell_checker = None
+
+
+def get_spell_checker():
+    """
+    Returns the shared SpellChecker, created on first use.
+
+    Returns:
+        SpellChecker: spell checker with the default English word list
+    """
+
+    global _spell_checker
+    if _spell_checker is None:
+        with span("Loading spell checker"):
+            from spellchecker import SpellChecker
+
+            _spell_checker = SpellChecker()
+    return _spell_checker
+
+
+# no tests for this function as it is not called anywhere in the command directly
+def check_negative_cache(c, query: str) -> Optional[List[str]]:
+    """
+    Checks if the API rejected the word recently.
+
+    Args:
+        c (sqlite3.Cursor): Cursor to the database.
+        query (str): Word to check.
+
+    Returns:
+        list: Spelling suggestions stored for the word (may be empty) if it is in the negative cache and not expired, otherwise None.
+    """
+
+    c.execute(
+        "SELECT suggestions FROM negative_cache WHERE word=? AND expires_at>?",
+        (query, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+    )
+    return json.loads(row[0]) if (row := c.fetchone()) else None
+
+
+# no tests for this function as it is not called anywhere in the command directly
+def add_to_negative_cache(conn, query: str, status_code: int) -> List[str]:
+    """
+    Remembers a word the API rejected, with the spelling suggestions for it.
+
+    1. Only client errors are cached, a rate limit (429) or a server error may well succeed on the next try
+    2. The suggestions are computed once here so that later lookups of the word need neither the network nor the spell checker
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database.
+        query (str): Word the API rejected.
+        status_code (int): HTTP status code of the API response.
+
+    Returns:
+        list: Spelling suggestions for the word, empty if there are none.
+    """
+
+    spell = get_spell_checker()
+    suggestions = []
+    if spell.unknown([query]):
+        suggestions = sorted(spell.candidates(query) or [])
+
+    if 400 <= status_code < 500 and status_code != 429:
+        conn.execute(
+            "INSERT OR REPLACE INTO negative_cache (word, status_code, suggestions, expires_at) VALUES (?, ?, ?, ?)",
+            (
+                query,
+                status_code,
+                json.dumps(suggestions),
+                (datetime.now() + NEGATIVE_CACHE_TTL).strftime("%Y-%m-%d %H:%M:%S"),
+            ),
+        )
+        conn.commit()
+    return suggestions
+
+
+def print_word_not_found(query: str, suggestions: List[str]) -> None:
+    """
+    Tells the user the word was not found, suggesting correct spellings if there are any.
+
+    Args:
+        query (str): Word that was not found.
+        suggestions (list): Spelling suggestions for the word.
+    """
+
+    if suggestions:
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable=f"The word {query} was not found. Did you mean [u blue]{', '.join(suggestions)}[/u blue]? 🤔",
+            )
+        )
+    else:
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable=f"The word [bold red]{query}[/bold red] is not a valid word. Please check the spelling. 🤔",
+            )
+        )
+
+
+# most recently used parsed API responses, keyed by word, so that a command reads and parses each one once
+RESPONSE_MEMO_SIZE = 256
+
+_response_memo: "OrderedDict[str, dict]" = OrderedDict()
+_response_memo_lock = threading.Lock()
+_response_memo_stats = {"hits": 0, "misses": 0}
+
+
+class ResponseMemoInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def response_memo_info() -> ResponseMemoInfo:
+    """
+    Returns the hit and miss counts of the response memo since the process started.
+
+    Returns:
+        ResponseMemoInfo: hits, misses, maximum size and current size of the memo.
+    """
+
+    with _response_memo_lock:
+        return ResponseMemoInfo(
+            _response_memo_stats["hits"],
+            _response_memo_stats["misses"],
+            RESPONSE_MEMO_SIZE,
+            len(_response_memo),
+        )
+
+
+def remember_response(query: str, response: dict) -> None:
+    """
+    Keeps a parsed API response in the memo, evicting the least recently used one when it is full.
+
+    Args:
+        query (str): Word the response belongs to.
+        response (dict): Parsed API response. It is shared by every caller, so it must not be modified.
+    """
+
+    with _response_memo_lock:
+        _response_memo[query] = response
+        _response_memo.move_to_end(query)
+        while len(_response_memo) > RESPONSE_MEMO_SIZE:
+            _response_memo.popitem(last=False)
+
+
+def invalidate_response(query: Optional[str] = None) -> None:
+    """
+    Drops a word from the response memo, or the whole memo if no word is given. Called whenever cache_words is rewritten.
+
+    Args:
+        query (str, optional): Word to drop. Defaults to None.
+    """
+
+    with _response_memo_lock:
+        if query is None:
+            _response_memo.clear()
+        else:
+            _response_memo.pop(query, None)
+
+
+# no tests for this function as it is not called anywhere in the command directly
+def cached_response(query: str) -> Optional[dict]:
+    """
+    Returns the parsed API response for the word without going to the network.
+
+    1. If the word is in the response memo, return it from there.
+    2. Otherwise read it from the cache_words table, record the hit there, parse it and keep it in the memo.
+    3. The hit_count of cache_words therefore counts loads into the process, not the lookups served by the memo.
+
+    Args:
+        query (str): Word to lookup.
+
+    Returns:
+        dict: Parsed API response, or None if the word is not cached.
+    """
+
+    with _response_memo_lock:
+        if (response := _response_memo.get(query)) is not None:
+            _response_memo.move_to_end(query)
+            _response_memo_stats["hits"] += 1
+            increment("dictionary_cache_total", {"result": "memo"})
+            return response
+        _response_memo_stats["misses"] += 1
+
+    conn = createConnection()
+    c = conn.cursor()
+    with span("Cache read"):
+        c.execute("SELECT api_response FROM cache_words WHERE word=?", (query,))
+        if not (row := c.fetchone()):
+            increment("dictionary_cache_total", {"result": "miss"})
+            return None
+        increment("dictionary_cache_total", {"result": "table"})
+
+        # remember the hit, refresh --only-accessed-since and the refresh order rely on it
+        c.execute(
+            "UPDATE cache_words SET last_accessed=?, hit_count=hit_count+1 WHERE word=?",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), query),
+        )
+        conn.commit()
+    with span("JSON parsing"):
+        response = json.loads(row[0])
+    remember_response(query, response)
+    return response
+
+
+# words per cache_words query of cached_responses, well below SQLite's limit on parameters
+CACHE_READ_BATCH = 500
+
+
+def cached_responses(words: Iterable[str]) -> Dict[str, dict]:
+    """
+    Returns the parsed API responses of many words at once, without going to the network.
+
+    1. Words in the response memo are taken from there.
+    2. The others are read from the cache_words table with one query per CACHE_READ_BATCH words, and their hits are recorded in one update.
+    3. Every response read from the table is kept in the memo, like cached_response does.
+
+    Args:
+        words (Iterable[str]): Words to lookup, repeats are read once.
+
+    Returns:
+        Dict[str, dict]: word -> parsed API response, for the words that are cached.
+    """
+
+    responses: Dict[str, dict] = {}
+    missing = []
+    with _response_memo_lock:
+        for word in dict.fromkeys(words):
+            if (response := _response_memo.get(word)) is not None:
+                _response_memo.move_to_end(word)
+                _response_memo_stats["hits"] += 1
+                responses[word] = response
+            else:
+                _response_memo_stats["misses"] += 1
+                missing.append(word)
+    if responses:
+        increment("dictionary_cache_total", {"result": "memo"}, len(responses))
+    if not missing:
+        return responses
+
+    conn = createConnection()
+    c = conn.cursor()
+    rows = []
+    with span("Cache read"):
+        for start in range(0, len(missing), CACHE_READ_BATCH):
+            batch = missing[start : start + CACHE_READ_BATCH]
+            c.execute(
+                f"SELECT word, api_response FROM cache_words WHERE word IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+            rows += c.fetchall()
+        if rows:
+            increment("dictionary_cache_total", {"result": "table"}, len(rows))
+        if len(rows) < len(missing):
+            increment("dictionary_cache_total", {"result": "miss"}, len(missing) - len(rows))
+
+        # remember the hits, refresh --only-accessed-since and the refresh order rely on them
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        c.executemany(
+            "UPDATE cache_words SET last_accessed=?, hit_count=hit_count+1 WHERE word=?",
+            [(now, word) for word, _ in rows],
+        )
+        conn.commit()
+    with span("JSON parsing"):
+        for word, api_response in rows:
+            responses[word] = json.loads(api_response)
+            remember_response(word, responses[word])
+    return responses
+
+
+# no tests for this function as it is not called anywhere in the command directly
+def store_response(conn, query: str, response: dict) -> dict:
+    """
+    Inserts a fresh API response into the cache_word table, if the word isn't already there, and into the response memo.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database.
+        query (str): Word the response belongs to.
+        response (dict): Parsed API response.
+
+    Returns:
+        dict: The response, for convenience.
+    """
+
+    api_response = json.dumps(response)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute(
+        "INSERT OR IGNORE INTO cache_words (word, api_response, fetched_at, last_accessed, content_hash) VALUES (?, ?, ?, ?, ?)",
+        (query, api_response, now, now, content_hash(api_response)),
+    )
+    conn.commit()
+    remember_response(query, response)
+    return response
+
+
+# no tests for this function as it is not called anywhere in the command directly
+def request_definition(query: str, timeout: Optional[float] = None):
+    """
+    Requests the word from the dictionary API and records the latency and the outcome in the metrics.
+
+    Args:
+        query (str): Word to lookup.
+        timeout (float, optional): Seconds before the request times out. Defaults to waiting as long as it takes.
+
+    Returns:
+        requests.Response: The response, whatever its status.
+
+    Raises:
+        RequestException: If the request failed before there was a response.
+    """
+
+    # requests is slow to import, a lookup answered from the cache doesn't need it
+    import requests
+
+    status = "error"
+    try:
+        with timer("api_request_duration"):
+            response = requests.get(
+                f"https://api.dictionaryapi.dev/api/v2/entries/en/{query}",
+                timeout=timeout,
+            )
+        status = response.status_code
+        return response
+    finally:
+        increment("api_requests_total", {"status": status})
+
+
 # no tests for this function as it is not called anywhere in the command directly
 def connect_to_api(query: str = "hello") -> str:
     """
     Connects to the API and returns the response in JSON format.
 
     1. Connect to the internet to check if the word is a valid word.
-    2. If the word is a valid word, then check if the word is already in the cache_word table. If the word is in the cache_word table, then return the response from the cache_word table.
-    3. If the word is not in the cache_word table, then connect to the API, get the response and then insert the word and its response into the cache_word table.
-    4. If the word is not a valid word, then print an error message.
+    2. If the word is a valid word, then check if the word is already in the response memo or the cache_word table. If it is, then return the cached response.
+    3. If the API rejected the word recently, print the error message with the stored spelling suggestions without going to the network.
+    4. If the word is not in the cache_word table, then connect to the API, get the response and then insert the word and its response into the cache_word table.
+    5. If the word is not a valid word, then print an error message and remember the word in the negative_cache table.
 
     Args:
         query (str, optional): Word to lookup to test the API. Defaults to "hello".
@@ -91,22 +443,24 @@ def connect_to_api(query: str = "hello") -> str:
         Timeout: If the request times out.
     """
 
-    try:
+    # if word exists in the memo or the cache_word table, return the cached response
+    if (response := cached_response(query)) is not None:
+        return response
+
+    conn = createConnection()
+    c = conn.cursor()
 
-        # sql query to check if word exists in the cache_word table
-        conn = createConnection()
-        c = conn.cursor()
-        c.execute("SELECT * FROM cache_words WHERE word=?", (query,))
+    # if the API rejected the word recently, don't ask again
+    if (suggestions := check_negative_cache(c, query)) is not None:
+        print_word_not_found(query, suggestions)
+        return
 
-        # if word exists in the cache_word table, return the response from the cache_word table
-        if c.fetchone():
-            c.execute("SELECT api_response FROM cache_words WHERE word=?", (query,))
-            return json.loads(c.fetchone()[0])
+    from requests import exceptions
 
+    try:
         # if word does not exist in the cache_word table, then connect to the API
-        response = requests.get(
-            f"https://api.dictionaryapi.dev/api/v2/entries/en/{query}"
-        )
+        with span("API request"):
+            response = request_definition(query)
         response.raise_for_status()
 
     except exceptions.ConnectionError as error:
@@ -120,42 +474,9 @@ def connect_to_api(query: str = "hello") -> str:
         )
 
     except exceptions.HTTPError as error:
-        from spellchecker import SpellChecker
-
-        spell = SpellChecker()
-        if mispelled := spell.unknown([query]):
-            # store other possible correct words
-            for x in mispelled:
-                if candidates := spell.candidates(x):
-                    candidates = ", ".join(candidates)
-                    print(
-                        Panel(
-                            title="[b reverse red]  Error!  [/b reverse red]",
-                            title_align="center",
-                            padding=(1, 1),
-                            renderable=f"The word {query} was not found. Did you mean [u blue]{candidates}[/u blue]? 🤔",
-                        )
-                    )
-                    break
-
-                else:
-                    print(
-                        Panel(
-                            title="[b reverse red]  Error!  [/b reverse red]",
-                            title_align="center",
-                            padding=(1, 1),
-                            renderable=f"The word [bold red]{query}[/bold red] is not a valid word. Please check the spelling. 🤔",
-                        )
-                    )
-        else:
-            print(
-                Panel(
-                    title="[b reverse red]  Error!  [/b reverse red]",
-                    title_align="center",
-                    padding=(1, 1),
-                    renderable=f"The word [bold red]{query}[/bold red] is not a valid word. Please check the spelling. 🤔",
-                )
-            )
+        # store other possible correct words along with the rejected word
+        suggestions = add_to_negative_cache(conn, query, error.response.status_code)
+        print_word_not_found(query, suggestions)
 
     except exceptions.Timeout as error:
         print(
@@ -169,26 +490,152 @@ def connect_to_api(query: str = "hello") -> str:
 
     else:
         if response.status_code == 200:
-            # insert the word and its response into the cache_word table if it isn't already there
-            c.execute("SELECT * FROM cache_words WHERE word=?", (query,))
-            if not c.fetchone():
-                c.execute(
-                    "INSERT INTO cache_words (word, api_response) VALUES (?, ?)",
-                    (query, json.dumps(response.json()[0])),
-                )
-                conn.commit()
-
             # return the response from the API
-            return response.json()[0]
+            return store_response(conn, query, response.json()[0])
+
+
+# lookups `define` runs at the same time, and how many words it reads ahead of the one being printed
+DEFINE_WORKERS = 8
+DEFINE_READ_AHEAD = 4 * DEFINE_WORKERS
 
 
 # no tests for this function as it is not called anywhere in the command directly
-def phonetic(query: str) -> str:
+def prefetch_response(query: str, limiter: RateLimiter) -> None:
+    """
+    Looks up a word without printing anything, so that it is cached by the time it is printed.
+
+    1. If the word is cached or the API rejected it recently, there is nothing to do.
+    2. Otherwise ask the API, waiting for a slot of the shared rate limiter first.
+    3. A valid word goes into the cache_word table and the response memo, a rejected word into the negative_cache table.
+    4. Any other failure is left alone, connect_to_api runs into it again and reports it when the word is printed.
+
+    Args:
+        query (str): Word to lookup.
+        limiter (RateLimiter): Rate limiter shared by all lookups.
+    """
+
+    if cached_response(query) is not None:
+        return
+
+    conn = createConnection()
+    if check_negative_cache(conn.cursor(), query) is not None:
+        return
+
+    from requests import exceptions
+
+    limiter.acquire()
+    try:
+        # runs on a worker thread, so it is listed on its own and not under the command
+        with span("API request (prefetch)"):
+            response = request_definition(query, timeout=REFRESH_TIMEOUT)
+        response.raise_for_status()
+    except exceptions.HTTPError as error:
+        add_to_negative_cache(conn, query, error.response.status_code)
+    except exceptions.RequestException:
+        return
+    else:
+        store_response(conn, query, response.json()[0])
+
+
+def read_words(words: Iterable[str], file: Optional[TextIO] = None) -> Iterator[str]:
+    """
+    Yields the words to lookup, one at a time.
+
+    1. A word given as "-" stands for the words read from the standard input.
+    2. Words in `file` come after the ones given directly.
+    3. Words read from a stream are separated by whitespace, so one word per line and plain text both work.
+
+    Args:
+        words (Iterable[str]): Words given on the command line.
+        file (TextIO, optional): File to read more words from. Defaults to None.
+
+    Yields:
+        str: Word to lookup.
+    """
+
+    for word in words:
+        if word == "-":
+            for line in sys.stdin:
+                yield from line.split()
+        else:
+            yield word
+
+    if file is not None:
+        for line in file:
+            yield from line.split()
+
+
+def prefetch_words(
+    words: Iterable[str],
+    workers: int = DEFINE_WORKERS,
+    rate: float = REFRESH_RATE_LIMIT,
+) -> Iterator[str]:
+    """
+    Looks up the words concurrently and yields them back in input order, each one as soon as it is cached.
+
+    1. Words are read lazily from `words`, at most DEFINE_READ_AHEAD ahead of the oldest word not yielded yet, so a long list or a pipe is never held in memory.
+    2. Each word is looked up by prefetch_response on a pool of `workers` threads, limited to `rate` API requests per second.
+    3. A word repeated while it is still being looked up shares the pending lookup, a word repeated later is found in the cache. Either way it is fetched once.
+    4. Every word is yielded, repeats included, so that each one is printed and logged as a lookup.
+
+    Args:
+        words (Iterable[str]): Words to lookup.
+        workers (int, optional): Number of concurrent lookups. Defaults to DEFINE_WORKERS.
+        rate (float, optional): API requests per second across all workers. Defaults to REFRESH_RATE_LIMIT.
+
+    Yields:
+        str: Lowercased word, once its lookup finished.
+    """
+
+    limiter = RateLimiter(rate)
+    pending: Deque[Tuple[str, Future]] = deque()
+    lookups: Dict[str, Future] = {}
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for word in words:
+            word = word.lower()
+            if word not in lookups:
+                lookups[word] = executor.submit(prefetch_response, word, limiter)
+            pending.append((word, lookups[word]))
+
+            # print whatever is ready, wait only when reading further ahead would exceed the limit
+            while pending and (
+                pending[0][1].done() or len(pending) >= DEFINE_READ_AHEAD
+            ):
+                yield finish_lookup(pending, lookups)
+
+        while pending:
+            yield finish_lookup(pending, lookups)
+
+
+def finish_lookup(pending: Deque[Tuple[str, Future]], lookups: Dict[str, Future]) -> str:
+    """
+    Waits for the oldest pending lookup of prefetch_words and returns its word.
+
+    Args:
+        pending (Deque[Tuple[str, Future]]): Words waiting to be yielded, in input order, with their lookups.
+        lookups (Dict[str, Future]): Lookup of every word in `pending`, shared by its repeats.
+
+    Returns:
+        str: The word whose lookup finished.
+    """
+
+    word, future = pending.popleft()
+    with span("Waiting for lookups"):
+        future.result()
+    # forget the lookup once no repeat of the word is waiting for it anymore
+    if all(waiting != word for waiting, _ in pending):
+        del lookups[word]
+    return word
+
+
+# no tests for this function as it is not called anywhere in the command directly
+def phonetic(query: str, response: Optional[dict] = None) -> str:
     """
     Prints the phonetic of the word.
 
     1. It takes the query as an argument.
-    2. It connects to the API and retrieves the response.
+    2. It connects to the API and retrieves the response, unless the response is given.
     3. If the word is not found in the dictionary, it prints the message.
     4. If the word is found, it loops through the phonetics.
     5. If the phonetic is available, it returns it.
@@ -196,13 +643,14 @@ def phonetic(query: str) -> str:
 
     Args:
         query (str): Word for which phonetic is to be printed.
+        response (dict, optional): Parsed API response of the word. Defaults to looking it up.
 
     Returns:
         string: Phonetic of the word.
     """
 
     # Connect to the API and retrieve the response
-    if not (response := connect_to_api(query)):
+    if response is None and not (response := connect_to_api(query)):
         return
     # If the word is not found in the dictionary
     if len(response["phonetics"]) == 0:
@@ -234,24 +682,34 @@ def insert_word_to_db(query: str) -> None:
     """
 
     # check if word definitions exists. If yes, add to database otherwise do not do anything. Don't even print anything.
-    try:
-        # sql query to check if word exists in the cache_word table
-        conn = createConnection()
-        c = conn.cursor()
-        c.execute("SELECT * FROM cache_words WHERE word=?", (query,))
-
-        # if word exists in the cache_word table, return the response from the cache_word table
-        if c.fetchone():
-            conn = createConnection()
-            time.sleep(1)
-            insert_to_db_util(conn, query)
-            return
-        response = requests.get(
-            f"https://api.dictionaryapi.dev/api/v2/entries/en/{query}"
+    conn = createConnection()
+    c = conn.cursor()
+
+    # if word exists in the memo or the cache_word table, it is a valid word
+    if cached_response(query) is not None:
+        insert_to_db_util(conn, query)
+        return
+
+    # if the API rejected the word recently, don't ask again
+    if check_negative_cache(c, query) is not None:
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable=f"The word [bold red]{query}[/bold red] is not a valid word. Please check the spelling. ❌",
+            )
         )
+        return
+
+    from requests import exceptions
+
+    try:
+        response = request_definition(query)
         response.raise_for_status()
 
     except exceptions.HTTPError as error:
+        add_to_negative_cache(conn, query, error.response.status_code)
         print(
             Panel(
                 title="[b reverse red]  Error!  [/b reverse red]",
@@ -264,7 +722,6 @@ def insert_word_to_db(query: str) -> None:
 
     else:
         if response.status_code == 200:
-            conn = createConnection()
             insert_to_db_util(conn, query)
 
 
@@ -273,11 +730,9 @@ def insert_to_db_util(conn, query: str) -> None:
     """
     Inserts the word into the database.
 
-    1. If the word exists in the database, with a tag, then insert it with that tag.
-    2. If the word exists in the database, without a tag, then insert it without a tag.
-    3. If the word exists in the database, with favorite 1, then insert it with favorite 1.
-    4. If the word exists in the database, with learning 1, then insert it with learning 1.
-    5. If the word exists in the database, with mastered 1, then insert it with mastered 1.
+    1. A lookup is a single row appended to the words table.
+    2. The tag, favorite, learning and mastered status live in the word_state table, one row per word, so they are kept as they are.
+    3. A word looked up for the first time gets its word_state row from a trigger on the words table.
 
     Args:
         conn (sqlite3.Connection): Connection to the database.
@@ -285,54 +740,20 @@ def insert_to_db_util(conn, query: str) -> None:
     """
 
     c = conn.cursor()
-
-    c.execute("SELECT * FROM words WHERE word=? and tag is not NULL", (query,))
-    # if word is already tagged previously, insert it with the same tag
-    if c.fetchone():
-        c.execute("SELECT tag FROM words WHERE word=?", (query,))
-        tagName = c.fetchone()[0]
-        c.execute(
-            "INSERT INTO words (word, datetime, tag) VALUES (?, ?, ?)",
-            (query, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), tagName),
-        )
-    # if word is not tagged, insert it with no tag
-    else:
-        c.execute(
-            "INSERT INTO words (word, datetime) VALUES (?, ?)",
-            (query, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-        )
+    c.execute(
+        "INSERT INTO words (word, datetime) VALUES (?, ?)",
+        (query, datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")),
+    )
     conn.commit()
 
-    # if word already exists in the database with favorite 1, then update the above inserted record with favorite 1
-    c.execute("SELECT favorite FROM words WHERE word=? and favorite=1", (query,))
-    if c.fetchone():
-        c.execute("UPDATE words SET favorite=1 WHERE word=?", (query,))
-        conn.commit()
-
-    # if word already exists in the database with learning 1, then update the above inserted record with learning 1
-    c.execute("SELECT learning FROM words WHERE word=? and learning=1", (query,))
-    if c.fetchone():
-        c.execute("UPDATE words SET learning=1 WHERE word=?", (query,))
-        conn.commit()
-
-    # if word already exists in the database with mastered 1, then update the above inserted record with mastered
-    c.execute("SELECT mastered FROM words WHERE word=? and mastered=1", (query,))
-    if c.fetchone():
-        c.execute("UPDATE words SET mastered=1 WHERE word=?", (query,))
-        conn.commit()
-
 
 def definition(query: str, short: Optional[bool] = False) -> None:
     """
     Prints the definition of the word.
 
     1. The function definition first calls the function connect_to_api which takes query (str) as argument and returns the response (dict) if successful or None if unsuccessful.
-    2. The function definition then calls the function phonetic which takes query (str) as argument and returns the phonetic (str) of the word.
-    3. The function definition then calls the function insert_word_to_db which takes query (str) as argument and inserts the word into the database.
-    4. If the short is set to True, the function definition then iterates over the meanings (dict) and prints the first definition (str) of the word.
-    5. If the short is set to False, the function definition then calls the function display_theme which takes query (str) as argument and displays the theme (str) associated with the word.
-    6. The function definition then calls the function show_commonly_confused which takes query (str) as argument and displays the commonly confused words (str) of the word.
-    7. The function definition then iterates over the meanings (dict) and prints the definition (str) and example (str) of the word.
+    2. The function definition then calls the function insert_word_to_db which takes query (str) as argument and inserts the word into the database.
+    3. The function definition then calls the function render_definition which prints the word, its phonetic and its meanings.
 
     Args:
         query (str): Word which is meant to be defined.
@@ -340,7 +761,7 @@ def definition(query: str, short: Optional[bool] = False) -> None:
     """
     query = query.lower()
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Searching..."), Progress(
         SpinnerColumn(spinner_name="moon", style="bold violet"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -355,52 +776,71 @@ def definition(query: str, short: Optional[bool] = False) -> None:
         if not (response := connect_to_api(query)):
             return
 
-        # print(response)
-        print(Panel(f"[bold gold1]{query.upper()}[/bold gold1]\n{phonetic(query)}"))
+        # insert search word into DB
+        with span("Saving lookup"):
+            insert_word_to_db(query)
 
-        # ----------------- Table -----------------#
+        render_definition(query, response, short)
 
-        table = Table(show_header=True, header_style="bold bright_cyan")
-        table.add_column("Part of Speech", style="cyan", width=15)
-        table.add_column("Definition", style="light_green")
 
-        # insert search word into DB
-        insert_word_to_db(query)
+def render_definition(query: str, response: dict, short: Optional[bool] = False) -> None:
+    """
+    Prints the word, its phonetic and its meanings from an API response, without looking anything up or logging a lookup.
+
+    1. Print the word and its phonetic.
+    2. If short is set to True, print the first definition of every part of speech.
+    3. If short is set to False, print the theme and the commonly confused words of the word, then every definition and example.
+
+    Args:
+        query (str): Word which is meant to be defined.
+        response (dict): Parsed API response of the word.
+        short (Optional[bool], optional): If True, it will print just the short definition. Defaults to False.
+    """
+
+    print(Panel(f"[bold gold1]{query.upper()}[/bold gold1]\n{phonetic(query, response)}"))
 
-        if short:
-            for meaningNumber in response["meanings"]:
-                for meaning in meaningNumber["definitions"][:1]:
-                    table.add_row(meaningNumber["partOfSpeech"], meaning["definition"])
-                table.add_section()
+    # ----------------- Table -----------------#
+
+    table = Table(show_header=True, header_style="bold bright_cyan")
+    table.add_column("Part of Speech", style="cyan", width=15)
+    table.add_column("Definition", style="light_green")
+
+    if short:
+        for meaningNumber in response["meanings"]:
+            for meaning in meaningNumber["definitions"][:1]:
+                table.add_row(meaningNumber["partOfSpeech"], meaning["definition"])
+            table.add_section()
+        with span("Rendering"):
             print(table)
 
-        if not short:
-            # shows the associated collection for the word
-            display_theme(query)
-            show_commonly_confused(query)
-
-            for meaningNumber in response["meanings"]:
-                for count, meaning in enumerate(meaningNumber["definitions"], start=1):
-
-                    # if example available
-                    if "example" in meaning:
-                        table.add_row(
-                            f"\n{meaningNumber['partOfSpeech']}",
-                            f"\n{count}. {meaning['definition']}\n[bold white u]Example:[/bold white u] [i white]{meaning['example']}[/i white]\n",
-                        )
-
-                    # if example not available
-                    else:
-                        table.add_row(
-                            f"\n{meaningNumber['partOfSpeech']}",
-                            f"\n{count}. {meaning['definition']}\n",
-                        )
-                table.add_section()
+    if not short:
+        # shows the associated collection for the word
+        display_theme(query)
+        show_commonly_confused(query)
+
+        for meaningNumber in response["meanings"]:
+            for count, meaning in enumerate(meaningNumber["definitions"], start=1):
+
+                # if example available
+                if "example" in meaning:
+                    table.add_row(
+                        f"\n{meaningNumber['partOfSpeech']}",
+                        f"\n{count}. {meaning['definition']}\n[bold white u]Example:[/bold white u] [i white]{meaning['example']}[/i white]\n",
+                    )
+
+                # if example not available
+                else:
+                    table.add_row(
+                        f"\n{meaningNumber['partOfSpeech']}",
+                        f"\n{count}. {meaning['definition']}\n",
+                    )
+            table.add_section()
+        with span("Rendering"):
             print(table)
 
-            # ----------------- Table -----------------#
+        # ----------------- Table -----------------#
 
-            print("\n")
+        print("\n")
 
 
 def one_line_definition(query: str) -> str:
@@ -414,6 +854,20 @@ def one_line_definition(query: str) -> str:
     if not (response := connect_to_api(query)):
         return
 
+    return first_definition(response)
+
+
+def first_definition(response: dict) -> Optional[str]:
+    """
+    Returns the first definition of the first meaning in an API response.
+
+    Args:
+        response (dict): Parsed API response of the word.
+
+    Returns:
+        str: The definition, None if the response has none.
+    """
+
     for meaningNumber in response["meanings"]:
         for meaning in meaningNumber["definitions"][:1]:
             return meaning["definition"]
@@ -455,8 +909,12 @@ def say_aloud(query: str) -> None:
         if audioURL in [None, ""]:
             raise AudioUnavailableException
 
+        import requests
+
         audio = requests.get(audioURL, allow_redirects=True)
         open(f"{query}.mp3", "wb").write(audio.content)
+        from playsound import playsound
+
         playsound(os.path.join(Path().cwd(), f"{query}.mp3"))
         print(Panel("[bold green]Audio played[/bold green] 🎧"))
         os.remove(f"{query}.mp3") if os.path.exists(f"{query}.mp3") else None
@@ -474,6 +932,8 @@ def get_word_of_the_day() -> None:
     3. Get the word from the response
     4. Print the word & definition of the word of the day"""
 
+    import requests
+
     WORDNIK_API_KEY = os.getenv("WORDNIK_API_KEY")
     response = requests.get(
         f"https://api.wordnik.com/v4/words.json/wordOfTheDay?api_key={WORDNIK_API_KEY}"
@@ -117,6 +117,42 @@ class NotEnoughWordsForQuizException(Exception):
         )
 
 
+class NoWordsDueException(Exception):
+    """raised when the user attempts to review the words that are due but none of them are due yet."""
+
+    next_due = None
+
+    def __init__(self, next_due=None):
+        self.next_due = next_due
+        when = (
+            f"The next one is due on [bold blue]{next_due:%d %b '%y | %H:%M}[/bold blue]. ⏰"
+            if next_due
+            else "Add some words in your list using 'define' command first. 🔎"
+        )
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable=f"No words are due for review. {when}",
+            )
+        )
+
+
+class NoQuizAnswersException(Exception):
+    """raised when the user attempts to take a quiz on their weakest words but no quiz was answered yet."""
+
+    def __init__(self):
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable="No quiz answers yet. Take a quiz using 'quiz' command first to find your weakest words. ❓",
+            )
+        )
+
+
 class NoSuchCollectionException(Exception):
     """raised when the user attempts to perform some operation on a collection which is not present in the list."""
 
@@ -177,3 +213,18 @@ class NoRSSFeedsException(Exception):
                 renderable="[bold red]No feeds added yet[/bold red]. Use [bold blue]rss[/bold blue] command to add a feed. ➕",
             )
         )
+
+
+class InvalidLoadRuleException(Exception):
+    """raised when a line of a load testing rules file can't be understood."""
+
+    def __init__(self, line_number: int, line: str, reason: str):
+        self.line_number = line_number
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable=f"Rule on line [bold red]{line_number}[/bold red] is invalid: {reason}\n[i]{line}[/i] ❌",
+            )
+        )
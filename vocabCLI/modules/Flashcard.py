@@ -1,4 +1,3 @@
-import json
 import random
 import textwrap
 
@@ -13,13 +12,12 @@ def flashcard_definition(query: str) -> str:
     """
     Returns the definition of the word from the cache.
 
-    1. Execute a query that selects the api_response column from the cache_words table where the word column is equal to the query
-    2. Load the api_response column as a JSON object
-    3. Create an empty dictionary
-    4. Loop through each meaning in the meanings array
-    5. For each meaning, loop through the first 3 definitions
-    6. For each definition, add it to the dictionary with the key being the definition and the value being the example if it exists
-    7. Return the first 3 definitions and examples
+    1. Get the parsed api_response of the word from the response memo, or from the cache_words table if it is not there
+    2. Create an empty dictionary
+    3. Loop through each meaning in the meanings array
+    4. For each meaning, loop through the first 3 definitions
+    5. For each definition, add it to the dictionary with the key being the definition and the value being the example if it exists
+    6. Return the first 3 definitions and examples
 
     Args:
         query (str): The word to be searched
@@ -28,12 +26,7 @@ def flashcard_definition(query: str) -> str:
         str: The definition of the word
     """
 
-    conn = createConnection()
-    c = conn.cursor()
-    c.execute("SELECT api_response FROM cache_words WHERE word=?", (query,))
-
-    response = c.fetchone()[0]
-    response = json.loads(response)
+    response = cached_response(query)
 
     defs_and_examples = {}
 
@@ -266,7 +259,7 @@ def generate_all_flashcards():
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("SELECT DISTINCT(word) FROM words")
+    c.execute("SELECT word FROM word_state")
     export_util(c, type="all words")
 
 
@@ -275,7 +268,7 @@ def generate_mastered_flashcards():
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("SELECT DISTINCT(word) FROM words WHERE mastered=1")
+    c.execute("SELECT word FROM word_state WHERE mastered=1")
     export_util(c, type="mastered")
 
 
@@ -284,7 +277,7 @@ def generate_learning_flashcards():
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("SELECT DISTINCT(word) FROM words WHERE learning=1")
+    c.execute("SELECT word FROM word_state WHERE learning=1")
     export_util(c, type="learning")
 
 
@@ -293,7 +286,7 @@ def generate_favorite_flashcards():
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("SELECT DISTINCT(word) FROM words WHERE favorite=1")
+    c.execute("SELECT word FROM word_state WHERE favorite=1")
     export_util(c, type="favorite")
 
 
@@ -307,12 +300,12 @@ def generate_tag_flashcards(query: str):
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("SELECT DISTINCT(word), tag FROM words WHERE tag=?", (query,))
+    c.execute("SELECT word, tag FROM word_state WHERE tag=?", (query,))
     export_util(c, type="tag")
 
 
 # def export_word(query: str):
 #     conn = createConnection()
 #     c = conn.cursor()
-#     c.execute("SELECT DISTINCT(word) FROM words WHERE word=?", (query,))
+#     c.execute("SELECT word FROM word_state WHERE word=?", (query,))
 #     export_util(c, type="word")
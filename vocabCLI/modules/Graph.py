@@ -2,7 +2,6 @@ import calendar
 import glob
 import os
 from datetime import datetime
-from tkinter import *
 
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
@@ -10,7 +9,6 @@ import numpy as np
 import pandas as pd
 import seaborn as sns
 from Database import *
-from PIL import Image, ImageTk
 from rich.panel import Panel
 
 ################################
@@ -40,7 +38,7 @@ def viz_top_words_bar(N: int = 10, popup: bool = False) -> None:
     conn = createConnection()
     c = conn.cursor()
     c.execute(
-        "SELECT word, COUNT(*) FROM words GROUP BY word ORDER BY COUNT(*) DESC LIMIT ?",
+        "SELECT word, lookups FROM word_lookups ORDER BY lookups DESC, word LIMIT ?",
         (N,),
     )
     rows = c.fetchall()
@@ -163,7 +161,7 @@ def viz_top_tags_bar(N: int = 10, popup: bool = False) -> None:
     conn = createConnection()
     c = conn.cursor()
     c.execute(
-        "SELECT tag, COUNT(*) FROM words WHERE tag is NOT NULL GROUP BY tag ORDER BY COUNT(*) DESC LIMIT ?",
+        "SELECT tag, COUNT(*) FROM word_state WHERE tag is NOT NULL GROUP BY tag ORDER BY COUNT(*) DESC LIMIT ?",
         (N,),
     )
     rows = c.fetchall()
@@ -280,7 +278,7 @@ def viz_top_words_pie(N: int = 10, popup: bool = False) -> None:
     conn = createConnection()
     c = conn.cursor()
     c.execute(
-        "SELECT word, COUNT(*) FROM words GROUP BY word ORDER BY COUNT(*) DESC LIMIT ?",
+        "SELECT word, lookups FROM word_lookups ORDER BY lookups DESC, word LIMIT ?",
         (N,),
     )
     rows = c.fetchall()
@@ -373,7 +371,7 @@ def viz_top_tags_pie(N: int = 10, popup: bool = False) -> None:
     conn = createConnection()
     c = conn.cursor()
     c.execute(
-        "SELECT tag, COUNT(*) FROM words WHERE tag is NOT NULL GROUP BY tag ORDER BY COUNT(*) DESC LIMIT ?",
+        "SELECT tag, COUNT(*) FROM word_state WHERE tag is NOT NULL GROUP BY tag ORDER BY COUNT(*) DESC LIMIT ?",
         (N,),
     )
     rows = c.fetchall()
@@ -478,9 +476,10 @@ def words_distribution_week_util() -> tuple[list, list]:
     days_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
     word_count = [0, 0, 0, 0, 0, 0, 0]
 
-    # get word count for each day in current week
+    # get word count for each day in current week, every weekday once
     c.execute(
-        "select strftime('%d/%m/%Y', datetime) as date, count(word) from words WHERE datetime>=datetime('now', '-7 days') GROUP BY date"
+        "select strftime('%d/%m/%Y', day), lookups from daily_lookups WHERE day>date(?, '-7 days')",
+        (datetime.now().strftime("%Y-%m-%d"),),
     )
 
     rows = c.fetchall()
@@ -625,7 +624,8 @@ def word_distribution_month_util() -> tuple[list, list]:
 
     # get word count for each day in current month
     c.execute(
-        "select strftime('%d', datetime) as date, count(word) as word_count from words WHERE date(datetime)>=date('now', 'start of month') GROUP BY date"
+        "select strftime('%d', day), lookups from daily_lookups WHERE day>=date(?, 'start of month')",
+        (datetime.now().strftime("%Y-%m-%d"),),
     )
     rows = c.fetchall()
     for row in rows:
@@ -744,10 +744,10 @@ def viz_learning_vs_mastered(popup: bool = False) -> None:
     conn = createConnection()
     c = conn.cursor()
 
-    c.execute("select count(DISTINCT word) from words WHERE learning = 1")
+    c.execute("select count(*) from word_state WHERE learning = 1")
     learning_count = c.fetchone()[0]
 
-    c.execute("select count(DISTINCT word) from words WHERE mastered = 1")
+    c.execute("select count(*) from word_state WHERE mastered = 1")
     mastered_count = c.fetchone()[0]
 
     # set plot style: grey grid in the background:
@@ -823,13 +823,13 @@ def viz_word_distribution_category(popup: bool = False) -> None:
     conn = createConnection()
     c = conn.cursor()
 
-    # inner join the words and collections table to get the word count from each category
+    # inner join the word_state and collections table to get the word count from each category
     c.execute(
-        "select collections.collection ,COUNT(DISTINCT words.word)from words inner join collections on words.word=collections.word GROUP BY collections.collection ORDER BY COUNT(DISTINCT words.word) DESC"
+        "select collections.collection ,COUNT(DISTINCT word_state.word)from word_state inner join collections on word_state.word=collections.word GROUP BY collections.collection ORDER BY COUNT(DISTINCT word_state.word) DESC"
     )
 
     # To get the actual words themselves based on their category uncomment this
-    # c.execute("select DISTINCT words.word, collections.collection from words inner join collections on words.word=collections.word")
+    # c.execute("select DISTINCT word_state.word, collections.collection from word_state inner join collections on word_state.word=collections.word")
 
     rows = c.fetchall()
     category = [row[0] for row in rows]
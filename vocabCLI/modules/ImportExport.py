@@ -38,7 +38,10 @@ def export_to_csv() -> None:
     # =========================#
 
     try:
-        c.execute("SELECT * FROM words")
+        # every lookup is exported along with the current state of its word
+        c.execute(
+            "SELECT words.word, words.datetime, tag, mastered, learning, favorite FROM words JOIN word_state ON words.word=word_state.word ORDER BY words.rowid"
+        )
         words = c.fetchall()
         if len(words) <= 0:
             raise NoDataFoundException
@@ -200,7 +203,7 @@ def import_from_csv() -> None:
     # count of words added to database from the csv file
     added_words = 0
 
-    # words that already exists in database (counter will be incremented every time SQL throws an error about datetime column UNIQUE constraint violation)
+    # words that already exists in database (counter will be incremented every time SQL throws an error about the word and datetime UNIQUE constraint violation)
     word_already_exists = 0
 
     try:
@@ -222,16 +225,19 @@ def import_from_csv() -> None:
                 # ----------------- Progress Bar -----------------#
 
                 try:
-                    # if tag is empty, skip the tag column in db
-                    if row[2] == "":
-                        sql = "INSERT INTO words (word, datetime, mastered, learning, favorite) VALUES (?, ?, ?, ?, ?)"
-                        c.execute(sql, (row[0], row[1], row[3], row[4], row[5]))
-                    else:
-                        # add a checker to see if the word already exists in the database with the same timestamp
-                        sql = "INSERT INTO words (word, datetime, tag, mastered, learning, favorite) VALUES (?,?,?,?,?,?)"
-                        c.execute(sql, row)
-                    conn.commit()
+                    # the lookup goes to the words table, the word and datetime UNIQUE constraint rejects duplicates
+                    c.execute(
+                        "INSERT INTO words (word, datetime) VALUES (?, ?)",
+                        (row[0], row[1]),
+                    )
                     added_words += c.rowcount
+
+                    # the status goes to the word_state row created by the insert, if tag is empty keep the current tag
+                    c.execute(
+                        "UPDATE word_state SET tag=COALESCE(NULLIF(?, ''), tag), mastered=?, learning=?, favorite=? WHERE word=?",
+                        (row[2], row[3], row[4], row[5], row[0]),
+                    )
+                    conn.commit()
                 except Exception as e:
                     word_already_exists += 1
 
@@ -514,7 +520,7 @@ def export_to_pdf() -> None:  # sourcery skip: extract-method
         conn = createConnection()
         c = conn.cursor()
         c.execute(
-            "SELECT DISTINCT (word), tag, mastered, learning, favorite from words"
+            "SELECT word, tag, mastered, learning, favorite from word_state"
         )
         rows = c.fetchall()
         if len(rows) <= 0:
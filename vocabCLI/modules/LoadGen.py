@@ -0,0 +1,405 @@
+import contextlib
+import itertools
+import random
+import re
+import string
+import time
+from datetime import datetime, timedelta
+from typing import *
+
+import typer
+from Database import *
+from Exceptions import *
+from rich import print
+from rich.panel import Panel
+from rich.table import Table
+
+# the statuses a rule can give, everything else on the left of -> is a tag
+STATUSES = {"learning", "mastered", "favorite"}
+
+# a rule with this on the left gives its words no status and no tag
+NO_STATUS = "all statuses clear"
+
+
+class LoadRule(NamedTuple):
+    """One line of a rules file: which first letters get which statuses and tag, and how many words."""
+
+    letters: str
+    tag: Optional[str]
+    learning: bool
+    mastered: bool
+    favorite: bool
+    count: Optional[int]
+
+
+def parse_letters(text: str) -> Optional[str]:
+    """
+    Reads the first letters of a rule, like "a to c", "m and n" or "h".
+
+    Args:
+        text (str): Right side of the rule, without the word count.
+
+    Returns:
+        str: The letters in order, or None if the text isn't a list of letters.
+    """
+
+    letters = ""
+    for part in re.split(r"\s*(?:,|\band\b)\s*", text.strip().lower()):
+        if match := re.fullmatch(r"([a-z])\s+to\s+([a-z])", part):
+            first, last = match.groups()
+            if first > last:
+                return None
+            letters += string.ascii_lowercase[
+                string.ascii_lowercase.index(first) : string.ascii_lowercase.index(last) + 1
+            ]
+        elif re.fullmatch(r"[a-z]", part):
+            letters += part
+        else:
+            return None
+    return "".join(dict.fromkeys(letters))
+
+
+def parse_rules(path: str) -> List[LoadRule]:
+    """
+    Reads a load testing rules file like modules/_load_testing_rules.txt.
+
+    1. Every non empty line is one rule: statuses and a tag joined by +, then ->, then the first letters of the words the rule makes. The two sides may be swapped.
+    2. "ONLY" is optional and ignored, "all statuses clear" makes words without status. "= 200" at the end of the line asks for that many words.
+    3. A word can't be learning and mastered at the same time, like in the app.
+
+    Args:
+        path (str): Path of the rules file.
+
+    Raises:
+        InvalidLoadRuleException: If a line can't be understood.
+
+    Returns:
+        List[LoadRule]: The rules, in the order of the file.
+    """
+
+    rules = []
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            if line.count("->") != 1:
+                raise InvalidLoadRuleException(
+                    line_number,
+                    line.strip(),
+                    "expected exactly one ->",
+                )
+            rule = line.strip()
+
+            count = None
+            if "=" in rule:
+                rule, count = rule.rsplit("=", 1)
+                if not count.strip().isdigit() or int(count) < 1:
+                    raise InvalidLoadRuleException(
+                        line_number,
+                        line.strip(),
+                        "the word count must be a positive number",
+                    )
+                count = int(count)
+
+            # the letters are usually on the right, like "learning ONLY -> a to b", but may be on the left
+            states, targets = rule.split("->")
+            if not parse_letters(targets) and parse_letters(states):
+                states, targets = targets, states
+            if not (letters := parse_letters(targets)):
+                raise InvalidLoadRuleException(
+                    line_number,
+                    line.strip(),
+                    "expected letters like 'a', 'a to c' or 'a and b' on one side of ->",
+                )
+
+            tag, flags = None, set()
+            for state in states.split("+"):
+                state = re.sub(r"\bonly\b", "", state, flags=re.IGNORECASE).strip().lower()
+                if state == NO_STATUS:
+                    continue
+                if state in STATUSES:
+                    flags.add(state)
+                elif not state or " " in state or tag is not None:
+                    raise InvalidLoadRuleException(
+                        line_number,
+                        line.strip(),
+                        f"'{state}' is neither a status nor a single tag",
+                    )
+                else:
+                    tag = state
+            if {"learning", "mastered"} <= flags:
+                raise InvalidLoadRuleException(
+                    line_number,
+                    line.strip(),
+                    "a word can't be learning and mastered at the same time",
+                )
+
+            rules.append(
+                LoadRule(
+                    letters=letters,
+                    tag=tag,
+                    learning="learning" in flags,
+                    mastered="mastered" in flags,
+                    favorite="favorite" in flags,
+                    count=count,
+                )
+            )
+    return rules
+
+
+def parse_date_range(text: str) -> Tuple[datetime, datetime]:
+    """
+    Reads a date range like 2023-01-01:2023-03-31, both days included.
+
+    Args:
+        text (str): The range.
+
+    Raises:
+        typer.BadParameter: If the range can't be read or ends before it starts.
+
+    Returns:
+        datetime: Start of the first day.
+        datetime: End of the last day, or now if the last day is today.
+    """
+
+    try:
+        start, end = (datetime.strptime(day, "%Y-%m-%d") for day in text.split(":"))
+    except ValueError as e:
+        raise typer.BadParameter(f"'{text}' is not like YYYY-MM-DD:YYYY-MM-DD") from e
+    if end < start:
+        raise typer.BadParameter(f"'{text}' ends before it starts")
+    return start, min(end + timedelta(days=1), datetime.now().replace(microsecond=0))
+
+
+def word_name(letter: str, number: int) -> str:
+    """
+    Returns a made up word that starts with the letter. Every number gives a different word.
+
+    Args:
+        letter (str): First letter.
+        number (int): Number of the word.
+
+    Returns:
+        str: The word, only letters so that it looks like a word to the rest of the app.
+    """
+
+    suffix = ""
+    while True:
+        number, digit = divmod(number, 26)
+        suffix = string.ascii_lowercase[digit] + suffix
+        if not number and len(suffix) >= 3:
+            break
+    return f"{letter}load{suffix}"
+
+
+def generate_words(rules: List[LoadRule], words: int) -> List[List[tuple]]:
+    """
+    Makes the words of every rule.
+
+    1. A rule with a word count makes that many words, the other rules share the remaining words evenly.
+    2. The words of a rule take turns over its letters.
+
+    Args:
+        rules (List[LoadRule]): The rules.
+        words (int): Number of words asked for, the word counts of the rules win over it.
+
+    Returns:
+        List[List[tuple]]: For every rule, (word, tag, mastered, learning, favorite) rows for word_state.
+    """
+
+    fixed = sum(rule.count for rule in rules if rule.count)
+    shared = sum(1 for rule in rules if not rule.count)
+    share, extra = divmod(max(words - fixed, shared), shared or 1)
+
+    rows, number = [], 0
+    for rule in rules:
+        if rule.count:
+            count = rule.count
+        else:
+            count, extra = share + (extra > 0), extra - 1
+        rows.append(
+            [
+                (
+                    word_name(rule.letters[index % len(rule.letters)], number + index),
+                    rule.tag,
+                    int(rule.mastered),
+                    int(rule.learning),
+                    int(rule.favorite),
+                )
+                for index in range(count)
+            ]
+        )
+        number += count
+    return rows
+
+
+def lookup_times(
+    rng: random.Random, lookups: int, ranges: List[Tuple[datetime, datetime]]
+) -> List[str]:
+    """
+    Spreads distinct lookup times over the date ranges, evenly by duration.
+
+    1. Draw distinct seconds out of all the seconds the ranges cover, in order.
+    2. Turn every second into a timestamp from a precomputed date and time of day, formatting a million datetimes would take longer than inserting them.
+
+    Args:
+        rng (random.Random): Seeded random generator.
+        lookups (int): Number of lookup times.
+        ranges (List[Tuple[datetime, datetime]]): (start, end) of every range.
+
+    Raises:
+        typer.BadParameter: If the ranges don't have a second for every lookup.
+
+    Returns:
+        List[str]: The lookup times in the format of the words table, oldest first unless ranges overlap.
+    """
+
+    spans = [
+        (start, max(int((end - start).total_seconds()), 0))
+        for start, end in sorted(ranges)
+    ]
+    total = sum(seconds for _, seconds in spans)
+    if lookups > total:
+        raise typer.BadParameter(
+            f"{lookups:,} lookups don't fit into {total:,} seconds, widen the date ranges",
+            param_hint="--range",
+        )
+
+    clock = [
+        f"{hour:02d}:{minute:02d}:{second:02d}"
+        for hour in range(24)
+        for minute in range(60)
+        for second in range(60)
+    ]
+    seconds = iter(sorted(rng.sample(range(total), lookups)))
+    times, offset = [], 0
+    for start, length in spans:
+        midnight = start.replace(hour=0, minute=0, second=0)
+        since_midnight = int((start - midnight).total_seconds())
+        days = [
+            (midnight + timedelta(days=day)).strftime("%Y-%m-%d ")
+            for day in range((since_midnight + length) // 86400 + 1)
+        ]
+        for second in seconds:
+            if second >= offset + length:
+                seconds = itertools.chain([second], seconds)
+                break
+            day, moment = divmod(second - offset + since_midnight, 86400)
+            times.append(days[day] + clock[moment])
+        offset += length
+    return times
+
+
+def load_test_data(
+    rules_file: str,
+    words: int,
+    lookups: int,
+    ranges: List[Tuple[datetime, datetime]],
+    seed: Optional[int] = None,
+) -> None:
+    """
+    Fills the database with generated words and lookups that follow a rules file.
+
+    1. Read the rules. Stop if the database already has words and the user doesn't want to add to them.
+    2. Make the words of every rule and spread the lookups over the date ranges. Every word is looked up at least once, the other lookups go to random words.
+    3. Insert everything with executemany in a single transaction, without going through insert_word_to_db. Large loads build the indexes of the lookup log and its rollups once at the end.
+    4. Lookup times that are already in the database are skipped, words already in the database keep their status.
+    5. Print what was inserted and how long it took.
+
+    Args:
+        rules_file (str): Path of the rules file.
+        words (int): Number of words, the word counts in the rules win over it.
+        lookups (int): Number of lookups, raised to the number of words if it is lower.
+        ranges (List[Tuple[datetime, datetime]]): Date ranges the lookups are spread over.
+        seed (int, optional): Random seed, the same seed makes the same data. Defaults to None.
+    """
+
+    with contextlib.suppress(InvalidLoadRuleException):
+        rules = parse_rules(rules_file)
+        if not rules:
+            print(Panel(f"[bold red]{rules_file}[/bold red] has no rules. ❌"))
+            return
+
+        conn = createConnection()
+        c = conn.cursor()
+        if existing := c.execute("SELECT COUNT(*) FROM word_state").fetchone()[0]:
+            print(
+                Panel(
+                    title="[b reverse yellow]  Warning!  [/b reverse yellow]",
+                    title_align="center",
+                    padding=(1, 1),
+                    renderable=f"🛑 The database already has [bold red]{existing:,}[/bold red] words. Add the load testing data to them?",
+                )
+            )
+            if not typer.confirm(""):
+                print(Panel("No data was added. 👍🏼"))
+                return
+
+        tic = time.perf_counter()
+        rng = random.Random(seed)
+        rule_rows = generate_words(rules, words)
+        state_rows = [row for rows in rule_rows for row in rows]
+        names = [row[0] for row in state_rows]
+        lookups = max(lookups, len(names))
+        looked_up = names + rng.choices(names, k=lookups - len(names))
+        rng.shuffle(looked_up)
+        times = lookup_times(rng, lookups, ranges)
+
+        # when the load at least doubles the lookup log, the indexes and triggers on it are dropped and built again
+        # afterwards, which is much faster than updating them row by row. The word_state rows are inserted up front
+        # and the lookup rollups are computed once at the end.
+        rebuild = []
+        if lookups >= c.execute("SELECT COUNT(*) FROM words").fetchone()[0]:
+            c.execute(
+                """SELECT type, name, sql FROM sqlite_master WHERE tbl_name='words' AND sql IS NOT NULL
+                AND type IN ('index', 'trigger')"""
+            )
+            rebuild = c.fetchall()
+
+        try:
+            c.execute("BEGIN")
+            for kind, name, _ in rebuild:
+                c.execute(f'DROP {kind} "{name}"')
+            c.executemany(
+                "INSERT OR IGNORE INTO word_state (word, tag, mastered, learning, favorite) VALUES (?, ?, ?, ?, ?)",
+                state_rows,
+            )
+            added_words = c.rowcount
+            c.executemany(
+                "INSERT OR IGNORE INTO words (word, datetime) VALUES (?, ?)",
+                zip(looked_up, times),
+            )
+            added_lookups = c.rowcount
+            if rebuild:
+                rebuild_lookup_rollups(c)
+            for _, _, sql in rebuild:
+                c.execute(sql)
+            conn.commit()
+        except Error:
+            conn.rollback()
+            raise
+        seconds = time.perf_counter() - tic
+
+        table = Table(show_header=True, header_style="bold bright_cyan")
+        table.add_column("Letters", style="cyan")
+        table.add_column("Tag", style="purple4")
+        table.add_column("Statuses")
+        table.add_column("Words", justify="right")
+        for rule, rows in zip(rules, rule_rows):
+            statuses = [
+                status
+                for status in ["learning", "mastered", "favorite"]
+                if getattr(rule, status)
+            ]
+            table.add_row(
+                rule.letters, rule.tag or "", ", ".join(statuses) or "none", f"{len(rows):,}"
+            )
+        print(table)
+        print(
+            Panel(
+                title="[b reverse green]  Load testing data added!  [/b reverse green]",
+                title_align="center",
+                padding=(1, 1),
+                renderable=f"Added [bold green]{added_words:,}[/bold green] words and [bold green]{added_lookups:,}[/bold green] lookups from {times[0]} to {times[-1]} in [bold blue]{seconds:.2f}s[/bold blue]. ✅",
+            )
+        )
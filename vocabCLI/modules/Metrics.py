@@ -0,0 +1,507 @@
+import contextlib
+import json
+import math
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import *
+
+# reachable both as "Metrics" and as "modules.Metrics", like Database. Both names must share the pending metrics.
+sys.modules.setdefault("Metrics", sys.modules[__name__])
+sys.modules.setdefault("modules.Metrics", sys.modules[__name__])
+
+# name -> (type, help) of every metric, the help text is exported along with it
+METRICS = {
+    "dictionary_cache_total": (
+        "counter",
+        "Definitions looked up, by where they came from: the response memo, the cache_words table or a miss that needs the API.",
+    ),
+    "api_requests_total": (
+        "counter",
+        "Requests to the dictionary API, by HTTP status or error.",
+    ),
+    "api_request_duration": ("histogram", "Latency of the dictionary API requests."),
+    "command_duration": ("histogram", "Wall time of the CLI commands."),
+}
+
+# upper bounds in ms of the histogram buckets, the last bucket takes everything slower
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf)
+
+# hourly rows are rolled up into daily rows after this many days, daily rows are dropped after DAILY_RETENTION_DAYS
+HOURLY_RETENTION_DAYS = 7
+DAILY_RETENTION_DAYS = 365
+
+# start of the one row per metric and label set with the total since the first flush. It is never rolled up or dropped.
+LIFETIME_START = ""
+
+# prefix of the exported metric names
+PROMETHEUS_PREFIX = "vocab_"
+
+# metrics recorded since the last flush. The keys carry the hour they were recorded in.
+# (name, labels, hour) -> value
+_counters: Dict[tuple, float] = {}
+# (name, labels, hour, le) -> [count, sum]
+_histograms: Dict[tuple, list] = {}
+_lock = threading.Lock()
+
+
+def format_labels(labels: Optional[Dict[str, str]]) -> str:
+    """
+    Returns the labels in the Prometheus format, sorted by name: command="define",status="200"
+
+    Args:
+        labels (dict, optional): label name -> value
+
+    Returns:
+        str: The labels, empty if there are none.
+    """
+
+    if not labels:
+        return ""
+    formatted = []
+    for name, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        formatted.append(f'{name}="{value}"')
+    return ",".join(formatted)
+
+
+def current_hour() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:00:00")
+
+
+def increment(
+    name: str, labels: Optional[Dict[str, str]] = None, value: float = 1
+) -> None:
+    """
+    Adds to a counter.
+
+    Args:
+        name (str): Name of the counter, one of METRICS.
+        labels (dict, optional): label name -> value
+        value (float, optional): Amount added. Defaults to 1.
+    """
+
+    key = (name, format_labels(labels), current_hour())
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(
+    name: str, milliseconds: float, labels: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Adds an observation to a latency histogram.
+
+    Args:
+        name (str): Name of the histogram, one of METRICS.
+        milliseconds (float): The latency.
+        labels (dict, optional): label name -> value
+    """
+
+    le = next(bound for bound in LATENCY_BUCKETS_MS if milliseconds <= bound)
+    key = (name, format_labels(labels), current_hour(), le)
+    with _lock:
+        bucket = _histograms.setdefault(key, [0, 0.0])
+        bucket[0] += 1
+        bucket[1] += milliseconds
+
+
+@contextlib.contextmanager
+def timer(name: str, labels: Optional[Dict[str, str]] = None) -> Iterator[None]:
+    """
+    Observes how long the block inside took in a latency histogram, even if it raised.
+
+    Args:
+        name (str): Name of the histogram, one of METRICS.
+        labels (dict, optional): label name -> value
+    """
+
+    tic = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - tic) * 1000, labels)
+
+
+@contextlib.contextmanager
+def command_timer(command: str) -> Iterator[None]:
+    """Observes the duration of a CLI command and saves the metrics it recorded when it is done."""
+
+    try:
+        with timer("command_duration", {"command": command}):
+            yield
+    finally:
+        flush()
+
+
+def flush() -> None:
+    """
+    Saves the metrics recorded since the last flush, in one transaction, and rolls up the old ones.
+
+    1. Counters and histogram buckets are added to the rows of the hour they were recorded in, and to the lifetime totals.
+    2. If the calling thread's connection is in the middle of a transaction, the metrics are kept for the next flush. Committing would commit the unfinished changes too.
+    3. Metrics are never worth failing a command for, database errors drop them.
+    """
+
+    # the metrics come from commands that use the database, without it there is nothing to save
+    if (Database := sys.modules.get("Database")) is None:
+        return
+
+    with _lock:
+        if not (_counters or _histograms):
+            return
+        conn = Database.createConnection()
+        if conn is None or conn.in_transaction:
+            return
+        counters, histograms = dict(_counters), dict(_histograms)
+        _counters.clear()
+        _histograms.clear()
+
+    try:
+        c = conn.cursor()
+        # the rows of the hour, then the lifetime totals
+        for period, lifetime in [("hour", False), ("total", True)]:
+            c.executemany(
+                """INSERT INTO metric_counters (name, labels, period, start, value) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (name, labels, period, start) DO UPDATE SET value=value+excluded.value""",
+                [
+                    (name, labels, period, LIFETIME_START if lifetime else hour, value)
+                    for (name, labels, hour), value in counters.items()
+                ],
+            )
+            c.executemany(
+                """INSERT INTO metric_histograms (name, labels, period, start, le, count, sum) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (name, labels, period, start, le) DO UPDATE SET count=count+excluded.count, sum=sum+excluded.sum""",
+                [
+                    (
+                        name,
+                        labels,
+                        period,
+                        LIFETIME_START if lifetime else hour,
+                        le,
+                        count,
+                        total,
+                    )
+                    for (name, labels, hour, le), (count, total) in histograms.items()
+                ],
+            )
+        rollup(c, datetime.now())
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+
+
+def rollup(c: sqlite3.Cursor, now: datetime) -> None:
+    """
+    Keeps the metric tables small.
+
+    1. Hourly rows of the days before the last HOURLY_RETENTION_DAYS days are summed up into one row per day.
+    2. Daily rows older than DAILY_RETENTION_DAYS days are deleted. The lifetime totals are left alone.
+    3. Both only touch rows found through the period index, so a flush with nothing to roll up costs two index lookups per table.
+
+    Args:
+        c (sqlite3.Cursor): Cursor inside the flush transaction.
+        now (datetime): Current time.
+    """
+
+    hourly_cutoff = (now - timedelta(days=HOURLY_RETENTION_DAYS)).strftime(
+        "%Y-%m-%d 00:00:00"
+    )
+    daily_cutoff = (now - timedelta(days=DAILY_RETENTION_DAYS)).strftime(
+        "%Y-%m-%d 00:00:00"
+    )
+
+    c.execute(
+        """INSERT INTO metric_counters (name, labels, period, start, value)
+        SELECT name, labels, 'day', date(start) || ' 00:00:00', SUM(value) FROM metric_counters
+        WHERE period='hour' AND start < ? GROUP BY name, labels, date(start)
+        ON CONFLICT (name, labels, period, start) DO UPDATE SET value=value+excluded.value""",
+        (hourly_cutoff,),
+    )
+    c.execute(
+        """INSERT INTO metric_histograms (name, labels, period, start, le, count, sum)
+        SELECT name, labels, 'day', date(start) || ' 00:00:00', le, SUM(count), SUM(sum) FROM metric_histograms
+        WHERE period='hour' AND start < ? GROUP BY name, labels, date(start), le
+        ON CONFLICT (name, labels, period, start, le) DO UPDATE SET count=count+excluded.count, sum=sum+excluded.sum""",
+        (hourly_cutoff,),
+    )
+    for table in ["metric_counters", "metric_histograms"]:
+        c.execute(
+            f"DELETE FROM {table} WHERE period='hour' AND start < ?", (hourly_cutoff,)
+        )
+        c.execute(
+            f"DELETE FROM {table} WHERE period='day' AND start < ?", (daily_cutoff,)
+        )
+
+
+def quantile(buckets: List[Tuple[float, int]], q: float) -> Optional[float]:
+    """
+    Estimates a quantile from histogram buckets, interpolating linearly inside the bucket it falls in.
+
+    Args:
+        buckets (List[Tuple[float, int]]): (upper bound, count) of every bucket, sorted by the bound.
+        q (float): The quantile, 0.95 for the p95.
+
+    Returns:
+        float: The estimate in ms, the lower bound for the open ended last bucket. None without observations.
+    """
+
+    total = sum(count for _, count in buckets)
+    if not total:
+        return None
+
+    rank = q * total
+    seen = 0
+    for le, count in buckets:
+        # empty buckets are not stored, the lower bound is the bucket before it in LATENCY_BUCKETS_MS
+        lower = max((bound for bound in LATENCY_BUCKETS_MS if bound < le), default=0)
+        if count and seen + count >= rank:
+            if math.isinf(le):
+                return lower
+            return lower + (le - lower) * (rank - seen) / count
+        seen += count
+    return None
+
+
+def read_metrics(days: Optional[int] = None, lifetime: bool = False) -> dict:
+    """
+    Reads the saved metrics, after saving the ones still pending.
+
+    Args:
+        days (int, optional): Only count the last this many days. Defaults to everything kept.
+        lifetime (bool, optional): If True, read the lifetime totals instead, they include the rows rolled up and dropped. Defaults to False.
+
+    Returns:
+        dict: "counters": name -> labels -> value, "histograms": name -> labels -> count, sum_ms, p50_ms, p95_ms and buckets
+    """
+
+    from Database import createConnection
+
+    flush()
+    since = (
+        (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:00:00")
+        if days
+        else ""
+    )
+    # both periods are covered by the period index
+    where, parameters = (
+        ("period='total'", ())
+        if lifetime
+        else ("period IN ('hour', 'day') AND start >= ?", (since,))
+    )
+    c = createConnection().cursor()
+
+    counters: Dict[str, dict] = {}
+    c.execute(
+        f"SELECT name, labels, SUM(value) FROM metric_counters WHERE {where} GROUP BY name, labels ORDER BY name, labels",
+        parameters,
+    )
+    for name, labels, value in c.fetchall():
+        counters.setdefault(name, {})[labels] = value
+
+    histograms: Dict[str, dict] = {}
+    c.execute(
+        f"SELECT name, labels, le, SUM(count), SUM(sum) FROM metric_histograms WHERE {where} GROUP BY name, labels, le ORDER BY name, labels, le",
+        parameters,
+    )
+    for name, labels, le, count, total in c.fetchall():
+        histogram = histograms.setdefault(name, {}).setdefault(
+            labels, {"count": 0, "sum_ms": 0.0, "buckets": []}
+        )
+        histogram["count"] += count
+        histogram["sum_ms"] += total
+        histogram["buckets"].append((le, count))
+
+    for by_labels in histograms.values():
+        for histogram in by_labels.values():
+            histogram["p50_ms"] = quantile(histogram["buckets"], 0.5)
+            histogram["p95_ms"] = quantile(histogram["buckets"], 0.95)
+    return {"counters": counters, "histograms": histograms}
+
+
+def to_json(metrics: dict, days: Optional[int]) -> str:
+    """
+    Returns the metrics read by read_metrics as JSON.
+
+    Args:
+        metrics (dict): The metrics.
+        days (int, optional): The window they cover, None for everything kept.
+
+    Returns:
+        str: The JSON document.
+    """
+
+    histograms = {
+        name: {
+            labels: {
+                **histogram,
+                "buckets": {
+                    ("+Inf" if math.isinf(le) else f"{le:g}"): count
+                    for le, count in histogram["buckets"]
+                },
+            }
+            for labels, histogram in by_labels.items()
+        }
+        for name, by_labels in metrics["histograms"].items()
+    }
+    return json.dumps(
+        {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "days": days,
+            "counters": metrics["counters"],
+            "histograms": histograms,
+        },
+        indent=2,
+    )
+
+
+def to_prometheus(metrics: dict) -> str:
+    """
+    Returns the metrics read by read_metrics in the Prometheus text format, for the textfile collector of the node exporter.
+
+    1. Counters are exported as they are, histograms in seconds with cumulative buckets, a _sum and a _count.
+    2. Read the lifetime totals, Prometheus expects counters that only go up, and rollup drops old rows.
+
+    Args:
+        metrics (dict): The metrics.
+
+    Returns:
+        str: The exposition text.
+    """
+
+    lines = []
+    for name, by_labels in metrics["counters"].items():
+        metric = PROMETHEUS_PREFIX + name
+        lines.append(f"# HELP {metric} {METRICS.get(name, ('', name))[1]}")
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in by_labels.items():
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{metric}{suffix} {value:g}")
+
+    for name, by_labels in metrics["histograms"].items():
+        metric = f"{PROMETHEUS_PREFIX}{name}_seconds"
+        lines.append(f"# HELP {metric} {METRICS.get(name, ('', name))[1]}")
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, histogram in by_labels.items():
+            prefix = f"{labels}," if labels else ""
+            counts = dict(histogram["buckets"])
+            cumulative = 0
+            for le in LATENCY_BUCKETS_MS:
+                cumulative += counts.get(le, 0)
+                bound = "+Inf" if math.isinf(le) else f"{le / 1000:g}"
+                lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{metric}_sum{suffix} {histogram['sum_ms'] / 1000:g}")
+            lines.append(f"{metric}_count{suffix} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def show_internal_stats(days: int) -> None:
+    """
+    Prints the dictionary API and cache metrics and the command durations of the last days.
+
+    1. The cache hit rate is the share of definitions answered by the response memo or the cache_words table.
+    2. Latencies are estimated from the histogram buckets, like Prometheus does.
+
+    Args:
+        days (int): Number of days covered.
+    """
+
+    from rich import print
+    from rich.panel import Panel
+    from rich.table import Table
+
+    metrics = read_metrics(days)
+    if not (metrics["counters"] or metrics["histograms"]):
+        print(Panel(f"No metrics recorded in the last {days} day(s). 🤷"))
+        return
+
+    def milliseconds(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.0f}"
+
+    cache = metrics["counters"].get("dictionary_cache_total", {})
+    hits = cache.get(format_labels({"result": "memo"}), 0) + cache.get(
+        format_labels({"result": "table"}), 0
+    )
+    lookups = hits + cache.get(format_labels({"result": "miss"}), 0)
+    requests = metrics["counters"].get("api_requests_total", {})
+    failed = sum(
+        value for labels, value in requests.items() if labels != format_labels({"status": 200})
+    )
+    latency = metrics["histograms"].get("api_request_duration", {}).get("", {})
+
+    table = Table(
+        title=f"🌐 Dictionary API, last {days} day(s)",
+        show_header=True,
+        header_style="bold bright_cyan",
+    )
+    table.add_column("Lookups", justify="right")
+    table.add_column("Cache hit rate", justify="right", style="light_green")
+    table.add_column("API requests", justify="right")
+    table.add_column("Failed", justify="right", style="red")
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p95 (ms)", justify="right")
+    table.add_row(
+        f"{lookups:.0f}",
+        f"{hits / lookups:.1%}" if lookups else "-",
+        f"{sum(requests.values()):.0f}",
+        f"{failed:.0f}",
+        milliseconds(latency.get("p50_ms")),
+        milliseconds(latency.get("p95_ms")),
+    )
+    print(table)
+
+    commands = metrics["histograms"].get("command_duration", {})
+    table = Table(
+        title=f"⏱  Commands, last {days} day(s)",
+        show_header=True,
+        header_style="bold bright_cyan",
+    )
+    table.add_column("Command", style="cyan")
+    table.add_column("Runs", justify="right")
+    table.add_column("p50 (ms)", justify="right", style="light_green")
+    table.add_column("p95 (ms)", justify="right")
+    table.add_column("Total (s)", justify="right")
+    for labels, histogram in sorted(
+        commands.items(), key=lambda item: item[1]["count"], reverse=True
+    ):
+        table.add_row(
+            labels.split('"')[1],
+            str(histogram["count"]),
+            milliseconds(histogram["p50_ms"]),
+            milliseconds(histogram["p95_ms"]),
+            f"{histogram['sum_ms'] / 1000:.1f}",
+        )
+    print(table)
+
+
+def export_metrics(prometheus: bool, days: int, output: Optional[str]) -> None:
+    """
+    Prints the metrics as JSON or in the Prometheus text format, or writes them to a file.
+
+    1. The Prometheus export holds the lifetime totals, counters must not go down between two scrapes.
+    2. The file is written next to its final path and then renamed, the textfile collector never reads half a file.
+
+    Args:
+        prometheus (bool): If True, the Prometheus text format, otherwise JSON.
+        days (int): Number of days the JSON covers.
+        output (str, optional): File to write, printed to the terminal if None.
+    """
+
+    import os
+
+    if prometheus:
+        text = to_prometheus(read_metrics(lifetime=True))
+    else:
+        text = to_json(read_metrics(days), days)
+
+    if output is None:
+        sys.stdout.write(text if text.endswith("\n") else text + "\n")
+        return
+
+    temporary = f"{output}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(temporary, output)
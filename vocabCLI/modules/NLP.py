@@ -4,35 +4,25 @@ from heapq import nlargest
 from string import punctuation
 from typing import *
 
-import nltk
-import openai
-import pandas as pd
 import regex as re
 import requests
 import rich
-import spacy
-import textstat
-import torch
-import trafilatura
-from bs4 import BeautifulSoup
+from Profiling import span
 from rich import box, print
 from rich.columns import Columns
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
-from spacy.lang.en.stop_words import STOP_WORDS
-from spacytextblob.spacytextblob import SpacyTextBlob
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
-# Load your API key from an environment variable or secret management service
-openai.api_key = os.getenv("OPENAI")
+# spacy, transformers, torch, openai, textstat, trafilatura and bs4 take seconds to import, so every
+# function imports what it needs itself. Importing this module stays cheap for the commands that don't use them.
 
-from spacy.cli import download
+SENTIMENT_MODEL = "nlptown/bert-base-multilingual-uncased-sentiment"
 
-# check if the model is already downloaded, if not, then download it
-if not spacy.util.is_package("en_core_web_sm"):
-    download("en_core_web_sm")
+# the models are loaded on first use and kept, a long running process (vocab daemon, vocab shell) loads them once
+_spacy_model = None
+_sentiment_model = None
 
 
 URL_INVALID_PANEL = Panel(
@@ -96,6 +86,8 @@ def parse_text_from_web(webURL: str) -> str:
         trafilatura.errors.FetchingError: If the URL is invalid or the server is down
     """
 
+    import trafilatura
+
     response = requests.get(webURL)
     if response.status_code != 200:
         return -1
@@ -160,7 +152,7 @@ def censor_bad_words_strict(text: str) -> None:
         text (str): text that needs to be censored
     """
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Censoring..."), Progress(
         SpinnerColumn(spinner_name="monkey", style="bold violet"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -248,7 +240,7 @@ def censor_bad_words_not_strict(text: str) -> None:
         text (str): text that needs to be censored
     """
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Censoring..."), Progress(
         SpinnerColumn(spinner_name="monkey", style="bold violet"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -345,8 +337,11 @@ def readability_index(text: str) -> None:
     Args:
         text (str): text to be analyzed
     """
+
+    import textstat
+
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Processing Text..."), Progress(
         SpinnerColumn(spinner_name="aesthetic", style="bold green"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -419,6 +414,47 @@ def readability_index(text: str) -> None:
         )
 
 
+def load_spacy_model():
+    """
+    Returns the small English spacy model, loaded on first use and downloaded first if it isn't installed yet.
+
+    Returns:
+        spacy.language.Language: the loaded model
+    """
+
+    global _spacy_model
+    if _spacy_model is None:
+        with span("Loading spaCy model"):
+            import spacy
+            from spacy.cli import download
+
+            # check if the model is already downloaded, if not, then download it
+            if not spacy.util.is_package("en_core_web_sm"):
+                download("en_core_web_sm")
+            _spacy_model = spacy.load("en_core_web_sm")
+    return _spacy_model
+
+
+def load_sentiment_model():
+    """
+    Returns the tokenizer and the model used by sentiment_analysis, loaded on first use.
+
+    Returns:
+        tuple: the tokenizer and the model
+    """
+
+    global _sentiment_model
+    if _sentiment_model is None:
+        with span("Loading sentiment model"):
+            from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+            _sentiment_model = (
+                AutoTokenizer.from_pretrained(SENTIMENT_MODEL),
+                AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL),
+            )
+    return _sentiment_model
+
+
 def extract_difficult_words(text: str) -> None:
     """
     Extracts the difficult words from the text and prints them, uses the _most_common_words.txt file to determine the difficult words
@@ -442,7 +478,7 @@ def extract_difficult_words(text: str) -> None:
     """
 
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Checking URL..."), Progress(
         SpinnerColumn(spinner_name="aesthetic", style="bold gold1"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -485,7 +521,7 @@ def extract_difficult_words(text: str) -> None:
             return
 
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Removing Common Words..."), Progress(
         SpinnerColumn(spinner_name="aesthetic", style="bold gold1"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -527,7 +563,7 @@ def extract_difficult_words(text: str) -> None:
                 difficult_words.remove(word)
 
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Removing Named Entities..."), Progress(
         SpinnerColumn(spinner_name="aesthetic", style="bold gold1"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -543,7 +579,7 @@ def extract_difficult_words(text: str) -> None:
         difficult_words = " ".join(difficult_words)
 
         # Loading the NLP model
-        nlp = spacy.load("en_core_web_sm")
+        nlp = load_spacy_model()
 
         nlp_text = nlp(difficult_words)
         entities = [entity.text for entity in nlp_text.ents]
@@ -556,9 +592,9 @@ def extract_difficult_words(text: str) -> None:
         difficult_words = [word for word in difficult_words if word.islower()]
 
         # remove mispelled words
-        import spellchecker
+        from Dictionary import get_spell_checker
 
-        spell = spellchecker.SpellChecker()
+        spell = get_spell_checker()
         difficult_words = [
             word
             for word in difficult_words
@@ -632,8 +668,11 @@ def sentiment_analysis(content: str) -> None:
     Args:
         content (str): text/url to be analyzed
     """
+
+    import torch
+
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Getting Sentiment..."), Progress(
         SpinnerColumn(spinner_name="smiley", style="bold green"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -675,12 +714,7 @@ def sentiment_analysis(content: str) -> None:
             print(URL_INVALID_PANEL)
             return
 
-        tokenizer = AutoTokenizer.from_pretrained(
-            "nlptown/bert-base-multilingual-uncased-sentiment"
-        )
-        model = AutoModelForSequenceClassification.from_pretrained(
-            "nlptown/bert-base-multilingual-uncased-sentiment"
-        )
+        tokenizer, model = load_sentiment_model()
         tokens = tokenizer.encode(
             text, return_tensors="pt", truncation=True, padding=True
         )
@@ -723,6 +757,12 @@ def summarize_text_util(text: str, per: int) -> str:
     Returns:
         str: summarized text
     """
+
+    import openai
+
+    # Load your API key from an environment variable or secret management service
+    openai.api_key = os.getenv("OPENAI")
+
     response = openai.Completion.create(
         model="text-davinci-003",
         prompt="summarize the following text:\n" + text,
@@ -792,9 +832,10 @@ def summarize_text(content: str, file: Optional[bool] = False) -> None:
     Args:
         text (str): Text that is to be summarized
     """
+    from bs4 import BeautifulSoup
 
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Summarizing..."), Progress(
         SpinnerColumn(spinner_name="dots12", style="bold blue"),
         TextColumn(
             "[progress.description]{task.description}",
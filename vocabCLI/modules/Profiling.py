@@ -0,0 +1,174 @@
+import contextlib
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import *
+
+# reachable both as "Profiling" and as "modules.Profiling", like Database. Both names must share the recorded spans.
+sys.modules.setdefault("Profiling", sys.modules[__name__])
+sys.modules.setdefault("modules.Profiling", sys.modules[__name__])
+
+# --timings records spans only while this is set, span costs next to nothing otherwise
+_enabled = False
+
+# (outer span, ..., span) -> [calls, seconds], in the order the spans were first entered
+_totals: Dict[tuple, list] = {}
+_totals_lock = threading.Lock()
+
+# open spans of every thread, spans opened on worker threads start their own tree
+_local = threading.local()
+
+# folder the --profile output goes to, next to exports/
+PROFILE_DIR = "profiles"
+
+
+def enable_timings() -> None:
+    """Starts recording spans, forgetting the ones recorded before."""
+
+    global _enabled
+    with _totals_lock:
+        _totals.clear()
+    _enabled = True
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Times a named stage of a command for --timings.
+
+    1. Spans opened inside another span on the same thread are nested under it.
+    2. A span entered several times, like "Searching..." for every word, is reported once with the number of calls and the total time.
+
+    Args:
+        name (str): Name of the stage, the spinner text if the stage has a spinner.
+    """
+
+    if not _enabled:
+        yield
+        return
+
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    _local.stack.append(name)
+    path = tuple(_local.stack)
+    with _totals_lock:
+        # reserve the place now, so that a span is listed before the spans nested in it
+        _totals.setdefault(path, [0, 0.0])
+
+    tic = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - tic
+        _local.stack.pop()
+        with _totals_lock:
+            _totals[path][0] += 1
+            _totals[path][1] += elapsed
+
+
+def print_timings() -> None:
+    """
+    Prints the recorded spans as a tree and stops recording.
+
+    1. Every span shows how often it ran, its total wall time and its share of the command's wall time.
+    2. If the command looked up words, the hits and misses of the parsed response memo are printed below.
+    """
+
+    global _enabled
+    from rich.console import Console
+    from rich.table import Table
+
+    _enabled = False
+    with _totals_lock:
+        totals = dict(_totals)
+        _totals.clear()
+    if not totals:
+        return
+
+    # sort the tree depth first, siblings stay in the order they first ran
+    order = {path: index for index, path in enumerate(totals)}
+    paths = sorted(
+        totals, key=lambda path: [order.get(path[: depth + 1], 0) for depth in range(len(path))]
+    )
+
+    table = Table(
+        title="⏱  Timings", show_header=True, header_style="bold bright_cyan"
+    )
+    table.add_column("Stage", style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total (ms)", justify="right", style="light_green")
+    table.add_column("Share", justify="right")
+    # the first span is the command itself, worker thread spans are measured against it too
+    command = next(iter(totals.values()))[1]
+    for path in paths:
+        calls, seconds = totals[path]
+        table.add_row(
+            "  " * (len(path) - 1) + path[-1],
+            str(calls),
+            f"{seconds * 1000:.1f}",
+            f"{seconds / command:.0%}" if command else "",
+        )
+
+    if (dictionary := sys.modules.get("Dictionary")) is not None:
+        memo = dictionary.response_memo_info()
+        if memo.hits or memo.misses:
+            table.caption = f"Response memo: {memo.hits} hit(s), {memo.misses} miss(es), {memo.currsize}/{memo.maxsize} words"
+
+    Console(stderr=True).print(table)
+
+
+@contextlib.contextmanager
+def profile_command(command: str, top: int) -> Iterator[None]:
+    """
+    Profiles everything inside with cProfile.
+
+    1. The profile is saved to profiles/<command>-<date>.prof, open it with snakeviz or pstats for the full picture.
+    2. The top functions by cumulative time are printed when the command is done.
+
+    Args:
+        command (str): Name of the command, used for the file name.
+        top (int): Number of functions printed.
+    """
+
+    import cProfile
+    import pstats
+
+    from rich.console import Console
+    from rich.table import Table
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(
+            PROFILE_DIR, f"{command}-{datetime.now():%Y%m%d-%H%M%S}.prof"
+        )
+        profiler.dump_stats(path)
+
+        stats = pstats.Stats(profiler).stats
+        slowest = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+        table = Table(
+            title=f"🔬 Top {top} functions by cumulative time",
+            caption=f"Full profile saved to {path}",
+            show_header=True,
+            header_style="bold bright_cyan",
+        )
+        table.add_column("Function", style="cyan")
+        table.add_column("Calls", justify="right")
+        table.add_column("Own (ms)", justify="right")
+        table.add_column("Cumulative (ms)", justify="right", style="light_green")
+        for (file, line, function), (_, calls, own, cumulative, _) in slowest[:top]:
+            location = f"{os.path.basename(file)}:{line}" if line else file
+            table.add_row(
+                f"{function} [dim]{location}[/dim]",
+                str(calls),
+                f"{own * 1000:.1f}",
+                f"{cumulative * 1000:.1f}",
+            )
+        Console(stderr=True).print(table)
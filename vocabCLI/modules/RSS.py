@@ -9,6 +9,7 @@ import typer
 from bs4 import BeautifulSoup
 from Database import createConnection, createTables
 from Exceptions import *
+from Profiling import span
 from rich import box, print
 from rich.columns import Columns
 from rich.console import Console
@@ -32,7 +33,7 @@ def add_feed(url: str) -> None:
     """
 
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Adding Feed"), Progress(
         SpinnerColumn(spinner_name="clock", style="bold violet"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -116,7 +117,7 @@ def get_all_feeds() -> None:
     """
 
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Getting your feeds"), Progress(
         SpinnerColumn(spinner_name="clock", style="bold violet"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -301,7 +302,7 @@ def check_feed_for_new_content(title: str) -> None:
     """
 
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Checking feed for news..."), Progress(
         SpinnerColumn(spinner_name="clock", style="bold violet"),
         TextColumn(
             "[progress.description]{task.description}",
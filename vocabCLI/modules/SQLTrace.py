@@ -0,0 +1,341 @@
+import collections
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import *
+
+# reachable both as "SQLTrace" and as "modules.SQLTrace", like Database. Both names must share the active trace.
+sys.modules.setdefault("SQLTrace", sys.modules[__name__])
+sys.modules.setdefault("modules.SQLTrace", sys.modules[__name__])
+
+# statements listed in each table of the report
+REPORT_TOP = 10
+
+# statements that read a table and may scan it, these are checked with EXPLAIN QUERY PLAN
+EXPLAINED = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+# the trace the traced connections record into, None while nothing is traced
+_active: Optional["Trace"] = None
+
+
+class StatementStats:
+    """What the trace knows about one SQL statement, summed over every time it ran."""
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        # "file:line function" -> calls, shows where a statement run in a loop comes from
+        self.sites = collections.Counter()
+        # EXPLAIN QUERY PLAN steps that scan a whole table, filled in the first time the statement runs
+        self.scans: List[str] = []
+
+    def as_dict(self) -> dict:
+        return {
+            "sql": self.sql,
+            "calls": self.calls,
+            "total_ms": self.seconds * 1000,
+            "rows": self.rows,
+            "sites": dict(self.sites.most_common()),
+            "scans": self.scans,
+        }
+
+
+class Trace:
+    """The statements run on the traced connections, with their total time, rows and call sites."""
+
+    def __init__(self):
+        self.statements: Dict[str, StatementStats] = {}
+        self.lock = threading.Lock()
+
+    def record(
+        self, conn: sqlite3.Connection, sql: str, parameters, seconds: float, rows: int
+    ) -> StatementStats:
+        """
+        Adds one run of a statement to the trace.
+
+        1. Statements are grouped by their text with the whitespace collapsed, the parameters are not part of it.
+        2. The first run of a statement also looks up its query plan, with the parameters of that run.
+
+        Args:
+            conn (sqlite3.Connection): Connection the statement ran on.
+            sql (str): The statement.
+            parameters: Parameters of this run, used for the query plan.
+            seconds (float): Time spent in execute.
+            rows (int): Rows changed, rows fetched later are added by the cursor.
+
+        Returns:
+            StatementStats: The statement's entry, for the rows and time of later fetches.
+        """
+
+        key = " ".join(sql.split())
+        with self.lock:
+            stats = self.statements.get(key)
+            first_run = stats is None
+            if first_run:
+                stats = self.statements[key] = StatementStats(key)
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.rows += max(rows, 0)
+            stats.sites[call_site()] += 1
+
+        if first_run and key.upper().startswith(EXPLAINED):
+            stats.scans = full_scans(conn, key, parameters)
+        return stats
+
+    def add_fetch(self, stats: StatementStats, seconds: float, rows: int) -> None:
+        with self.lock:
+            stats.seconds += seconds
+            stats.rows += rows
+
+    def total_calls(self) -> int:
+        return sum(stats.calls for stats in self.statements.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "total_calls": self.total_calls(),
+            "total_ms": sum(stats.seconds for stats in self.statements.values()) * 1000,
+            "statements": [
+                stats.as_dict()
+                for stats in sorted(
+                    self.statements.values(),
+                    key=lambda stats: stats.seconds,
+                    reverse=True,
+                )
+            ],
+        }
+
+
+def call_site() -> str:
+    """
+    Returns where the statement being traced was run from, the first frame outside this module.
+
+    Returns:
+        str: "file:line function"
+    """
+
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def full_scans(conn: sqlite3.Connection, sql: str, parameters) -> List[str]:
+    """
+    Returns the steps of the statement's query plan that scan a whole table or index.
+
+    Args:
+        conn (sqlite3.Connection): Connection the statement ran on.
+        sql (str): The statement.
+        parameters: Parameters to plan it with.
+
+    Returns:
+        List[str]: The SCAN steps, empty if there are none or the plan can't be made.
+    """
+
+    try:
+        # a plain cursor, the plan lookup itself must not be traced
+        plan = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", parameters or ())
+        return [row[3] for row in plan.fetchall() if row[3].startswith("SCAN ")]
+    except (sqlite3.Error, TypeError, ValueError):
+        return []
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor that records every statement it runs and every row it fetches in the active trace."""
+
+    _stats: Optional[StatementStats] = None
+
+    def _run(self, run: Callable, sql: str, parameters):
+        trace = _active
+        if trace is None:
+            return run()
+
+        tic = time.perf_counter()
+        try:
+            return run()
+        finally:
+            elapsed = time.perf_counter() - tic
+            self._stats = trace.record(
+                self.connection, sql, parameters, elapsed, self.rowcount
+            )
+
+    def _fetch(self, fetch: Callable):
+        tic = time.perf_counter()
+        result = fetch()
+        if _active is not None and self._stats is not None:
+            rows = len(result) if isinstance(result, list) else int(result is not None)
+            _active.add_fetch(self._stats, time.perf_counter() - tic, rows)
+        return result
+
+    def execute(self, sql, parameters=()):
+        run = lambda: super(TracingCursor, self).execute(sql, parameters)
+        return self._run(run, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        # only a list can be planned with its first parameters, a generator is consumed by the statement
+        if isinstance(seq_of_parameters, (list, tuple)) and seq_of_parameters:
+            sample = seq_of_parameters[0]
+        else:
+            sample = None
+        run = lambda: super(TracingCursor, self).executemany(sql, seq_of_parameters)
+        return self._run(run, sql, sample)
+
+    def executescript(self, sql_script):
+        run = lambda: super(TracingCursor, self).executescript(sql_script)
+        return self._run(run, sql_script, None)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        return self._fetch(lambda: super(TracingCursor, self).fetchmany(size))
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __next__(self):
+        tic = time.perf_counter()
+        row = super().__next__()
+        if _active is not None and self._stats is not None:
+            _active.add_fetch(self._stats, time.perf_counter() - tic, 1)
+        return row
+
+
+class TracingConnection(sqlite3.Connection):
+    """Connection whose cursors are TracingCursors, the shortcut methods included."""
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+@contextlib.contextmanager
+def trace_sql() -> Iterator[Trace]:
+    """
+    Traces every statement run on the database inside, on every thread.
+
+    1. The open connections are closed first, createConnection then hands out tracing connections.
+    2. When done, the tracing connections are closed again so that later commands run untraced.
+
+    Yields:
+        Trace: The statements recorded so far, complete once the block is left.
+    """
+
+    import Database
+
+    global _active
+    trace = Trace()
+    Database.closeConnection()
+    Database.CONNECTION_FACTORY = TracingConnection
+    _active = trace
+    try:
+        yield trace
+    finally:
+        _active = None
+        Database.closeConnection()
+        Database.CONNECTION_FACTORY = sqlite3.Connection
+
+
+def print_report(trace: Trace, name: str) -> str:
+    """
+    Prints the statements that took the most time, the ones run the most often and the ones that scan whole tables, and saves the full trace.
+
+    Args:
+        trace (Trace): The finished trace.
+        name (str): Name of what was traced, used for the file name.
+
+    Returns:
+        str: Path of the JSON file with every statement.
+    """
+
+    from Profiling import PROFILE_DIR
+    from rich.console import Console
+    from rich.table import Table
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(
+        PROFILE_DIR, f"sql-{name}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(trace.as_dict(), file, indent=2)
+
+    console = Console(stderr=True)
+    statements = list(trace.statements.values())
+
+    def statement_table(title: str, key: Callable) -> Table:
+        table = Table(
+            title=title, show_header=True, header_style="bold bright_cyan"
+        )
+        table.add_column("Statement", style="cyan", overflow="fold")
+        table.add_column("Calls", justify="right")
+        table.add_column("Rows", justify="right")
+        table.add_column("Total (ms)", justify="right", style="light_green")
+        table.add_column("Busiest call site", style="dim")
+        for stats in sorted(statements, key=key, reverse=True)[:REPORT_TOP]:
+            site, calls = stats.sites.most_common(1)[0]
+            table.add_row(
+                stats.sql,
+                str(stats.calls),
+                str(stats.rows),
+                f"{stats.seconds * 1000:.2f}",
+                f"{site} ({calls}x)",
+            )
+        return table
+
+    console.print(
+        statement_table("🐢 Statements by total time", lambda stats: stats.seconds)
+    )
+    # a statement run many times from one call site is a loop that could be a single query
+    console.print(
+        statement_table("🔁 Statements by calls", lambda stats: stats.calls)
+    )
+
+    if scans := [stats for stats in statements if stats.scans]:
+        table = Table(
+            title="🔍 Full scans", show_header=True, header_style="bold bright_cyan"
+        )
+        table.add_column("Statement", style="cyan", overflow="fold")
+        table.add_column("Calls", justify="right")
+        table.add_column("Plan", style="red")
+        for stats in sorted(scans, key=lambda stats: stats.seconds, reverse=True):
+            table.add_row(stats.sql, str(stats.calls), "\n".join(stats.scans))
+        console.print(table)
+
+    console.print(
+        f"{trace.total_calls()} statements, {len(statements)} distinct. Full trace saved to {path}"
+    )
+    return path
+
+
+def trace_process() -> None:
+    """Traces the rest of the process and prints the report when it exits, Database calls it if VOCAB_SQL_TRACE is set."""
+
+    import atexit
+
+    tracing = trace_sql()
+    trace = tracing.__enter__()
+
+    def report() -> None:
+        tracing.__exit__(None, None, None)
+        if trace.statements:
+            print_report(trace, "process")
+
+    atexit.register(report)
@@ -0,0 +1,202 @@
+import shlex
+import sys
+import time
+from typing import *
+
+from rich import print
+from rich.console import Console
+from rich.panel import Panel
+
+# typed at the prompt to leave the shell, bye leaves it too after saying goodbye
+EXIT_COMMANDS = {"exit", "quit"}
+
+# most words offered for one completion, so a short prefix doesn't flood the terminal
+MAX_COMPLETIONS = 100
+
+
+def prefix_range(prefix: str) -> Tuple[str, str]:
+    """
+    Returns the bounds of the words that start with the prefix, for a word >= ? AND word < ? search of an index.
+
+    1. The upper bound is the prefix with its last character incremented, the smallest string after every word starting with the prefix.
+    2. Trailing characters that can't be incremented are dropped first, an empty prefix takes everything.
+
+    Args:
+        prefix (str): Start of the word being typed.
+
+    Returns:
+        Tuple[str, str]: The lower and upper bound.
+    """
+
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return prefix, chr(sys.maxunicode)
+    following = ord(stem[-1]) + 1
+    # surrogates can't be encoded, skip over them
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000
+    return prefix, stem[:-1] + chr(following)
+
+
+def complete_word(prefix: str) -> List[str]:
+    """
+    Returns the words from the local word tables that start with the prefix.
+
+    1. Both the words looked up and the words in the dictionary cache are offered, from word_state with one row per word, not from the lookup log.
+    2. The prefix is a range search of the unique word indexes, so a Tab press costs the same however many lookups there are. It is case sensitive, like the word columns.
+
+    Args:
+        prefix (str): Start of the word being typed.
+
+    Returns:
+        List[str]: Matching words, sorted alphabetically.
+    """
+
+    from modules.Database import createConnection
+
+    conn = createConnection()
+    lower, upper = prefix_range(prefix)
+    rows = conn.execute(
+        """SELECT word FROM word_state WHERE word >= ? AND word < ?
+        UNION SELECT word FROM cache_words WHERE word >= ? AND word < ?
+        ORDER BY word LIMIT ?""",
+        (lower, upper, lower, upper, MAX_COMPLETIONS),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def completions(command, line: str, text: str) -> List[str]:
+    """
+    Returns what the shell offers for the text being completed.
+
+    1. The first word of the line completes to a command name.
+    2. A word starting with - completes to an option of the command.
+    3. Anything else completes to a word from the local word tables.
+
+    Args:
+        command (click.Group): The CLI app as a click group.
+        line (str): Everything typed so far, up to the text being completed.
+        text (str): The word being completed.
+
+    Returns:
+        List[str]: Candidates for the text.
+    """
+
+    words = line.split()
+    if not words or (len(words) == 1 and not line.endswith(" ")):
+        names = sorted([*command.list_commands(None), *EXIT_COMMANDS])
+        return [name for name in names if name.startswith(text)]
+
+    if text.startswith("-"):
+        subcommand = command.get_command(None, words[0])
+        if subcommand is None:
+            return []
+        options = sorted(
+            option
+            for param in subcommand.params
+            for option in [*param.opts, *param.secondary_opts]
+            if option.startswith("-")
+        )
+        return [option for option in options if option.startswith(text)]
+
+    return complete_word(text)
+
+
+def enable_completion(command) -> None:
+    """
+    Turns on tab completion for the shell prompt, if this Python has readline.
+
+    Args:
+        command (click.Group): The CLI app as a click group.
+    """
+
+    try:
+        import readline
+    except ImportError:
+        return
+
+    matches = []
+
+    def complete(text: str, state: int) -> Optional[str]:
+        # readline asks for the candidates one by one, they are looked up on the first call
+        if state == 0:
+            line = readline.get_line_buffer()[: readline.get_begidx()]
+            matches[:] = completions(command, line, text)
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer_delims(" \t\n\"'")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+
+
+def run_shell(app) -> None:
+    """
+    Runs the CLI commands typed at a prompt, all in this process.
+
+    1. The database connection, the parsed response memo, the spell checker and the NLP models are loaded once and kept for every command.
+    2. Before every command, drop the response memo if another process wrote to the database since the last one.
+    3. Print how long every command took.
+    4. Leave on exit, quit, bye or Ctrl+D. Ctrl+C stops the running command, not the shell.
+
+    Args:
+        app (typer.Typer): The CLI app.
+    """
+
+    import typer
+
+    from modules.Daemon import invoke_command
+    from modules.Database import createConnection
+    from modules.Dictionary import invalidate_response
+
+    command = typer.main.get_command(app)
+    console = Console()
+    conn = createConnection()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    enable_completion(command)
+
+    print(
+        Panel(
+            "[bold green]Vocabulary shell[/bold green]. Type any command without [bold]vocab[/bold], [bold]--help[/bold] to list them and [bold]exit[/bold] to leave. 🐚"
+        )
+    )
+    while True:
+        try:
+            line = console.input("[bold blue]vocab>[/bold blue] ")
+        except EOFError:
+            break
+        except KeyboardInterrupt:
+            console.print()
+            continue
+
+        try:
+            argv = shlex.split(line)
+        except ValueError as error:
+            print(Panel(f"[bold red]Can't read the command[/bold red]: {error} 😢"))
+            continue
+        if not argv:
+            continue
+        if argv[0] in EXIT_COMMANDS:
+            break
+        if argv[0] == "shell":
+            print(Panel("You are already in the shell. 🐚"))
+            continue
+
+        # another process changed the database, the memo may be stale
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != data_version:
+            invalidate_response()
+            data_version = version
+
+        started = time.perf_counter()
+        try:
+            exit_code = invoke_command(command, argv, sys.stderr)
+        except KeyboardInterrupt:
+            exit_code = 130
+        elapsed = (time.perf_counter() - started) * 1000
+        style = "red" if exit_code else "dim"
+        console.print(f"[{style}]⏱  {argv[0]} took {elapsed:.0f} ms[/{style}]")
+
+        if argv[0] == "bye":
+            return
+
+    print(Panel("👋🏼 [bold green]Bye bye![/bold green]"))
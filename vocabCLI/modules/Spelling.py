@@ -1,11 +1,11 @@
 from typing import *
 
 import nltk
+from Dictionary import get_spell_checker
 from rich import print
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
-from spellchecker import SpellChecker
 
 
 def spell_checker(string: str) -> str:
@@ -18,7 +18,7 @@ def spell_checker(string: str) -> str:
     4. Return the string with misspelled words highlighted in red.
     """
 
-    spell = SpellChecker()
+    spell = get_spell_checker()
 
     # string = "I havv goood speling! The age of the Universe is 13.8 billion years. I am 13 years old. knownsd is a surname."
 
@@ -1,17 +1,19 @@
 import contextlib
+import itertools
 import json
 import os
 import random
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import *
 
 import questionary
-import requests
 import typer
-from Database import createConnection, createTables
+from Database import REFRESH_RATE_LIMIT, RateLimiter, createConnection, createTables
 from Dictionary import *
 from Exceptions import *
+from Profiling import span
 from questionary import Style
 from rich import print
 from rich.console import Console
@@ -19,87 +21,315 @@ from rich.panel import Panel
 from rich.table import Table
 from Utils import *
 
+#######################
+# SCHEDULE FUNCTIONS #
+#######################
+
+
+# SM-2: the ease of a word never drops below SM2_MIN_EASE, its first reviews passed in a row are spaced by these days
+SM2_MIN_EASE = 1.3
+SM2_FIRST_INTERVALS = (1, 6)
+
+# words a --due session takes from the front of the queue, unless --number says otherwise
+DUE_BATCH = 20
+
+# quality of an answer from 0 to 5, below 3 the word starts over
+QUIZ_QUALITY = {True: 4, False: 1}
+# a word revised and set as learning wasn't known, one left as it was is known, one set as mastered is easy
+REVISION_QUALITY = {"learning": 2, None: 3, "mastered": 5}
+
+
+def sm2(
+    ease: float, interval: int, repetitions: int, quality: int
+) -> Tuple[float, int, int]:
+    """
+    Returns the schedule of a word after a review, the SuperMemo 2 way.
+
+    1. An answer of quality below 3 starts the word over, it is due again after the first interval
+    2. Otherwise the word is due after the next of SM2_FIRST_INTERVALS, then after its last interval times its ease
+    3. The ease goes up after easy answers and down after hard ones, down to SM2_MIN_EASE
+
+    Args:
+        ease (float): Ease of the word before the review.
+        interval (int): Days between the last two reviews.
+        repetitions (int): Reviews passed in a row.
+        quality (int): Quality of the answer, from 0 to 5.
+
+    Returns:
+        Tuple[float, int, int]: ease, interval in days and repetitions after the review.
+    """
+
+    if quality < 3:
+        repetitions, interval = 0, SM2_FIRST_INTERVALS[0]
+    else:
+        if repetitions < len(SM2_FIRST_INTERVALS):
+            interval = SM2_FIRST_INTERVALS[repetitions]
+        else:
+            interval = round(interval * ease)
+        repetitions += 1
+    ease = max(SM2_MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return ease, interval, repetitions
+
+
+def schedule_reviews(
+    c: Cursor, grades: Dict[str, int], now: Optional[datetime] = None
+) -> None:
+    """
+    Moves the words of a quiz or a revision along their schedule, inside the caller's transaction.
+
+    1. Reads the schedules of the words, in batches
+    2. Works out the next schedule of every word with sm2, it is due interval days after the review
+    3. Writes them all back with one statement. Words that were never looked up have no schedule and are left out
+
+    Args:
+        c (Cursor): Cursor of the caller's transaction.
+        grades (Dict[str, int]): word -> quality of the answer, from 0 to 5.
+        now (datetime, optional): Time of the review. Defaults to now.
+    """
+
+    now = now or datetime.now()
+    reviewed_at = now.strftime("%Y-%m-%d %H:%M:%S")
+    words = list(grades)
+    updates = []
+    for start in range(0, len(words), CACHE_READ_BATCH):
+        batch = words[start : start + CACHE_READ_BATCH]
+        c.execute(
+            f"SELECT word, ease, interval, repetitions FROM word_schedule WHERE word IN ({', '.join('?' * len(batch))})",
+            batch,
+        )
+        for word, ease, interval, repetitions in c.fetchall():
+            ease, interval, repetitions = sm2(ease, interval, repetitions, grades[word])
+            due_at = (now + timedelta(days=interval)).strftime("%Y-%m-%d %H:%M:%S")
+            updates.append((ease, interval, repetitions, due_at, reviewed_at, word))
+    c.executemany(
+        "UPDATE word_schedule SET ease=?, interval=?, repetitions=?, due_at=?, reviewed_at=? WHERE word=?",
+        updates,
+    )
+
+
+def next_due() -> Optional[datetime]:
+    """
+    Returns when the first word of the review queue is due, read from the front of the due_at index.
+
+    Returns:
+        datetime: The earliest due time, None if no word has a schedule.
+    """
+
+    conn = createConnection()
+    c = conn.cursor()
+    c.execute("SELECT MIN(due_at) FROM word_schedule")
+    due_at = c.fetchone()[0]
+    return datetime.fromisoformat(due_at) if due_at else None
+
+
+def select_due(c: Cursor, number: Optional[int] = None) -> None:
+    """
+    Selects the next words due for review, the most overdue first, for start_revision or start_quiz to fetch.
+
+    1. Raises NoWordsDueException if no word is due yet
+    2. Otherwise runs a range scan over the due_at index that stops after the batch, no word that isn't due is read
+
+    Args:
+        c (Cursor): Cursor the words are selected on.
+        number (int, optional): Number of words. Defaults to DUE_BATCH.
+
+    Raises:
+        NoWordsDueException: if no word is due yet.
+    """
+
+    now = datetime.now()
+    if (due := next_due()) is None or due > now:
+        raise NoWordsDueException(due)
+    c.execute(
+        "SELECT word FROM word_schedule WHERE due_at <= ? ORDER BY due_at LIMIT ?",
+        (now.strftime("%Y-%m-%d %H:%M:%S"), number or DUE_BATCH),
+    )
+
+
 #####################
 # REVISE FUNCTIONS #
 #####################
 
 
-def start_revision(c: Cursor, is_collection: bool = False) -> None:
+# words whose definitions are fetched ahead of the one being revised, if they are not cached
+REVISE_READ_AHEAD = 3
+
+
+def start_revision(
+    c: Cursor, is_collection: bool = False, log_lookups: bool = False
+) -> None:
     """
     Starts the revision process.
 
-    1. Fetches all the words in the collection from the database
-    2. For each word in the collection, it prints out the word and its definition
-    3. It asks the user if they want to set the word as learning
-    4. If the user says yes, then the word is set as learning
+    1. Fetches all the words in the collection from the database, then their definitions and their learning and mastered status in one query each
+    2. Words that are not cached are looked up on a background thread, REVISE_READ_AHEAD words ahead of the word being revised
+    3. For each word in the collection, it prints out the word and its definition. A lookup is only logged if log_lookups is set
+    4. It asks the user if they want to set the word as learning
     5. If the user says no, then the user is asked if they want to set the word as mastered
-    6. If the user says yes, then the word is set as mastered
-    7. If the user says no, then the user is asked if they want to stop revising
-    8. If the user says yes, then the program stops revising, else it continues revising
+    6. If the user says no, then the user is asked if they want to stop revising
+    7. If the user says yes, then the program stops revising, else it continues revising
+    8. The answers and the next review of every revised word are saved in one transaction when the revision ends, stopped or not
 
     Args:
         c: cursor object
         is_collection: boolean to check if the revision is from a collection, default is False.
+        log_lookups: boolean to log a lookup of every revised word, like define does, default is False.
     """
 
-    rows = c.fetchall()
-    for count, row in enumerate(rows, start=1):
-        print(
-            Panel(
-                title=f"[reverse]Revising word: [bold green]{count} / {len(rows)}[/bold green][/reverse]",
-                title_align="center",
-                renderable=f"{len(rows)-count} word(s) to go. Keep revising! 🧠",
-            )
-        )
-        definition(row[0])
-        if is_collection and not check_learning(row[0]):
+    words = [row[0] for row in c.fetchall()]
+    responses = cached_responses(words)
+    status = revision_status(words)
+    revised: List[str] = []
+    # word -> "learning" or "mastered"
+    answers: Dict[str, str] = {}
+
+    limiter = RateLimiter(REFRESH_RATE_LIMIT)
+    lookups: Dict[str, Future] = {}
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        for count, word in enumerate(words, start=1):
+            for upcoming in words[count - 1 : count + REVISE_READ_AHEAD]:
+                if upcoming not in responses and upcoming not in lookups:
+                    lookups[upcoming] = executor.submit(
+                        prefetch_response, upcoming, limiter
+                    )
+
             print(
                 Panel(
-                    f"Set [bold blue]{row[0]}[/bold blue] as [bold green]learning[/bold green] ?"
+                    title=f"[reverse]Revising word: [bold green]{count} / {len(words)}[/bold green][/reverse]",
+                    title_align="center",
+                    renderable=f"{len(words)-count} word(s) to go. Keep revising! 🧠",
                 )
             )
-            if sure := typer.confirm(""):
-                set_learning(row[0])
-            else:
+            if word not in responses:
+                with span("Waiting for lookups"):
+                    lookups[word].result()
+                # prints why if the word still can't be found
+                responses[word] = connect_to_api(word)
+            if responses[word]:
+                render_definition(word, responses[word])
+                revised.append(word)
+
+            learning, mastered = status.get(word, (False, False))
+            if is_collection and not learning:
                 print(
                     Panel(
-                        f"OK, not setting [bold blue]{row[0]}[/bold blue] as learning, you can always revise it via our collection ✍🏼"
+                        f"Set [bold blue]{word}[/bold blue] as [bold green]learning[/bold green] ?"
                     )
                 )
-                print("\n\n")
+                if sure := typer.confirm(""):
+                    answers[word] = "learning"
+                else:
+                    print(
+                        Panel(
+                            f"OK, not setting [bold blue]{word}[/bold blue] as learning, you can always revise it via our collection ✍🏼"
+                        )
+                    )
+                    print("\n\n")
 
-        # if word is not mastered then prompt user to set it as mastered
-        elif not check_mastered(row[0]):
-            print(
-                Panel(
-                    f"Set [bold blue]{row[0]}[/bold blue] as [bold green]mastered[/bold green] ?"
-                )
-            )
-            if sure := typer.confirm(""):
-                set_mastered(row[0])
-            else:
+            # if word is not mastered then prompt user to set it as mastered
+            elif not mastered:
                 print(
                     Panel(
-                        f"OK, not setting [bold blue]{row[0]}[/bold blue] as mastered, keep learning. ✍🏼"
+                        f"Set [bold blue]{word}[/bold blue] as [bold green]mastered[/bold green] ?"
                     )
                 )
-                print("\n\n")
-        else:
-            print(Panel("Press Y to Stop Revision. Enter to continue 📖"))
-            if not (sure := typer.confirm("")):
-                continue
-            print(Panel("OK, stopping revision. 🛑"))
-            break
-    # else:
-    #     print(Panel(title="[b reverse red]  Error!  [/b reverse red]",
-    #             title_align="center",
-    #             padding=(1, 1),
-    #             renderable="No words to revise in the selected category. Look up some more words first by using 'define' command.")
-    #     )
+                if sure := typer.confirm(""):
+                    answers[word] = "mastered"
+                else:
+                    print(
+                        Panel(
+                            f"OK, not setting [bold blue]{word}[/bold blue] as mastered, keep learning. ✍🏼"
+                        )
+                    )
+                    print("\n\n")
+            else:
+                print(Panel("Press Y to Stop Revision. Enter to continue 📖"))
+                if not (sure := typer.confirm("")):
+                    continue
+                print(Panel("OK, stopping revision. 🛑"))
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        save_revision(answers, revised, log_lookups)
+
+
+def revision_status(words: List[str]) -> Dict[str, Tuple[bool, bool]]:
+    """
+    Returns the learning and mastered status of the words of a revision.
+
+    Args:
+        words (List[str]): Words of the revision.
+
+    Returns:
+        Dict[str, Tuple[bool, bool]]: word -> (learning, mastered), for the words that were looked up before.
+    """
+
+    conn = createConnection()
+    c = conn.cursor()
+    status = {}
+    for start in range(0, len(words), CACHE_READ_BATCH):
+        batch = words[start : start + CACHE_READ_BATCH]
+        c.execute(
+            f"SELECT word, learning, mastered FROM word_state WHERE word IN ({', '.join('?' * len(batch))})",
+            batch,
+        )
+        status.update(
+            (word, (bool(learning), bool(mastered)))
+            for word, learning, mastered in c.fetchall()
+        )
+    return status
+
+
+def save_revision(
+    answers: Dict[str, str], revised: List[str], log_lookups: bool = False
+) -> None:
+    """
+    Saves the answers of a revision, the next review of the revised words and the lookups if they are logged, in one transaction.
+
+    1. Words of a collection that were never looked up get their word_state row first, and with it a schedule
+    2. Setting a word as learning takes it off the mastered list and the other way around
+    3. Every revised word is scheduled with the REVISION_QUALITY of its answer
+    4. Lookups get the time the revision ended
+
+    Args:
+        answers (Dict[str, str]): word -> "learning" or "mastered"
+        revised (List[str]): Words whose definition was shown.
+        log_lookups (bool, optional): Log a lookup of every revised word. Defaults to False.
+    """
+
+    if not answers and not revised:
+        return
+
+    conn = createConnection()
+    c = conn.cursor()
+    learning = [(word,) for word, answer in answers.items() if answer == "learning"]
+    mastered = [(word,) for word, answer in answers.items() if answer == "mastered"]
+    now = datetime.now()
+    if log_lookups:
+        c.executemany(
+            "INSERT INTO words (word, datetime) VALUES (?, ?)",
+            [(word, now.strftime("%Y-%m-%d %H:%M:%S.%f")) for word in dict.fromkeys(revised)],
+        )
+    c.executemany("INSERT OR IGNORE INTO word_state (word) VALUES (?)", learning + mastered)
+    c.executemany("UPDATE word_state SET learning=1, mastered=0 WHERE word=?", learning)
+    c.executemany("UPDATE word_state SET mastered=1, learning=0 WHERE word=?", mastered)
+    schedule_reviews(
+        c, {word: REVISION_QUALITY[answers.get(word)] for word in revised}, now
+    )
+    conn.commit()
+
+    if answers:
+        print(
+            Panel(
+                f"📝 Set [bold green]{len(learning)}[/bold green] word(s) as learning and [bold green]{len(mastered)}[/bold green] word(s) as mastered."
+            )
+        )
 
 
 def revise_all(
     number: Optional[int] = None,
+    log_lookups: bool = False,
 ) -> None:  # sourcery skip: remove-redundant-if
     """
     Revise all words in the database.
@@ -110,6 +340,7 @@ def revise_all(
 
     Args:
         number: number of words to revise, default is None.
+        log_lookups: log a lookup of every revised word, default is False.
 
     Raises:
         NoWordsInDBException: if there are no words in the database.
@@ -123,18 +354,20 @@ def revise_all(
         if count_all_words() == 0:
             raise NoWordsInDBException()
     if not number:
-        c.execute("SELECT DISTINCT word FROM words ORDER BY RANDOM()")
-        start_revision(c)
+        c.execute("SELECT word FROM word_state ORDER BY RANDOM()")
+        start_revision(c, log_lookups=log_lookups)
 
     elif number:
         c.execute(
-            "SELECT DISTINCT word FROM words ORDER BY RANDOM() LIMIT ?", (number,)
+            "SELECT word FROM word_state ORDER BY RANDOM() LIMIT ?", (number,)
         )
-        start_revision(c)
+        start_revision(c, log_lookups=log_lookups)
 
 
 def revise_tag(
-    number: Optional[int] = None, tag: Optional[str] = None
+    number: Optional[int] = None,
+    tag: Optional[str] = None,
+    log_lookups: bool = False,
 ) -> None:  # sourcery skip: remove-redundant-if
     """
     Revise words in a specific tag.
@@ -142,6 +375,7 @@ def revise_tag(
     Args:
         number: number of words to revise, default is None.
         tag: tag to revise, default is None.
+        log_lookups: log a lookup of every revised word, default is False.
     """
 
     conn = createConnection()
@@ -154,26 +388,28 @@ def revise_tag(
                 raise NoSuchTagException(tag=tag)
     if tag and not number:
         c.execute(
-            "SELECT DISTINCT word FROM words where tag=? ORDER BY RANDOM()", (tag,)
+            "SELECT word FROM word_state where tag=? ORDER BY RANDOM()", (tag,)
         )
-        start_revision(c)
+        start_revision(c, log_lookups=log_lookups)
 
     elif number and tag:
         c.execute(
-            "SELECT DISTINCT word FROM words where tag=? ORDER BY RANDOM() LIMIT ?",
+            "SELECT word FROM word_state where tag=? ORDER BY RANDOM() LIMIT ?",
             (tag, number),
         )
-        start_revision(c)
+        start_revision(c, log_lookups=log_lookups)
 
 
 def revise_learning(
     number: Optional[int] = None,
+    log_lookups: bool = False,
 ) -> None:
     """
     Revise words in learning list.
 
     Args:
         number: number of words to revise, default is None.
+        log_lookups: log a lookup of every revised word, default is False.
     """
 
     conn = createConnection()
@@ -185,25 +421,27 @@ def revise_learning(
             raise NoWordsInLearningListException()
 
     if not number:
-        c.execute("SELECT DISTINCT word FROM words where learning=1 ORDER BY RANDOM()")
-        start_revision(c)
+        c.execute("SELECT word FROM word_state where learning=1 ORDER BY RANDOM()")
+        start_revision(c, log_lookups=log_lookups)
 
     if number:
         c.execute(
-            "SELECT DISTINCT word FROM words where learning=1 ORDER BY RANDOM() LIMIT ?",
+            "SELECT word FROM word_state where learning=1 ORDER BY RANDOM() LIMIT ?",
             (number,),
         )
-        start_revision(c)
+        start_revision(c, log_lookups=log_lookups)
 
 
 def revise_mastered(
     number: Optional[int] = None,
+    log_lookups: bool = False,
 ) -> None:
     """
     Revise words in mastered list.
 
     Args:
         number: number of words to revise, default is None.
+        log_lookups: log a lookup of every revised word, default is False.
     """
 
     conn = createConnection()
@@ -216,25 +454,27 @@ def revise_mastered(
             raise NoWordsInMasteredListException()
 
     if not number:
-        c.execute("SELECT DISTINCT word FROM words where mastered=1 ORDER BY RANDOM()")
-        start_revision(c)
+        c.execute("SELECT word FROM word_state where mastered=1 ORDER BY RANDOM()")
+        start_revision(c, log_lookups=log_lookups)
 
     if number:
         c.execute(
-            "SELECT DISTINCT word FROM words where mastered=1 ORDER BY RANDOM() LIMIT ?",
+            "SELECT word FROM word_state where mastered=1 ORDER BY RANDOM() LIMIT ?",
             (number,),
         )
-        start_revision(c)
+        start_revision(c, log_lookups=log_lookups)
 
 
 def revise_favorite(
     number: Optional[int] = None,
+    log_lookups: bool = False,
 ) -> None:
     """
     Revise words in favorite list.
 
     Args:
         number: number of words to revise, default is None.
+        log_lookups: log a lookup of every revised word, default is False.
     """
 
     conn = createConnection()
@@ -245,19 +485,21 @@ def revise_favorite(
             raise NoWordsInFavoriteListException()
 
     if not number:
-        c.execute("SELECT DISTINCT word FROM words where favorite=1 ORDER BY RANDOM()")
-        start_revision(c)
+        c.execute("SELECT word FROM word_state where favorite=1 ORDER BY RANDOM()")
+        start_revision(c, log_lookups=log_lookups)
 
     if number:
         c.execute(
-            "SELECT DISTINCT word FROM words where favorite=1 ORDER BY RANDOM() LIMIT ?",
+            "SELECT word FROM word_state where favorite=1 ORDER BY RANDOM() LIMIT ?",
             (number,),
         )
-        start_revision(c)
+        start_revision(c, log_lookups=log_lookups)
 
 
 def revise_collection(
-    number: Optional[int] = None, collectionName: Optional[str] = None
+    number: Optional[int] = None,
+    collectionName: Optional[str] = None,
+    log_lookups: bool = False,
 ) -> None:
     """
     Revise words in a collection.
@@ -265,6 +507,7 @@ def revise_collection(
     Args:
         number: number of words to revise, default is None.
         collectionName: name of the collection, default is None.
+        log_lookups: log a lookup of every revised word, default is False.
     """
 
     conn = createConnection()
@@ -283,14 +526,35 @@ def revise_collection(
             "SELECT word FROM collections where collection=? ORDER BY RANDOM()",
             (collectionName,),
         )
-        start_revision(c, is_collection=True)
+        start_revision(c, is_collection=True, log_lookups=log_lookups)
 
     elif number and collectionName:
         c.execute(
             "SELECT word FROM collections where collection=? ORDER BY RANDOM() LIMIT ?",
             (collectionName, number),
         )
-        start_revision(c, is_collection=True)
+        start_revision(c, is_collection=True, log_lookups=log_lookups)
+
+
+def revise_due(
+    number: Optional[int] = None,
+    log_lookups: bool = False,
+) -> None:
+    """
+    Revise the words that are due for review, the most overdue first.
+
+    Args:
+        number: number of words to revise, default is DUE_BATCH.
+        log_lookups: log a lookup of every revised word, default is False.
+    """
+
+    conn = createConnection()
+    c = conn.cursor()
+
+    # will stop the execution if no word is due yet
+    with contextlib.suppress(NoWordsDueException):
+        select_due(c, number)
+        start_revision(c, log_lookups=log_lookups)
 
 
 #####################
@@ -298,6 +562,206 @@ def revise_collection(
 #####################
 
 
+# wrong choices of every question, and the words drawn for them. The extra words stand in for definitions that repeat.
+QUIZ_DISTRACTORS = 3
+QUIZ_CANDIDATES = 2 * QUIZ_DISTRACTORS
+
+# a collection quiz looks up words of the collection that aren't cached until it has this many to draw from
+QUIZ_POOL_MIN = 20
+
+
+class QuizQuestion(NamedTuple):
+    word: str
+    answer: str
+    choices: List[str]
+
+
+def quiz_pool(collection: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Returns the words the wrong choices of a quiz are drawn from, by part of speech, from the quiz_definitions index.
+
+    Args:
+        collection (str, optional): If set, only the words of this collection, otherwise the answer would be obvious. Defaults to every word looked up.
+
+    Returns:
+        Dict[str, List[str]]: part of speech -> words with a definition of that part of speech, each word once.
+    """
+
+    conn = createConnection()
+    c = conn.cursor()
+    if collection:
+        c.execute(
+            """SELECT DISTINCT part_of_speech, quiz_definitions.word FROM collections
+            JOIN quiz_definitions ON quiz_definitions.word=collections.word WHERE collection=?""",
+            (collection,),
+        )
+    else:
+        c.execute(
+            "SELECT part_of_speech, word FROM word_state JOIN quiz_definitions USING (word)"
+        )
+    pool: Dict[str, List[str]] = {}
+    for part_of_speech, word in c.fetchall():
+        pool.setdefault(part_of_speech, []).append(word)
+    return pool
+
+
+def prefetch_quiz(words: List[str], collection: Optional[str] = None) -> None:
+    """
+    Looks up the words a quiz needs that are not in the quiz_definitions index yet, all at once, before it is built.
+
+    1. The quiz words that aren't cached
+    2. For a collection quiz, random words of the collection that aren't cached, until QUIZ_POOL_MIN words of the collection are
+    3. They are looked up concurrently by prefetch_words, the responses it caches go into the index through its triggers
+
+    Args:
+        words (List[str]): Words of the quiz.
+        collection (str, optional): Collection the wrong choices are drawn from. Defaults to None.
+    """
+
+    conn = createConnection()
+    c = conn.cursor()
+    missing = set(words)
+    for start in range(0, len(words), CACHE_READ_BATCH):
+        batch = words[start : start + CACHE_READ_BATCH]
+        # only the keys, the definitions are read once by build_quiz
+        c.execute(
+            f"SELECT word FROM quiz_definitions WHERE word IN ({', '.join('?' * len(batch))})",
+            batch,
+        )
+        missing.difference_update(row[0] for row in c.fetchall())
+    if collection:
+        c.execute(
+            """SELECT COUNT(DISTINCT collections.word) FROM collections
+            JOIN quiz_definitions ON quiz_definitions.word=collections.word WHERE collection=?""",
+            (collection,),
+        )
+        wanted = QUIZ_POOL_MIN - c.fetchone()[0] - len(missing)
+        if wanted > 0:
+            c.execute(
+                """SELECT DISTINCT word FROM collections WHERE collection=?
+                AND word NOT IN (SELECT word FROM quiz_definitions) ORDER BY RANDOM() LIMIT ?""",
+                (collection, wanted + len(missing)),
+            )
+            missing.update(row[0] for row in c.fetchall())
+
+    if missing:
+        with span("Looking up quiz words"):
+            for _ in prefetch_words(sorted(missing)):
+                pass
+
+
+def quiz_definitions(words: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+    """
+    Reads the part of speech and the definition a quiz shows for many words at once.
+
+    Args:
+        words (Iterable[str]): Words to read, repeats are read once.
+
+    Returns:
+        Dict[str, Tuple[str, str]]: word -> (part of speech, definition), for the words that are in the index.
+    """
+
+    conn = createConnection()
+    c = conn.cursor()
+    words = list(dict.fromkeys(words))
+    definitions = {}
+    for start in range(0, len(words), CACHE_READ_BATCH):
+        batch = words[start : start + CACHE_READ_BATCH]
+        c.execute(
+            f"SELECT word, part_of_speech, definition FROM quiz_definitions WHERE word IN ({', '.join('?' * len(batch))})",
+            batch,
+        )
+        definitions.update(
+            (word, (part_of_speech, definition))
+            for word, part_of_speech, definition in c.fetchall()
+        )
+    return definitions
+
+
+def build_quiz(
+    words: List[str],
+    pool: Dict[str, List[str]],
+    rng: random.Random = random,
+    fallback: Optional[Callable[[], Dict[str, List[str]]]] = None,
+) -> List[QuizQuestion]:
+    """
+    Builds every question of a quiz before the first one is asked.
+
+    1. Draw QUIZ_CANDIDATES words for every question from the pool words with the part of speech of the quiz word, in memory. Words of any part of speech make up for a part of speech with too few words.
+    2. Read the definitions of the quiz words and of all the drawn words with one query on the quiz_definitions index.
+    3. A quiz word that is not in the index is looked up, its wrong choices are drawn from the whole pool.
+    4. Every question gets the definition of its word and QUIZ_DISTRACTORS other definitions, shuffled.
+    5. If that leaves a question short of choices, because its part of speech and the words drawn have too few distinct definitions, it draws the rest from the fallback pool, or else the whole pool, with one more query.
+
+    Args:
+        words (List[str]): Words asked for, in order.
+        pool (Dict[str, List[str]]): part of speech -> words the wrong choices are drawn from, as returned by quiz_pool.
+        rng (random.Random, optional): Random generator. Defaults to the random module.
+        fallback (Callable, optional): Returns a bigger pool, only called if the pool runs out. Defaults to the pool itself.
+
+    Returns:
+        List[QuizQuestion]: The questions, without the words that have no definition.
+    """
+
+    def draw(word: str, part_of_speech: Optional[str]) -> List[str]:
+        same = pool.get(part_of_speech, [])
+        drawn = rng.sample(same, min(QUIZ_CANDIDATES + 1, len(same)))
+        # too few words of this part of speech, the other parts of speech make up for them
+        if len(set(drawn) - {word}) < QUIZ_DISTRACTORS:
+            drawn += rng.sample(everything, min(QUIZ_CANDIDATES + 1, len(everything)))
+        return drawn
+
+    def add_choices(
+        word: str, drawn: List[str], definitions: Dict[str, Tuple[str, str]]
+    ) -> None:
+        for candidate in drawn:
+            if len(choices[word]) > QUIZ_DISTRACTORS:
+                return
+            if candidate == word or candidate not in definitions:
+                continue
+            if (definition := definitions[candidate][1]) not in choices[word]:
+                choices[word].append(definition)
+
+    with span("Building quiz"):
+        everything = list(itertools.chain.from_iterable(pool.values()))
+        part_of_speech = {
+            word: part for part, pool_words in pool.items() for word in pool_words
+        }
+        candidates = {word: draw(word, part_of_speech.get(word)) for word in words}
+        definitions = quiz_definitions(itertools.chain(words, *candidates.values()))
+
+        # word -> right answer first, then the wrong ones
+        choices: Dict[str, List[str]] = {}
+        for word in words:
+            if word in definitions:
+                answer = definitions[word][1]
+            # prints why if the word can't be found
+            elif not (response := connect_to_api(word)) or not (
+                answer := first_definition(response)
+            ):
+                continue
+            choices[word] = [answer]
+            add_choices(word, candidates[word], definitions)
+
+        if short := [word for word in choices if len(choices[word]) <= QUIZ_DISTRACTORS]:
+            if fallback is not None:
+                everything = list(itertools.chain.from_iterable(fallback().values()))
+            drawn = {
+                word: rng.sample(everything, min(2 * QUIZ_CANDIDATES + 1, len(everything)))
+                for word in short
+            }
+            more = quiz_definitions(itertools.chain(*drawn.values()))
+            for word in short:
+                add_choices(word, drawn[word], more)
+
+        questions = []
+        for word, word_choices in choices.items():
+            answer = word_choices[0]
+            rng.shuffle(word_choices)
+            questions.append(QuizQuestion(word, answer, word_choices))
+    return questions
+
+
 def start_quiz(
     c: Cursor, collection=None, quizType: str = None
 ) -> None:  # sourcery skip: remove-redundant-if
@@ -307,14 +771,12 @@ def start_quiz(
     1. Fetches all the words in the collection or in the database, depending on the quiz type.
     2. Breaks out if the collection has less than 4 words, as the minimum number of words in a quiz is 4.
     3. Sets the style of the quiz.
-    4. Initializes the score and timer.
-    5. Iterates over the words in the collection/database.
-    6. Sets up the question.
-    7. Fetches the correct answer for the question.
-    8. Sets up the list of choices. If the quiz type is collection, the list of choices is made up of the correct answer and three fake answers from the collection. Otherwise, the list of choices is made up of the correct answer and three fake answers from the database.
-    9. Asks the question to the user and checks if the answer is correct.
-    10. If the answer is correct, increases the score and prints the success message. Otherwise, prints the failure message.
-    11. Prints the quiz summary and inserts the quiz history into the database.
+    4. Looks up the words that aren't cached together with prefetch_quiz, then builds every question up front with build_quiz. If the quiz type is collection, the list of choices is made up of the correct answer and three fake answers from the collection. Otherwise, the list of choices is made up of the correct answer and three fake answers from the database.
+    5. Initializes the score and timer.
+    6. Iterates over the questions.
+    7. Asks the question to the user and checks if the answer is correct.
+    8. If the answer is correct, increases the score and prints the success message. Otherwise, prints the failure message.
+    9. Prints the quiz summary, then inserts the quiz history, the answer to every question and the next review of every word asked. The caller commits them together.
 
     Args:
         c: cursor object.
@@ -344,53 +806,37 @@ def start_quiz(
             ]
         )
 
+        # every question is ready before the first one is asked
+        # the words that aren't cached are looked up together first, a collection with too few definitions borrows
+        # wrong choices from every word looked up
+        prefetch_quiz([row[0] for row in rows], collection)
+        questions = build_quiz(
+            [row[0] for row in rows],
+            quiz_pool(collection),
+            fallback=quiz_pool if collection else None,
+        )
+
         # initializing score and timer
         score = 0
+        # (word, correct, latency in ms) of every question
+        answers: List[Tuple[str, int, int]] = []
         tic = datetime.now()
 
         # iterating over questions
-        for count, row in enumerate(rows, start=1):
-
-            # setting up question
-            quiz_word = row[0]
-
+        for count, question in enumerate(questions, start=1):
             print(
                 Panel(
-                    title=f"[reverse]Question [bold green]#{count}/{len(rows)}[/bold green][/reverse]",
+                    title=f"[reverse]Question [bold green]#{count}/{len(questions)}[/bold green][/reverse]",
                     title_align="center",
                     padding=(1, 1),
-                    renderable=f"Choose the correct definition for: [bold u blue]{quiz_word}[/bold u blue]",
+                    renderable=f"Choose the correct definition for: [bold u blue]{question.word}[/bold u blue]",
                 )
             )
 
-            # answer
-            correct_definition = one_line_definition(quiz_word)
-
-            # question list with the correct answer
-            choices = [correct_definition]
-
-            # if taking quiz on a collection then only fake choices from the collection otherwise the answer will be obvious
-            if collection:
-                c.execute(
-                    "SELECT DISTINCT word FROM collections where collection=? and word!=? ORDER BY RANDOM() LIMIT 3",
-                    (
-                        collection,
-                        quiz_word,
-                    ),
-                )
-
-            # adding 3 fake choices from words in the database.
-            else:
-                c.execute(
-                    "SELECT DISTINCT word FROM words where word!=? ORDER BY RANDOM() LIMIT 3",
-                    (quiz_word,),
-                )
-            choices.extend(one_line_definition(row[0]) for row in c.fetchall())
-            random.shuffle(choices)
-
+            asked = time.perf_counter()
             user_choice = questionary.select(
                 f"",
-                choices=choices,
+                choices=question.choices,
                 style=fancy_style,
                 show_selected=True,
                 use_arrow_keys=True,
@@ -399,13 +845,17 @@ def start_quiz(
                 instruction=" ",
             ).ask()
 
-            if user_choice == correct_definition:
+            correct = user_choice == question.answer
+            answers.append(
+                (question.word, int(correct), round((time.perf_counter() - asked) * 1000))
+            )
+            if correct:
                 score += 1
                 print(Panel(f"✅ Correct! Score: [bold green]{score}[/bold green]"))
             else:
                 print(
                     Panel(
-                        f"❌ Incorrect! Score: [bold green]{score}[/bold green]\nCorrect answer was: [bold green]{correct_definition}[/bold green]"
+                        f"❌ Incorrect! Score: [bold green]{score}[/bold green]\nCorrect answer was: [bold green]{question.answer}[/bold green]"
                     )
                 )
             print("\n\n")
@@ -421,7 +871,7 @@ def start_quiz(
                 title="[b reverse white]  Quiz completed!  [/b reverse white]",
                 title_align="center",
                 padding=(1, 1),
-                renderable=f"🎯 [bold bright_magenta u]Score[/bold bright_magenta u]: [bold green]{score}[/bold green] / [bold green]{len(rows)}[/bold green]\n⏰ [bold bright_magenta u]Time Elapsed[/bold bright_magenta u]: [blue]{minutes:0.0f}M {seconds:0.0f}S[/blue]",
+                renderable=f"🎯 [bold bright_magenta u]Score[/bold bright_magenta u]: [bold green]{score}[/bold green] / [bold green]{len(questions)}[/bold green]\n⏰ [bold bright_magenta u]Time Elapsed[/bold bright_magenta u]: [blue]{minutes:0.0f}M {seconds:0.0f}S[/blue]",
             )
         )
 
@@ -431,11 +881,21 @@ def start_quiz(
             (
                 quizType,
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                len(rows),
+                len(questions),
                 score,
                 diff.seconds,
             ),
         )
+        c.executemany(
+            "INSERT INTO quiz_answers (word, correct, latency_ms, datetime) VALUES (?, ?, ?, ?)",
+            [
+                (word, correct, latency_ms, toc.strftime("%Y-%m-%d %H:%M:%S"))
+                for word, correct, latency_ms in answers
+            ],
+        )
+        schedule_reviews(
+            c, {word: QUIZ_QUALITY[bool(correct)] for word, correct, _ in answers}, toc
+        )
         c.close()
 
 
@@ -458,13 +918,13 @@ def quiz_all(
             raise NoWordsInDBException()
 
     if not number:
-        c.execute("SELECT DISTINCT word FROM words ORDER BY RANDOM()")
+        c.execute("SELECT word FROM word_state ORDER BY RANDOM()")
         start_quiz(c, quizType="all words")
         conn.commit()
 
     elif number:
         c.execute(
-            "SELECT DISTINCT word FROM words ORDER BY RANDOM() LIMIT ?", (number,)
+            "SELECT word FROM word_state ORDER BY RANDOM() LIMIT ?", (number,)
         )
         start_quiz(c, quizType="all words")
         conn.commit()
@@ -492,14 +952,14 @@ def quiz_tag(
 
     if tag and not number:
         c.execute(
-            "SELECT DISTINCT word FROM words where tag=? ORDER BY RANDOM()", (tag,)
+            "SELECT word FROM word_state where tag=? ORDER BY RANDOM()", (tag,)
         )
         start_quiz(c, quizType=f"tag: {tag}")
         conn.commit()
 
     elif number and tag:
         c.execute(
-            "SELECT DISTINCT word FROM words where tag=? ORDER BY RANDOM() LIMIT ?",
+            "SELECT word FROM word_state where tag=? ORDER BY RANDOM() LIMIT ?",
             (tag, number),
         )
         start_quiz(c, quizType=f"tag: {tag}")
@@ -524,13 +984,13 @@ def quiz_learning(number: Optional[int] = None) -> None:
             raise NoWordsInLearningListException()
 
     if not number:
-        c.execute("SELECT DISTINCT word FROM words where learning=1 ORDER BY RANDOM()")
+        c.execute("SELECT word FROM word_state where learning=1 ORDER BY RANDOM()")
         start_quiz(c, quizType="learning words")
         conn.commit()
 
     if number:
         c.execute(
-            "SELECT DISTINCT word FROM words where learning=1 ORDER BY RANDOM() LIMIT ?",
+            "SELECT word FROM word_state where learning=1 ORDER BY RANDOM() LIMIT ?",
             (number,),
         )
         start_quiz(c, quizType="learning words")
@@ -554,13 +1014,13 @@ def quiz_mastered(number: Optional[int] = None) -> None:
             raise NoWordsInMasteredListException()
 
     if not number:
-        c.execute("SELECT DISTINCT word FROM words where mastered=1 ORDER BY RANDOM()")
+        c.execute("SELECT word FROM word_state where mastered=1 ORDER BY RANDOM()")
         start_quiz(c, quizType="mastered words")
         conn.commit()
 
     if number:
         c.execute(
-            "SELECT DISTINCT word FROM words where mastered=1 ORDER BY RANDOM() LIMIT ?",
+            "SELECT word FROM word_state where mastered=1 ORDER BY RANDOM() LIMIT ?",
             (number,),
         )
         start_quiz(c, quizType="mastered words")
@@ -584,13 +1044,13 @@ def quiz_favorite(number: Optional[int] = None) -> None:
             raise NoWordsInFavoriteListException()
 
     if not number:
-        c.execute("SELECT DISTINCT word FROM words where favorite=1 ORDER BY RANDOM()")
+        c.execute("SELECT word FROM word_state where favorite=1 ORDER BY RANDOM()")
         start_quiz(c, quizType="favorite words")
         conn.commit()
 
     if number:
         c.execute(
-            "SELECT DISTINCT word FROM words where favorite=1 ORDER BY RANDOM() LIMIT ?",
+            "SELECT word FROM word_state where favorite=1 ORDER BY RANDOM() LIMIT ?",
             (number,),
         )
         start_quiz(c, quizType="favorite words")
@@ -651,20 +1111,70 @@ def quiz_collection(
         conn.commit()
 
 
+def quiz_due(number: Optional[int] = None) -> None:
+    """
+    Quiz the words that are due for review, the most overdue first.
+
+    Args:
+        number: number of words to quiz, default is DUE_BATCH.
+    """
+
+    conn = createConnection()
+    c = conn.cursor()
+
+    # will stop the execution if no word is due yet
+    with contextlib.suppress(NoWordsDueException):
+        select_due(c, number)
+        start_quiz(c, quizType="due words")
+        conn.commit()
+
+
+def quiz_weak(number: int) -> None:
+    """
+    Quiz the words answered wrong most often, from the accuracy index of word_quiz_stats.
+
+    Args:
+        number: number of words to quiz.
+    """
+
+    conn = createConnection()
+    c = conn.cursor()
+
+    # will stop the execution if no quiz was answered yet
+    with contextlib.suppress(NoQuizAnswersException):
+        c.execute("SELECT 1 FROM word_quiz_stats LIMIT 1")
+        if not c.fetchone():
+            raise NoQuizAnswersException()
+        # the lowest accuracy first, the word answered most often first among equals
+        c.execute(
+            "SELECT word FROM word_quiz_stats ORDER BY accuracy, attempts DESC LIMIT ?",
+            (number,),
+        )
+        start_quiz(c, quizType="weak words")
+        conn.commit()
+
+
+# quizzes and words listed by quiz --history, the totals cover every quiz
+QUIZ_HISTORY_RECENT = 10
+QUIZ_HISTORY_WEAK = 5
+
+
 def show_quiz_history() -> None:
     """
     Show quiz history.
 
-    1. Execute SQL SELECT statement to get all the rows from the quiz_history table.
-    2. If there are no rows, print a message and return.
-    3. Else print the quiz history in a table.
+    1. Reads the totals of every quiz type from quiz_type_stats, which triggers keep up to date, instead of adding up every quiz.
+    2. If there are none, print a message and return.
+    3. Else print the totals, the QUIZ_HISTORY_RECENT latest quizzes read through the datetime index and the QUIZ_HISTORY_WEAK weakest words read through the accuracy index.
     """
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("SELECT * FROM quiz_history ORDER BY datetime DESC")
-    rows = c.fetchall()
-    if not rows:
+    c.execute(
+        "SELECT type, quizzes, questions, points, duration, last_datetime FROM quiz_type_stats ORDER BY last_datetime DESC"
+    )
+    totals = c.fetchall()
+    if not totals:
         print(
             Panel(
                 title="[b reverse red]  Error!  [/b reverse red]",
@@ -677,13 +1187,40 @@ def show_quiz_history() -> None:
 
     # ----------------- Table -----------------#
 
-    table = Table(show_header=True, header_style="bold green")
+    table = Table(
+        title="📊 Quiz Statistics", show_header=True, header_style="bold green"
+    )
+    table.add_column("Quiz Type", style="cyan")
+    table.add_column("Quizzes")
+    table.add_column("Score")
+    table.add_column("Average Duration")
+    table.add_column("Last Attempt")
+
+    for quiz_type, quizzes, questions, points, duration, last_datetime in totals:
+        last = datetime.strptime(last_datetime, "%Y-%m-%d %H:%M:%S").strftime(
+            "%d %b '%y | %H:%M"
+        )
+        score = f"{points}/{questions} ({points / questions:.0%})" if questions else "-"
+        table.add_row(quiz_type, str(quizzes), score, f"{duration // quizzes} seconds", last)
+    print(table)
+
+    # ----------------- Table -----------------#
+
+    c.execute(
+        "SELECT type, datetime, question_count, points, duration FROM quiz_history ORDER BY datetime DESC LIMIT ?",
+        (QUIZ_HISTORY_RECENT,),
+    )
+    table = Table(
+        title=f"🕒 Last {QUIZ_HISTORY_RECENT} quizzes",
+        show_header=True,
+        header_style="bold green",
+    )
     table.add_column("Quiz Type", style="cyan")
     table.add_column("Date & Time of Attempt")
     table.add_column("Score")
     table.add_column("Duration")
 
-    for row in rows:
+    for row in c.fetchall():
         history = datetime.strptime(row[1], "%Y-%m-%d %H:%M:%S").strftime(
             "%d %b '%y | %H:%M"
         )
@@ -694,3 +1231,27 @@ def show_quiz_history() -> None:
     print(table)
 
     # ----------------- Table -----------------#
+
+    c.execute(
+        "SELECT word, attempts, correct, latency_ms FROM word_quiz_stats ORDER BY accuracy, attempts DESC LIMIT ?",
+        (QUIZ_HISTORY_WEAK,),
+    )
+    if rows := c.fetchall():
+        table = Table(
+            title=f"🎯 Weakest {QUIZ_HISTORY_WEAK} words",
+            caption="Take a quiz on them with 'quiz --weak N'",
+            show_header=True,
+            header_style="bold green",
+        )
+        table.add_column("Word", style="cyan")
+        table.add_column("Correct")
+        table.add_column("Average Answer Time")
+        for word, attempts, correct, latency_ms in rows:
+            table.add_row(
+                word,
+                f"{correct}/{attempts} ({correct / attempts:.0%})",
+                f"{latency_ms / attempts / 1000:.1f} seconds",
+            )
+        print(table)
+
+    # ----------------- Table -----------------#
@@ -1,6 +1,7 @@
 import nltk
 from Dictionary import *
 from nltk.corpus import wordnet
+from Profiling import span
 from rich import box, print
 from rich.columns import Columns
 from rich.console import Console
@@ -26,7 +27,7 @@ def find_synonym(query: str) -> None:
         query (str): Word to find synonyms for.
     """
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Searching Synonyms"), Progress(
             SpinnerColumn(spinner_name="point", style="bold violet"),
             TextColumn(
                 "[progress.description]{task.description}",
@@ -112,7 +113,7 @@ def find_antonym(query: str) -> None:  # sourcery skip: for-append-to-extend
     """
 
     # ----------------- Spinner -----------------#
-    with Progress(
+    with span("Searching Antonyms"), Progress(
         SpinnerColumn(spinner_name="point", style="bold violet"),
         TextColumn(
             "[progress.description]{task.description}",
@@ -7,13 +7,15 @@ from pathlib import Path
 from sqlite3 import *
 from typing import *
 
-import requests
 import typer
-from Database import createConnection, createTables
+from Database import (
+    createConnection,
+    createTables,
+    rebuild_lookup_streaks,
+    to_epoch,
+)
 from Dictionary import *
 from Exceptions import *
-from playsound import playsound
-from requests import exceptions
 from rich import box, print
 from rich.columns import Columns
 from rich.console import Console
@@ -39,7 +41,7 @@ def check_word_exists(query: str) -> bool:
     c = conn.cursor()
     # check if word exists in the database
     with contextlib.suppress(WordNeverSearchedException):
-        c.execute("SELECT * FROM words WHERE word=?", (query,))
+        c.execute("SELECT word FROM word_state WHERE word=?", (query,))
         if not c.fetchone():
             raise WordNeverSearchedException(query)
         return True
@@ -83,7 +85,7 @@ def fetch_word_history(word: str) -> None:
         )
 
         for row in rows:
-            history = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S").strftime(
+            history = datetime.fromisoformat(row[0]).strftime(
                 "%d %b '%y | %H:%M"
             )
             table.add_row(history)
@@ -118,9 +120,9 @@ def add_tag(query: str, tagName: str) -> None:
     check_word_exists(query)
 
     # if word already exists in the database with no tags, then add the tag to add words
-    c.execute("SELECT * FROM words WHERE word=? and tag is NULL", (query,))
+    c.execute("SELECT * FROM word_state WHERE word=? and tag is NULL", (query,))
     if c.fetchone():
-        c.execute("UPDATE words SET tag=? WHERE word=?", (tagName, query))
+        c.execute("UPDATE word_state SET tag=? WHERE word=?", (tagName, query))
         conn.commit()
         print(
             Panel(
@@ -133,9 +135,9 @@ def add_tag(query: str, tagName: str) -> None:
         return
 
     # if word already exists in the database with tags, then overwrite the tags
-    c.execute("SELECT * FROM words WHERE word=? and tag is not NULL", (query,))
+    c.execute("SELECT * FROM word_state WHERE word=? and tag is not NULL", (query,))
     if c.fetchone():
-        c.execute("UPDATE words SET tag=? WHERE word=?", (tagName, query))
+        c.execute("UPDATE word_state SET tag=? WHERE word=?", (tagName, query))
         conn.commit()
         print(
             Panel(
@@ -166,12 +168,12 @@ def remove_tag(query: str) -> None:
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("SELECT * FROM words WHERE word=?", (query,))
+    c.execute("SELECT word FROM word_state WHERE word=?", (query,))
     if c.fetchone():
-        c.execute("SELECT word FROM words WHERE word=? and tag is not NULL", (query,))
+        c.execute("SELECT word FROM word_state WHERE word=? and tag is not NULL", (query,))
         if c.fetchone():
             # word exists with tag
-            c.execute("UPDATE words SET tag=NULL WHERE word=?", (query,))
+            c.execute("UPDATE word_state SET tag=NULL WHERE word=?", (query,))
             conn.commit()
             print(
                 Panel(
@@ -220,19 +222,16 @@ def set_mastered(query: str) -> None:
     check_word_exists(query)
 
     # check if word is already mastered
-    c.execute("SELECT * FROM words WHERE word=? and mastered=?", (query, 1))
+    c.execute("SELECT * FROM word_state WHERE word=? and mastered=?", (query, 1))
     if c.fetchone():
         print(Panel(f"[bold blue]{query}[/bold blue] is already marked as mastered. ✅"))
         return
 
-    # check if word is set to learning and remove it from learning
-    c.execute("SELECT * FROM words WHERE word=? and learning=?", (query, 1))
-    if c.fetchone():
-        c.execute("UPDATE words SET learning=0 WHERE word=?", (query,))
-
-    c.execute("UPDATE words SET mastered=1 WHERE word=?", (query,))
+    # set word as mastered and remove it from learning in the same update
+    c.execute("UPDATE word_state SET mastered=1, learning=0 WHERE word=?", (query,))
+    # commit even when nothing changed, an open transaction would block the writers on other threads
+    conn.commit()
     if c.rowcount > 0:
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Success!  [/b reverse green]",
@@ -261,7 +260,7 @@ def check_mastered(query: str) -> bool:
     conn = createConnection()
     c = conn.cursor()
 
-    c.execute("SELECT mastered FROM words WHERE word=? and mastered=1", (query,))
+    c.execute("SELECT mastered FROM word_state WHERE word=? and mastered=1", (query,))
     return bool(row := c.fetchall())
 
 
@@ -283,7 +282,7 @@ def check_learning(query: str) -> bool:
     conn = createConnection()
     c = conn.cursor()
 
-    c.execute("SELECT learning FROM words WHERE word=? and learning=1", (query,))
+    c.execute("SELECT learning FROM word_state WHERE word=? and learning=1", (query,))
     return bool(row := c.fetchall())
 
 
@@ -308,7 +307,7 @@ def set_unmastered(query: str) -> None:
     check_word_exists(query)
 
     # check if word is already mastered
-    c.execute("SELECT * FROM words WHERE word=? and mastered=?", (query, 0))
+    c.execute("SELECT * FROM word_state WHERE word=? and mastered=?", (query, 0))
     if c.fetchone():
         print(
             Panel(
@@ -320,9 +319,9 @@ def set_unmastered(query: str) -> None:
         )
         return
 
-    c.execute("UPDATE words SET mastered=0 WHERE word=?", (query,))
+    c.execute("UPDATE word_state SET mastered=0 WHERE word=?", (query,))
+    conn.commit()
     if c.rowcount > 0:
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Success!  [/b reverse green]",
@@ -355,7 +354,7 @@ def set_learning(query: str) -> None:
     check_word_exists(query)
 
     # check if word is already mastered
-    c.execute("SELECT * FROM words WHERE word=? and mastered=1", (query,))
+    c.execute("SELECT * FROM word_state WHERE word=? and mastered=1", (query,))
     if c.fetchone():
         print(
             Panel(
@@ -365,22 +364,20 @@ def set_learning(query: str) -> None:
                 renderable=f"🛑 [bold dark_slate_gray1]WARNING[/bold dark_slate_gray1] Are you sure you want to move word [bold blue]{query}[/bold blue] from [b]mastered to learning[/b]?",
             )
         )
-        if sure := typer.confirm(""):
-            c.execute("UPDATE words SET mastered=0 WHERE word=?", (query,))
-        else:
+        if not (sure := typer.confirm("")):
             print(Panel(f"OK, not moving [bold blue]{query}[/bold blue] to learning."))
             return
 
     # check if word is already learning
-    c.execute("SELECT * FROM words WHERE word=? and learning=?", (query, 1))
+    c.execute("SELECT * FROM word_state WHERE word=? and learning=?", (query, 1))
     if c.fetchone():
         print(Panel(f"[bold blue]{query}[/bold blue] is already marked as learning. ✅"))
         return
 
-    # set word as learning
-    c.execute("UPDATE words SET learning=1 WHERE word=?", (query,))
+    # set word as learning, a mastered word is moved out of mastered in the same update
+    c.execute("UPDATE word_state SET learning=1, mastered=0 WHERE word=?", (query,))
+    conn.commit()
     if c.rowcount > 0:
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Success!  [/b reverse green]",
@@ -412,7 +409,7 @@ def set_unlearning(query: str) -> None:
     check_word_exists(query)
 
     # check if word is not already unlearned
-    c.execute("SELECT * FROM words WHERE word=? and learning=?", (query, 0))
+    c.execute("SELECT * FROM word_state WHERE word=? and learning=?", (query, 0))
     if c.fetchone():
         print(
             Panel(
@@ -424,13 +421,10 @@ def set_unlearning(query: str) -> None:
         )
         return
 
-    # check if word is already learning
-    c.execute("SELECT * FROM words WHERE word=? and learning=?", (query, 1))
-    if c.fetchone():
-        c.execute("UPDATE words SET learning=0 WHERE word=?", (query,))
-
+    # remove word from learning
+    c.execute("UPDATE word_state SET learning=0 WHERE word=? and learning=1", (query,))
+    conn.commit()
     if c.rowcount > 0:
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Delete Successful!  [/b reverse green]",
@@ -462,7 +456,7 @@ def set_favorite(query: str) -> None:
     check_word_exists(query)
 
     # check if word is already favorite
-    c.execute("SELECT * FROM words WHERE word=? and favorite=?", (query, 1))
+    c.execute("SELECT * FROM word_state WHERE word=? and favorite=?", (query, 1))
     if c.fetchone():
         print(
             Panel(
@@ -471,9 +465,9 @@ def set_favorite(query: str) -> None:
         )
         return
 
-    c.execute("UPDATE words SET favorite=1 WHERE word=?", (query,))
+    c.execute("UPDATE word_state SET favorite=1 WHERE word=?", (query,))
+    conn.commit()
     if c.rowcount > 0:
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Success!  [/b reverse green]",
@@ -505,7 +499,7 @@ def set_unfavorite(query: str) -> None:
     check_word_exists(query)
 
     # check if word was never favorited
-    c.execute("SELECT * FROM words WHERE word=? and favorite=?", (query, 0))
+    c.execute("SELECT * FROM word_state WHERE word=? and favorite=?", (query, 0))
     if c.fetchone():
         print(
             Panel(
@@ -518,10 +512,10 @@ def set_unfavorite(query: str) -> None:
         return
 
     # set word to favorite
-    c.execute("UPDATE words SET favorite=0 WHERE word=?", (query,))
+    c.execute("UPDATE word_state SET favorite=0 WHERE word=?", (query,))
 
+    conn.commit()
     if c.rowcount > 0:
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Delete Successful!  [/b reverse green]",
@@ -543,9 +537,9 @@ def count_all_words() -> int:
 
     conn = createConnection()
     c = conn.cursor()
-    sql = "SELECT DISTINCT word FROM words"
+    sql = "SELECT COUNT(*) FROM word_state"
     c.execute(sql)
-    return len(rows) if (rows := c.fetchall()) else 0
+    return c.fetchone()[0]
 
 
 # no tests for this function as it is not called anywhere in the command directly
@@ -559,9 +553,9 @@ def count_mastered() -> int:
 
     conn = createConnection()
     c = conn.cursor()
-    sql = "SELECT DISTINCT word FROM words WHERE mastered=1"
+    sql = "SELECT COUNT(*) FROM word_state WHERE mastered=1"
     c.execute(sql)
-    return len(rows) if (rows := c.fetchall()) else 0
+    return c.fetchone()[0]
 
 
 # no tests for this function as it is not called anywhere in the command directly
@@ -575,9 +569,9 @@ def count_learning() -> int:
 
     conn = createConnection()
     c = conn.cursor()
-    sql = "SELECT DISTINCT word FROM words WHERE learning=1"
+    sql = "SELECT COUNT(*) FROM word_state WHERE learning=1"
     c.execute(sql)
-    return len(rows) if (rows := c.fetchall()) else 0
+    return c.fetchone()[0]
 
 
 # no tests for this function as it is not called anywhere in the command directly
@@ -591,9 +585,9 @@ def count_favorite() -> int:
 
     conn = createConnection()
     c = conn.cursor()
-    sql = "SELECT DISTINCT word FROM words WHERE favorite=1"
+    sql = "SELECT COUNT(*) FROM word_state WHERE favorite=1"
     c.execute(sql)
-    return len(rows) if (rows := c.fetchall()) else 0
+    return c.fetchone()[0]
 
 
 # no tests for this function as it is not called anywhere in the command directly
@@ -607,9 +601,9 @@ def count_tag(tag: str) -> int:
 
     conn = createConnection()
     c = conn.cursor()
-    sql = "SELECT DISTINCT word FROM words WHERE tag=?"
+    sql = "SELECT COUNT(*) FROM word_state WHERE tag=?"
     c.execute(sql, (tag,))
-    return len(rows) if (rows := c.fetchall()) else 0
+    return c.fetchone()[0]
 
 
 def get_random_word_definition_from_api() -> None:
@@ -632,7 +626,7 @@ def get_random_word_from_learning_set() -> None:
     conn = createConnection()
     c = conn.cursor()
     c.execute(
-        "SELECT DISTINCT word FROM words WHERE learning=1 ORDER BY RANDOM() LIMIT 1"
+        "SELECT word FROM word_state WHERE learning=1 ORDER BY RANDOM() LIMIT 1"
     )
     rows = c.fetchall()
 
@@ -658,7 +652,7 @@ def get_random_word_from_mastered_set() -> None:
     conn = createConnection()
     c = conn.cursor()
     c.execute(
-        "SELECT DISTINCT word FROM words WHERE mastered=1 ORDER BY RANDOM() LIMIT 1"
+        "SELECT word FROM word_state WHERE mastered=1 ORDER BY RANDOM() LIMIT 1"
     )
     rows = c.fetchall()
 
@@ -685,7 +679,7 @@ def get_random_word_from_favorite_set() -> None:
     conn = createConnection()
     c = conn.cursor()
     c.execute(
-        "SELECT DISTINCT word FROM words WHERE favorite=1 ORDER BY RANDOM() LIMIT 1"
+        "SELECT word FROM word_state WHERE favorite=1 ORDER BY RANDOM() LIMIT 1"
     )
     rows = c.fetchall()
     with contextlib.suppress(NoWordsInFavoriteListException):
@@ -714,7 +708,7 @@ def get_random_word_from_tag(tagName: str) -> None:
     conn = createConnection()
     c = conn.cursor()
     c.execute(
-        "SELECT DISTINCT word FROM words WHERE tag=? ORDER BY RANDOM() LIMIT 1",
+        "SELECT word FROM word_state WHERE tag=? ORDER BY RANDOM() LIMIT 1",
         (tagName,),
     )
     rows = c.fetchall()
@@ -766,19 +760,19 @@ def show_list(
     c = conn.cursor()
 
     if mastered:
-        c.execute("SELECT DISTINCT word FROM words WHERE mastered=1 ORDER BY word ASC")
+        c.execute("SELECT word FROM word_state WHERE mastered=1 ORDER BY word ASC")
         success_message = "✅ [bold green]Mastered[/bold green]"
         error_message = (
             "You have not [bold green]mastered[/bold green] any words yet. ❌"
         )
 
     elif learning:
-        c.execute("SELECT DISTINCT word FROM words WHERE learning=1 ORDER BY word ASC")
+        c.execute("SELECT word FROM word_state WHERE learning=1 ORDER BY word ASC")
         success_message = "🧠 [bold blue]Learning[/bold blue]"
         error_message = "You have not added any words to the [bold blue]learning list[/bold blue] yet. ❌"
 
     elif favorite:
-        c.execute("SELECT DISTINCT word FROM words WHERE favorite=1 ORDER BY word ASC")
+        c.execute("SELECT word FROM word_state WHERE favorite=1 ORDER BY word ASC")
         success_message = "💙 [bold gold1]Favorite[/bold gold1]"
         error_message = "You have not added any words to the [bold gold1]favorite[/bold gold1] list yet. ❌"
 
@@ -794,11 +788,13 @@ def show_list(
             )
             return
 
-        c.execute(
-            f"SELECT DISTINCT word FROM words where datetime > datetime('now' , '-{days} days')"
-        )
         date_today = datetime.now().strftime("%d/%m/%Y")
         date_before = datetime.now() - timedelta(days=int(days))
+        # with an open ended range the planner prefers scanning idx_words_word for the DISTINCT, which reads every lookup
+        c.execute(
+            "SELECT DISTINCT word FROM words INDEXED BY idx_words_epoch WHERE epoch > ?",
+            (to_epoch(date_before),),
+        )
         success_message = f"🗓️ Words added to the vocabulary builder list from [bold blue]{date_before.strftime('%d/%m/%Y')}[/bold blue] TO [bold blue]{date_today}[/bold blue]"
         error_message = "No records found within this date range ❌"
 
@@ -870,13 +866,15 @@ def show_list(
             return
 
         # fetch records if all checks pass
-        datefmt = f"{date}%"
-        c.execute("SELECT DISTINCT word FROM words where datetime LIKE ?", (datefmt,))
+        c.execute(
+            "SELECT DISTINCT word FROM words WHERE epoch >= ? AND epoch < ?",
+            (to_epoch(checker), to_epoch(checker + timedelta(days=1))),
+        )
         success_message = f"📅 Words added to the vocabulary builder list on [bold blue]{day}/{month}/{year}[/bold blue]"
         error_message = f"No records found for [bold blue]{date}[/bold blue] ❌"
 
     elif tag:
-        c.execute("SELECT DISTINCT word FROM words WHERE tag=? ORDER BY word ASC", (tag,))
+        c.execute("SELECT word FROM word_state WHERE tag=? ORDER BY word ASC", (tag,))
         success_message = f"🏷️ Words with tag [bold violet]{tag}[/bold violet]"
         error_message = f"Tag {tag} does not exist. ❌"
 
@@ -917,7 +915,7 @@ def show_list(
             table.add_column("Last searched on", style="light_green")
             print(Panel(f"Last [bold blue][{len(rows)}][/bold blue] words searched"))
             for row in rows:
-                lookuptime = datetime.strptime(row[1], "%Y-%m-%d %H:%M:%S").strftime(
+                lookuptime = datetime.fromisoformat(row[1]).strftime(
                     "%d %b '%y | %H:%M"
                 )
                 table.add_row(row[0], lookuptime)
@@ -975,7 +973,7 @@ def show_list(
         return
 
     elif tagnames:
-        c.execute("SELECT DISTINCT tag FROM words WHERE tag is not NULL ORDER BY word ASC")
+        c.execute("SELECT DISTINCT tag FROM word_state WHERE tag is not NULL ORDER BY tag ASC")
         success_message = "🏷️ [bold magenta]YOUR TAGS :[/bold magenta]"
         error_message = "You haven't added any tags to your words yet. ❌"
 
@@ -989,7 +987,7 @@ def show_list(
         and most is None
         and tagnames is False
     ):
-        c.execute("SELECT DISTINCT word FROM words ORDER BY word ASC")
+        c.execute("SELECT word FROM word_state ORDER BY word ASC")
         success_message = "😎 Here is your list of words"
         error_message = "You have no words in your vocabulary builder list. ❌"
 
@@ -1037,14 +1035,16 @@ def delete_all() -> None:
         if rowcount == 0:
             raise NoWordsInDBException()
 
+        # drop the lookup history together with the state of every word
         c.execute("DELETE FROM words")
+        c.execute("DELETE FROM word_state")
         conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Success!  [/b reverse green]",
                 title_align="center",
                 padding=(1, 1),
-                renderable=f"All words [{c.rowcount}] [bold red]deleted[/bold red] from all your lists. ✅",
+                renderable=f"All words [{rowcount}] [bold red]deleted[/bold red] from all your lists. ✅",
             )
         )
 
@@ -1065,7 +1065,10 @@ def delete_mastered() -> None:
         if rowcount == 0:
             raise NoWordsInMasteredListException()
 
-        c.execute("DELETE FROM words WHERE mastered=1")
+        c.execute(
+            "DELETE FROM words WHERE word IN (SELECT word FROM word_state WHERE mastered=1)"
+        )
+        c.execute("DELETE FROM word_state WHERE mastered=1")
         conn.commit()
         print(
             Panel(
@@ -1093,7 +1096,10 @@ def delete_learning() -> None:
         if rowcount == 0:
             raise NoWordsInLearningListException()
 
-        c.execute("DELETE FROM words WHERE learning=1")
+        c.execute(
+            "DELETE FROM words WHERE word IN (SELECT word FROM word_state WHERE learning=1)"
+        )
+        c.execute("DELETE FROM word_state WHERE learning=1")
         conn.commit()
         print(
             Panel(
@@ -1121,7 +1127,10 @@ def delete_favorite() -> None:
         if rowcount == 0:
             raise NoWordsInFavoriteListException()
 
-        c.execute("DELETE FROM words WHERE favorite=1")
+        c.execute(
+            "DELETE FROM words WHERE word IN (SELECT word FROM word_state WHERE favorite=1)"
+        )
+        c.execute("DELETE FROM word_state WHERE favorite=1")
         conn.commit()
         print(
             Panel(
@@ -1152,7 +1161,11 @@ def delete_words_from_tag(tag: str) -> None:
         if rowcount == 0:
             raise NoSuchTagException(tag=tag)
 
-    c.execute("DELETE FROM words WHERE tag=?", (tag,))
+    c.execute(
+        "DELETE FROM words WHERE word IN (SELECT word FROM word_state WHERE tag=?)",
+        (tag,),
+    )
+    c.execute("DELETE FROM word_state WHERE tag=?", (tag,))
     conn.commit()
     print(
         Panel(
@@ -1177,10 +1190,10 @@ def delete_word(query: List[str]) -> None:
 
     check_word_exists(query)
 
-    sql = "DELETE FROM words WHERE word=?"
-    c.execute(sql, (query,))
+    c.execute("DELETE FROM words WHERE word=?", (query,))
+    c.execute("DELETE FROM word_state WHERE word=?", (query,))
+    conn.commit()
     if c.rowcount > 0:
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Delete Successful!  [/b reverse green]",
@@ -1201,12 +1214,12 @@ def clear_learning() -> None:
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("UPDATE words SET learning=0 WHERE learning=1")
+    c.execute("UPDATE word_state SET learning=0 WHERE learning=1")
+    conn.commit()
 
     with contextlib.suppress(NoWordsInLearningListException):
         if c.rowcount <= 0:
             raise NoWordsInLearningListException()
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Success!  [/b reverse green]",
@@ -1227,12 +1240,12 @@ def clear_mastered() -> None:
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("UPDATE words SET mastered=0 WHERE mastered=1")
+    c.execute("UPDATE word_state SET mastered=0 WHERE mastered=1")
+    conn.commit()
 
     with contextlib.suppress(NoWordsInMasteredListException):
         if c.rowcount <= 0:
             raise NoWordsInMasteredListException()
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Delete Successful!  [/b reverse green]",
@@ -1253,12 +1266,12 @@ def clear_favorite() -> None:
 
     conn = createConnection()
     c = conn.cursor()
-    c.execute("UPDATE words SET favorite=0 WHERE favorite=1")
+    c.execute("UPDATE word_state SET favorite=0 WHERE favorite=1")
+    conn.commit()
 
     with contextlib.suppress(NoWordsInFavoriteListException):
         if c.rowcount <= 0:
             raise NoWordsInFavoriteListException()
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Success!  [/b reverse green]",
@@ -1283,11 +1296,11 @@ def clear_all_words_from_tag(tagName: str) -> None:
     conn = createConnection()
     c = conn.cursor()
 
-    c.execute("UPDATE words SET tag=NULL where tag=?", (tagName,))
+    c.execute("UPDATE word_state SET tag=NULL where tag=?", (tagName,))
+    conn.commit()
     with contextlib.suppress(NoSuchTagException):
         if c.rowcount <= 0:
             raise NoSuchTagException(tag=tagName)
-        conn.commit()
         print(
             Panel(
                 title="[b reverse green]  Delete Successful! [/b reverse green]",
@@ -1319,15 +1332,21 @@ def get_lookup_rate(
 
     conn = createConnection()
     c = conn.cursor()
+    # the days of daily_lookups are local dates, date('now') would be the UTC date
+    local_date = datetime.now().strftime("%Y-%m-%d")
 
     if today:
         # get today's learning words
-        c.execute("SELECT COUNT(word) FROM words WHERE date(datetime)=date('now')")
+        c.execute(
+            "SELECT COALESCE(SUM(lookups), 0) FROM daily_lookups WHERE day=?",
+            (local_date,),
+        )
         learning_count_today = c.fetchone()[0]
 
         # get yesterdays learning words
         c.execute(
-            "SELECT COUNT(word) FROM words WHERE date(datetime)=date('now', '-1 day')"
+            "SELECT COALESCE(SUM(lookups), 0) FROM daily_lookups WHERE day=date(?, '-1 day')",
+            (local_date,),
         )
         learning_count_yesterday = c.fetchone()[0]
 
@@ -1361,12 +1380,14 @@ def get_lookup_rate(
 
     elif week:
         c.execute(
-            "SELECT COUNT(word) FROM words WHERE date(datetime)>=date('now', '-7 day')"
+            "SELECT COALESCE(SUM(lookups), 0) FROM daily_lookups WHERE day>=date(?, '-7 day')",
+            (local_date,),
         )
         learning_count_week = c.fetchone()[0]
 
         c.execute(
-            "SELECT COUNT(word) FROM words WHERE date(datetime)>=date('now', '-14 day') AND date(datetime)<date('now', '-7 day')"
+            "SELECT COALESCE(SUM(lookups), 0) FROM daily_lookups WHERE day>=date(?, '-14 day') AND day<date(?, '-7 day')",
+            (local_date, local_date),
         )
         learning_count_last_week = c.fetchone()[0]
 
@@ -1399,12 +1420,14 @@ def get_lookup_rate(
 
     elif month:
         c.execute(
-            "SELECT COUNT(word) FROM words WHERE date(datetime)>=date('now', '-1 month')"
+            "SELECT COALESCE(SUM(lookups), 0) FROM daily_lookups WHERE day>=date(?, '-1 month')",
+            (local_date,),
         )
         learning_count_month = c.fetchone()[0]
 
         c.execute(
-            "SELECT COUNT(word) FROM words WHERE date(datetime)>=date('now', '-2 month') AND date(datetime)<date('now', '-1 month')"
+            "SELECT COALESCE(SUM(lookups), 0) FROM daily_lookups WHERE day>=date(?, '-2 month') AND day<date(?, '-1 month')",
+            (local_date, local_date),
         )
         learning_count_last_month = c.fetchone()[0]
 
@@ -1440,12 +1463,14 @@ def get_lookup_rate(
 
     elif year:
         c.execute(
-            "SELECT COUNT(word) FROM words WHERE date(datetime)>=date('now', '-1 year')"
+            "SELECT COALESCE(SUM(lookups), 0) FROM daily_lookups WHERE day>=date(?, '-1 year')",
+            (local_date,),
         )
         learning_count_year = c.fetchone()[0]
 
         c.execute(
-            "SELECT COUNT(word) FROM words WHERE date(datetime)>=date('now', '-2 year') AND date(datetime)<date('now', '-1 year')"
+            "SELECT COALESCE(SUM(lookups), 0) FROM daily_lookups WHERE day>=date(?, '-2 year') AND day<date(?, '-1 year')",
+            (local_date, local_date),
         )
         learning_count_last_year = c.fetchone()[0]
 
@@ -1490,85 +1515,74 @@ def get_lookup_rate(
         )
 
 
-def get_consecutive_dates(dates: list) -> tuple:
+def show_streak(top: int = 5) -> None:
     """
-    Returns list of consecutive dates from list of dates
+    Shows streak of days user has looked up words
 
-    1. Sort the list of dates
-    2. Iterate through the list of dates
-    3. If the difference between the current date and the next date is 1 day, continue
-    4. If the difference between the current date and the next date is not 1 day, append the start date and the current date to the list of consecutive dates
-    5. Set the start date to the next date
-    6. Return the item with the longest time difference
+    1. Read the streaks from the lookup_streaks cache, compute them from daily_lookups first if a new day emptied it.
+    2. If there are no streaks, there are no words in the database.
+    3. The current streak is the latest one if it ended today or yesterday, it can still go on today.
+    4. Print the longest and the current streak, then the top streaks if there is more than one.
 
     Args:
-        dates (list): list of dates
-
-    Returns:
-        tuple: tuple of consecutive dates
-    """
-
-    consecutive_dates = []
-    start_date = dates[0]
-
-    for i in range(len(dates) - 1):
-        if dates[i + 1] - dates[i] == timedelta(days=1):
-            continue
-        consecutive_dates.append((start_date, dates[i]))
-        start_date = dates[i + 1]
-
-    consecutive_dates.append((start_date, dates[-1]))
-
-    # return the item with the longest time difference
-    return max(consecutive_dates, key=lambda x: x[1] - x[0])
-
-
-def show_streak() -> None:
-    """
-    Shows streak of days user has looked up words
-
-    1. Check if there are any words in the database.
-    2. If there are words, get all the dates from the database.
-    3. Convert dates to datetime objects
-    4. Sort dates
-    5. Get consecutive dates
-    6. Get difference between consecutive dates
-    7. Print streak
+        top (int, optional): Number of streaks listed, longest first. Defaults to 5.
     """
 
     conn = createConnection()
     c = conn.cursor()
 
     try:
-        c.execute("SELECT DISTINCT(date(datetime)) FROM words")
-        if not c.fetchone():
-            raise NoWordsInDBException()
-
-        c.execute("SELECT DISTINCT(date(datetime)) FROM words")
-        dates = c.fetchall()
-
-        # convert dates to datetime objects
-        for i in range(len(dates)):
-            dates[i] = datetime.strptime(dates[i][0], "%Y-%m-%d")
-
-        # sort dates
-        dates.sort()
+        c.execute("SELECT EXISTS (SELECT 1 FROM lookup_streaks)")
+        if not c.fetchone()[0]:
+            rebuild_lookup_streaks(c)
+            conn.commit()
 
-        max_streak = get_consecutive_dates(dates)
-        streak_days = max_streak[1] - max_streak[0]
+        c.execute(
+            'SELECT start, "end", days FROM lookup_streaks ORDER BY days DESC, start LIMIT ?',
+            (max(top, 1),),
+        )
+        streaks = [
+            (
+                datetime.strptime(start, "%Y-%m-%d"),
+                datetime.strptime(end, "%Y-%m-%d"),
+                days,
+            )
+            for start, end, days in c.fetchall()
+        ]
+        if not streaks:
+            raise NoWordsInDBException()
 
-        # convert streak_days to days
-        streak_days = int(streak_days.days) + 1
+        c.execute('SELECT "end", days FROM lookup_streaks ORDER BY start DESC LIMIT 1')
+        last_end, last_days = c.fetchone()
+        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        current_streak = last_days if last_end >= yesterday else 0
 
+        longest_start, longest_end, longest_days = streaks[0]
         print(
             Panel(
-                f"🔥 Your longest word lookup streak is [bold green]{streak_days}[/bold green] day(s).\n[violet]Start Date[/violet]: {max_streak[0].strftime('%d %B %Y')}\n[violet]End Date[/violet]: {max_streak[1].strftime('%d %B %Y')}",
+                f"🔥 Your longest word lookup streak is [bold green]{longest_days}[/bold green] day(s).\n[violet]Start Date[/violet]: {longest_start.strftime('%d %B %Y')}\n[violet]End Date[/violet]: {longest_end.strftime('%d %B %Y')}\n[violet]Current Streak[/violet]: {current_streak} day(s)",
                 title="[reverse]Streak[/reverse]",
                 title_align="center",
                 padding=(1, 1),
             )
         )
 
+        if top > 1 and len(streaks) > 1:
+            table = Table(show_header=True, header_style="bold bright_cyan")
+            table.add_column("#", style="dim")
+            table.add_column("Days", style="light_green")
+            table.add_column("Start Date", style="cyan")
+            table.add_column("End Date", style="cyan")
+            for rank, (start, end, days) in enumerate(streaks, start=1):
+                table.add_row(
+                    str(rank),
+                    str(days),
+                    start.strftime("%d %B %Y"),
+                    end.strftime("%d %B %Y"),
+                )
+            print(Panel(f"🏆 Top [bold blue][{len(streaks)}][/bold blue] streaks"))
+            print(table)
+
     except NoWordsInDBException as e:
         print(e)
 
@@ -1592,7 +1606,7 @@ def predict_milestone(milestone: int) -> None:
     conn = createConnection()
     c = conn.cursor()
 
-    c.execute("SELECT DISTINCT word FROM words")
+    c.execute("SELECT word FROM word_state LIMIT 1")
 
     with contextlib.suppress(NoWordsInDBException):
         if not c.fetchone():
@@ -1603,7 +1617,7 @@ def predict_milestone(milestone: int) -> None:
             )
             raise NoWordsInDBException()
 
-        c.execute("SELECT COUNT(DISTINCT word) FROM words")
+        c.execute("SELECT COUNT(*) FROM word_state")
 
         learning_count = c.fetchone()[0]
 
@@ -1619,11 +1633,11 @@ def predict_milestone(milestone: int) -> None:
             )
         else:
             # get the date of the most recent word looked up
-            c.execute("SELECT date(datetime) FROM words ORDER BY datetime DESC LIMIT 1")
+            c.execute("SELECT MAX(day) FROM daily_lookups")
             last_date = datetime.strptime(c.fetchone()[0], "%Y-%m-%d")
 
             # get the date of the first word looked up
-            c.execute("SELECT date(datetime) FROM words ORDER BY datetime ASC LIMIT 1")
+            c.execute("SELECT MIN(day) FROM daily_lookups")
             first_date = datetime.strptime(c.fetchone()[0], "%Y-%m-%d")
 
             # average words per day
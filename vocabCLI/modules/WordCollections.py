@@ -2,7 +2,6 @@ import contextlib
 import csv
 import os
 
-import pandas as pd
 from Database import *
 from Exceptions import *
 from rich import box, print
@@ -21,6 +20,9 @@ def delete_collection_from_DB():
 def clean_collection_csv_data():
     """Cleans the domains.csv file and writes the cleaned data to domains.csv"""
 
+    # pandas is only needed here, on the very first run, and is too slow to import on every start
+    import pandas as pd
+
     df = pd.read_csv("modules/domains.csv", encoding="latin-1")  # Read the CSV Files
     df["word"] = df["word"].str.lower()  # convert all words to lowercase
     # Remove the rows with spaces in the word column
@@ -16,16 +16,199 @@ app = typer.Typer(
 )
 
 
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="🔬 Profile the command with cProfile, save the profile to profiles/ and print the slowest functions.",
+    ),
+    profile_top: int = typer.Option(
+        20, "--profile-top", help="🔬 Number of functions --profile prints.", min=1
+    ),
+    timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="⏱  Print how long every stage of the command took, spinners included.",
+    ),
+    trace_sql: bool = typer.Option(
+        False,
+        "--trace-sql",
+        help="🗃  Trace the SQL statements of the command and print the slowest, the most frequent and the full scans.",
+    ),
+):
+    """
+    Options that apply to every command, they go before the command name.
+    """
+    if ctx.invoked_subcommand is None:
+        return
+
+    from modules.Metrics import command_timer
+
+    # every command's duration goes into the metrics, see stats --internal
+    ctx.with_resource(command_timer(ctx.invoked_subcommand))
+    if not (profile or timings or trace_sql):
+        return
+
+    from modules.Profiling import enable_timings, print_timings, profile_command, span
+
+    # resources are closed in reverse order, the profile covers the command and printing its timings
+    if profile:
+        ctx.with_resource(profile_command(ctx.invoked_subcommand, profile_top))
+    if timings:
+        enable_timings()
+        ctx.call_on_close(print_timings)
+        ctx.with_resource(span(ctx.invoked_subcommand))
+    if trace_sql:
+        from modules.SQLTrace import print_report
+        from modules.SQLTrace import trace_sql as start_trace
+
+        trace = ctx.with_resource(start_trace())
+        ctx.call_on_close(lambda: print_report(trace, ctx.invoked_subcommand))
+
+
 @app.command(
     rich_help_panel="Miscellaneous", help="🔄 Update the JSON response in the cache"
 )
-def refresh():
+def refresh(
+    workers: int = typer.Option(
+        8, "--workers", "-w", help="Number of words fetched from the API at once.", min=1
+    ),
+    rate: float = typer.Option(
+        10.0, "--rate", "-r", help="Maximum API requests per second.", min=0.1
+    ),
+    stale_after: int = typer.Option(
+        None,
+        "--stale-after",
+        "-s",
+        help="Only refresh words fetched more than N days ago.",
+        min=0,
+    ),
+    accessed_since: int = typer.Option(
+        None,
+        "--only-accessed-since",
+        "-a",
+        help="Only refresh words looked up in the last N days.",
+        min=0,
+    ),
+    limit: int = typer.Option(
+        None,
+        "--limit",
+        "-l",
+        help="Refresh at most N words, most looked up first.",
+        min=1,
+    ),
+):
     """
     Refreshes the cached content from the API.
     """
     from modules.Database import refresh_cache
 
-    refresh_cache()
+    refresh_cache(
+        workers=workers,
+        rate=rate,
+        stale_after=stale_after,
+        accessed_since=accessed_since,
+        limit=limit,
+    )
+
+
+@app.command(
+    rich_help_panel="Miscellaneous",
+    help="😈 Keep models and caches warm in a background [bold blue]daemon[/bold blue]",
+)
+def daemon(
+    stop: bool = typer.Option(
+        False, "--stop", "-s", help="😈 Stop the running daemon."
+    ),
+    status: bool = typer.Option(
+        False, "--status", "-S", help="😈 Show whether the daemon is running."
+    ),
+):
+    """
+    Runs the daemon in the foreground. While it runs, lookups and text processing commands are handed over to it.
+    """
+    from modules.Daemon import send_request, serve
+
+    if stop:
+        if send_request({"stop": True}) is None:
+            print(Panel("The daemon is not running. 💤"))
+        else:
+            print(Panel("[bold green]Daemon stopped.[/bold green] 👋🏼"))
+
+    elif status:
+        if (reply := send_request({"status": True})) is None:
+            print(Panel("The daemon is not running. 💤"))
+        else:
+            memo = reply["response_memo"]
+            print(
+                Panel(
+                    f"[bold green]Daemon running[/bold green] (pid {reply['pid']}) for {reply['uptime']:.0f}s, {reply['served']} command(s) served.\n"
+                    f"Response memo: {memo['currsize']}/{memo['maxsize']} words, {memo['hits']} hit(s), {memo['misses']} miss(es)."
+                )
+            )
+
+    else:
+        serve(app)
+
+
+@app.command(
+    rich_help_panel="Miscellaneous",
+    help="🏋🏼 Fill the database with [bold blue]load testing[/bold blue] data",
+)
+def loadgen(
+    rules: str = typer.Argument(
+        "modules/_load_testing_rules.txt",
+        help="🏋🏼 Rules file saying which words get which statuses and tags.",
+    ),
+    words: int = typer.Option(
+        1000, "--words", "-w", help="🏋🏼 Number of words to generate.", min=1
+    ),
+    lookups: int = typer.Option(
+        10000, "--lookups", "-l", help="🏋🏼 Number of lookups to generate.", min=1
+    ),
+    ranges: List[str] = typer.Option(
+        None,
+        "--range",
+        "-r",
+        help="🏋🏼 Spread the lookups over YYYY-MM-DD:YYYY-MM-DD, can be given more than once. Defaults to the last 365 days.",
+    ),
+    seed: int = typer.Option(
+        None, "--seed", "-s", help="🏋🏼 Random seed, the same seed makes the same data."
+    ),
+):
+    """
+    Generates words and lookups that follow a rules file and inserts them in one transaction.
+    """
+    from datetime import datetime, timedelta
+
+    from modules.LoadGen import load_test_data, parse_date_range
+
+    if ranges:
+        date_ranges = [parse_date_range(text) for text in ranges]
+    else:
+        now = datetime.now().replace(microsecond=0)
+        start = (now - timedelta(days=364)).replace(hour=0, minute=0, second=0)
+        date_ranges = [(start, now)]
+
+    if not os.path.isfile(rules):
+        print(Panel(f"The rules file [bold red]{rules}[/bold red] doesn't exist. ❌"))
+        return
+    load_test_data(rules, words, lookups, date_ranges, seed=seed)
+
+
+@app.command(
+    rich_help_panel="Miscellaneous",
+    help="🐚 Run commands in an interactive [bold blue]shell[/bold blue]",
+)
+def shell():
+    """
+    Runs the commands typed at a prompt in one process, so the database, caches and models are loaded once for the whole session.
+    """
+    from modules.Shell import run_shell
+
+    run_shell(app)
 
 
 @app.command(
@@ -57,7 +240,21 @@ def about():
 )
 def define(
     words: List[str] = typer.Argument(
-        ..., help="📚 [bold blue]Word[/bold blue] which is to be defined."
+        None,
+        help="📚 [bold blue]Word[/bold blue] which is to be defined. Use - to read words from the standard input.",
+    ),
+    file: typer.FileText = typer.Option(
+        None,
+        "--file",
+        "-F",
+        help="📚 Also define the words in a [bold blue]file[/bold blue], separated by whitespace.",
+    ),
+    workers: int = typer.Option(
+        8,
+        "--workers",
+        "-w",
+        help="📚 Number of words looked up at the same time.",
+        min=1,
     ),
     short: bool = typer.Option(
         False,
@@ -75,12 +272,26 @@ def define(
 
     Args:
         words (List[str]): Word which is to be defined.
+        file (typer.FileText, optional): File with more words to define. Defaults to None.
+        workers (int, optional): Number of words looked up at the same time. Defaults to 8.
         short (bool, optional): If True, prints the short definition of the word. Defaults to False.
         pronounce (bool, optional): If True, plays the pronunciation of the word. Defaults to False.
     """
-    from modules.Dictionary import definition, say_aloud
+    from modules.Dictionary import definition, prefetch_words, read_words, say_aloud
 
-    for word in words:
+    if not words and file is None:
+        print(
+            Panel(
+                title="[b reverse red]  Error!  [/b reverse red]",
+                title_align="center",
+                padding=(1, 1),
+                renderable="Give the words to define, use - to read them from the standard input or --file to read them from a file. 🤔",
+            )
+        )
+        return
+
+    # words are looked up concurrently ahead of time and printed in the order they were given
+    for word in prefetch_words(read_words(words, file), workers=workers):
 
         if short:
             definition(word, short=True)
@@ -918,6 +1129,17 @@ def revise(
         "-c",
         help="💡 [u]Revise[/u] words in a particular [bold cyan r]collection[/bold cyan r].",
     ),
+    log_lookups: bool = typer.Option(
+        False,
+        "--log-lookups",
+        help="💡 Log a lookup of every revised word, like [u]define[/u] does.",
+    ),
+    due: bool = typer.Option(
+        False,
+        "--due",
+        "-d",
+        help="💡 [u]Revise[/u] the words that are [bold red r]due[/bold red r] for review, the most overdue first.",
+    ),
 ):
     # sourcery skip: remove-redundant-if
     """
@@ -930,47 +1152,60 @@ def revise(
         mastered (Optional[bool], optional): Revise words in your mastered list. Defaults to False.
         favorite (Optional[bool], optional): Revise words in your favorite list. Defaults to False.
         collection (Optional[str], optional): Revise words in a particular collection. Defaults to None.
+        log_lookups (Optional[bool], optional): Log a lookup of every revised word. Defaults to False.
+        due (Optional[bool], optional): Revise the words that are due for review. Defaults to False.
     """
 
     from modules.Study import (
         revise_all,
         revise_collection,
+        revise_due,
         revise_favorite,
         revise_learning,
         revise_mastered,
         revise_tag,
     )
 
-    if not any([learning, mastered, favorite, collection, tag]) and not number:
-        revise_all()
+    if due and any([learning, mastered, favorite, collection, tag]):
+        raise typer.BadParameter(
+            message="--due revises the words due for review, it cannot be combined with a list, a tag or a collection."
+        )
+
+    if not any([learning, mastered, favorite, collection, tag, due]) and not number:
+        revise_all(log_lookups=log_lookups)
+
+    elif number and not any([learning, mastered, favorite, collection, tag, due]):
+        revise_all(number=number, log_lookups=log_lookups)
 
-    elif number and not any([learning, mastered, favorite, collection, tag]):
-        revise_all(number=number)
+    elif due:
+        revise_due(number=number, log_lookups=log_lookups)
 
     elif tag and not number:
-        revise_tag(tag=tag)
+        revise_tag(tag=tag, log_lookups=log_lookups)
     elif tag and number:
-        revise_tag(number=number, tag=tag)
+        revise_tag(number=number, tag=tag, log_lookups=log_lookups)
 
     elif learning and not number:
-        revise_learning()
+        revise_learning(log_lookups=log_lookups)
     elif learning and number:
-        revise_learning(number=number)
+        revise_learning(number=number, log_lookups=log_lookups)
 
     elif mastered and not number:
-        revise_mastered()
+        revise_mastered(log_lookups=log_lookups)
     elif mastered and number:
-        revise_mastered(number=number)
+        revise_mastered(number=number, log_lookups=log_lookups)
 
     elif favorite and not number:
-        revise_favorite()
+        revise_favorite(log_lookups=log_lookups)
     elif favorite and number:
-        revise_favorite(number=number)
+        revise_favorite(number=number, log_lookups=log_lookups)
 
     elif collection and not number:
-        revise_collection(collectionName=collection)
+        revise_collection(collectionName=collection, log_lookups=log_lookups)
     elif collection and number:
-        revise_collection(number=number, collectionName=collection)
+        revise_collection(
+            number=number, collectionName=collection, log_lookups=log_lookups
+        )
 
     else:
         print(
@@ -1031,6 +1266,19 @@ def quiz(
         "-h",
         help="❓ Show [i u]quiz[/i u] [bold orchid2]history[/bold orchid2] and [bold pink1]statistics[/bold pink1]",
     ),
+    due: bool = typer.Option(
+        False,
+        "--due",
+        "-d",
+        help="❓ Take a [i u]quiz[/i u] on the words that are [bold red r]due[/bold red r] for review, the most overdue first",
+    ),
+    weak: int = typer.Option(
+        None,
+        "--weak",
+        "-w",
+        help="❓ Take a [i u]quiz[/i u] on the N words you answered [bold red r]wrong[/bold red r] most often",
+        min=4,
+    ),
 ):
     # sourcery skip: remove-redundant-if
     """
@@ -1043,23 +1291,42 @@ def quiz(
         mastered (Optional[bool], optional): Take a quiz on words in your mastered list. Defaults to False.
         favorite (Optional[bool], optional): Take a quiz on words in your favorite list. Defaults to False.
         collection (Optional[str], optional): Take a quiz on words in a particular collection. Defaults to None.
+        due (Optional[bool], optional): Take a quiz on the words that are due for review. Defaults to False.
+        weak (int, optional): Number of words answered wrong most often to quiz on. Defaults to None.
     """
     from modules.Study import (
         quiz_all,
         quiz_collection,
+        quiz_due,
         quiz_favorite,
         quiz_learning,
         quiz_mastered,
         quiz_tag,
+        quiz_weak,
         show_quiz_history,
     )
 
-    if not any([learning, mastered, favorite, collection, tag, history]) and not number:
+    if due and any([learning, mastered, favorite, collection, tag, history, weak]):
+        raise typer.BadParameter(
+            message="--due quizzes on the words due for review, it cannot be combined with a list, a tag, a collection, --history or --weak."
+        )
+    if weak and any([learning, mastered, favorite, collection, tag, history, number]):
+        raise typer.BadParameter(
+            message="--weak picks its own words, it cannot be combined with a list, a tag, a collection, --history or --number."
+        )
+
+    if not any([learning, mastered, favorite, collection, tag, history, due, weak]) and not number:
         quiz_all()
 
-    elif number and not any([learning, mastered, favorite, collection, tag, history]):
+    elif number and not any([learning, mastered, favorite, collection, tag, history, due, weak]):
         quiz_all(number=number)
 
+    elif weak:
+        quiz_weak(number=weak)
+
+    elif due:
+        quiz_due(number=number)
+
     elif tag and not number:
         quiz_tag(tag=tag)
     elif tag and number:
@@ -1400,11 +1667,15 @@ def quote(
 @app.command(
     rich_help_panel="Stats", help="🔥 Get the streak of days you have looked up words."
 )
-def streak():
+def streak(
+    top: int = typer.Option(
+        5, "--top", "-t", help="🏆 Number of streaks listed, longest first."
+    ),
+):
 
     from modules.Utils import show_streak
 
-    show_streak()
+    show_streak(top)
 
 
 @app.command(
@@ -1421,6 +1692,63 @@ def milestone(
     predict_milestone(milestone_number)
 
 
+@app.command(
+    rich_help_panel="Stats",
+    help="🛠  Metrics the app records about itself, add --internal.",
+)
+def stats(
+    internal: bool = typer.Option(
+        False,
+        "--internal",
+        "-i",
+        help="🛠  Show the dictionary API latency, the cache hit rate and the command durations.",
+    ),
+    days: int = typer.Option(
+        7, "--days", "-d", help="🛠  Days the internal metrics cover.", min=1
+    ),
+    json: bool = typer.Option(
+        False, "--json", help="🛠  Export the internal metrics as JSON."
+    ),
+    prometheus: bool = typer.Option(
+        False,
+        "--prometheus",
+        help="🛠  Export all internal metrics in the Prometheus text format.",
+    ),
+    output: str = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="🛠  Write the export to this file instead of the terminal, e.g. for the textfile collector of the node exporter.",
+    ),
+):
+    """
+    Shows the metrics the app records about itself, or exports them.
+
+    Args:
+        internal (bool, optional): Must be True, the internal metrics are all there is to show. Defaults to False.
+        days (int, optional): Days the internal metrics cover. Defaults to 7.
+        json (bool, optional): If True, export the internal metrics as JSON. Defaults to False.
+        prometheus (bool, optional): If True, export the internal metrics for Prometheus. Defaults to False.
+        output (str, optional): File the export is written to. Defaults to the terminal.
+    """
+
+    if json and prometheus:
+        raise typer.BadParameter(message="Use either --json or --prometheus, not both.")
+    if not internal:
+        raise typer.BadParameter(
+            message="stats shows the internal metrics of the app, add --internal."
+        )
+
+    if json or prometheus or output:
+        from modules.Metrics import export_metrics
+
+        export_metrics(prometheus, days, output)
+    else:
+        from modules.Metrics import show_internal_stats
+
+        show_internal_stats(days)
+
+
 @app.command(rich_help_panel="Miscellaneous", help="🔆 Get quote of the day.")
 def daily_quote():
     from modules.Quotes import get_quote_of_the_day
@@ -1496,15 +1824,21 @@ def spellcheck(text: str = typer.Argument(..., help="🔠 Text to spell check.")
 
 
 if __name__ == "__main__":
+    from modules.Daemon import forward_to_daemon
+
+    # a running daemon has the database, the caches and the models ready, let it run the command
+    if (exit_code := forward_to_daemon(sys.argv[1:])) is not None:
+        sys.exit(exit_code)
+
     from modules.Database import initializeDB
-    from modules.WordCollections import (
-        clean_collection_csv_data,
-        delete_collection_from_DB,
-        insert_collection_to_DB,
-    )
 
     # check if Vocabulary.db exists, if not create it
     if not os.path.exists("VocabularyBuilder.db"):
+        from modules.WordCollections import (
+            clean_collection_csv_data,
+            delete_collection_from_DB,
+            insert_collection_to_DB,
+        )
 
         # initialize the database with the tables if not already existing
         initializeDB()
@@ -1514,4 +1848,8 @@ if __name__ == "__main__":
         # add all the collection words to the database if not already existing
         insert_collection_to_DB()
 
+    # upgrade databases created by older versions in place, a no-op once the schema is up to date
+    else:
+        initializeDB()
+
     app()